@@ -3,11 +3,25 @@ Web application for the Blockchain-based Voting System.
 Provides a modern web UI using Flask.
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
-from voting_system import VotingSystem
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context, g
+from voting_system import VotingSystem, Voter, VoterRegistry
+from mining_jobs import SealingPolicy
+from election_store import ElectionStore
+from sqlite_store import SQLiteElectionStore
+from voter_import import VoterImporter, iter_voter_records, IMPORT_FORMATS
+from create_sample_data import SyntheticElection
+from live_feed import LiveFeed
 import secrets
 import os
+import atexit
 import time
+import json
+import itertools
+import math
+import codecs
+import threading
+import metrics
+from events import attach_console_logger, default_bus, EVENT_SNAPSHOT_PUBLISHED
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(32)
@@ -15,6 +29,23 @@ app.secret_key = secrets.token_hex(32)
 # Disable caching for development
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 
+@app.before_request
+def start_request_timer():
+    """Note when the request started, for the per-route latency histogram."""
+    if metrics.ENABLED:
+        g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    """Observe the request's latency under its route, method and status."""
+    started = g.get('request_started')
+    if started is not None:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, request.endpoint or 'unmatched',
+                                        request.method, str(response.status_code))
+    return response
+
+
 @app.after_request
 def add_header(response):
     """Add headers to prevent caching"""
@@ -23,10 +54,154 @@ def add_header(response):
     response.headers['Expires'] = '-1'
     return response
 
-# Global storage for multiple elections
+# The voting system reports votes, blocks and elections as events; print them only on request
+if os.environ.get('VOTING_LOG_EVENTS') == '1':
+    attach_console_logger()
+
+# Global storage for multiple elections. The map is copy-on-write: writers swap in
+# an updated copy under elections_lock so readers can iterate it without locking.
 elections = {}  # {election_id: VotingSystem}
 current_election_id = None
-shared_voters = {}  # {voter_id: Voter} - shared across elections
+elections_lock = threading.Lock()
+shared_voters = VoterRegistry()  # Shared across elections; each tracks who voted in it
+
+# Optional on-disk persistence; state is rebuilt from the store on startup.
+# VOTING_DATABASE (SQLite) lets several worker processes share elections;
+# VOTING_DATA_DIR keeps them in per-election files owned by a single process.
+DATABASE_PATH = os.environ.get('VOTING_DATABASE')
+DATA_DIR = os.environ.get('VOTING_DATA_DIR')
+if DATABASE_PATH:
+    election_store = SQLiteElectionStore(DATABASE_PATH)
+elif DATA_DIR:
+    election_store = ElectionStore(DATA_DIR)
+else:
+    election_store = None
+if election_store:
+    elections, shared_voters = election_store.load()
+    # The last worker to exit removes the shared tally segments
+    atexit.register(election_store.close)
+    current_election_id = election_store.load_current_election() or next(reversed(elections), None)
+
+
+# Read-only endpoints that answer from the shared tally segment instead of
+# first catching up on every vote and block written by other workers
+LIVE_TALLY_ENDPOINTS = {'results', 'api_stats'}
+
+# Seconds between live feed checks for changes made by other worker processes
+LIVE_FEED_POLL_INTERVAL = 1.0
+
+# Live streams one worker serves at once. Each holds a server thread, so keep
+# this well below gunicorn's --threads to leave threads for voting; dashboards
+# turned away fall back to polling /api/live-state
+MAX_LIVE_STREAMS = int(os.environ.get('MAX_LIVE_STREAMS', 16))
+
+
+def live_snapshot(election_id):
+    """An election's snapshot with counts from shared memory, or None if the store keeps none."""
+    tally = election_store.live_tally(election_id) if election_store else None
+    counts = tally.read() if tally else None
+    if counts is None:
+        return None
+    return elections[election_id].snapshot.with_counts(counts)
+
+
+def election_snapshot(election_id):
+    """The snapshot read-only endpoints serve, preferring live shared counts."""
+    return g.get('live_snapshot') or elections[election_id].snapshot
+
+
+def sync_shared_state(current):
+    """Catch up on elections, voters, votes and blocks written by other worker processes."""
+    global elections, current_election_id
+    # Refresh and publish together, so a stale map never replaces a newer one
+    with elections_lock:
+        elections = election_store.refresh(elections, shared_voters)
+        if current in elections:
+            current_election_id = current
+
+
+@app.before_request
+def refresh_shared_state():
+    """Pick up elections, voters, votes and blocks written by other worker processes."""
+    global current_election_id
+    if not election_store or request.endpoint in ('static', 'metrics'):
+        return
+    current = election_store.load_current_election()
+    if request.endpoint in LIVE_TALLY_ENDPOINTS and current in elections:
+        g.live_snapshot = live_snapshot(current)
+        if g.live_snapshot is not None:
+            with elections_lock:
+                current_election_id = current
+            return
+    
+    sync_shared_state(current)
+
+
+def live_feed_state():
+    """The current election's statistics and results, as pushed to live dashboards."""
+    if election_store:
+        sync_shared_state(election_store.load_current_election())
+    election_id = current_election_id
+    voting_system = elections.get(election_id) if election_id else None
+    if voting_system is None:
+        return {'election_id': None}
+    
+    snapshot = voting_system.snapshot
+    latest_block = voting_system.blockchain.chain[snapshot.blockchain_blocks - 1]
+    return {
+        'election_id': election_id,
+        'candidates': {cid: {'name': c.name, 'party': c.party} for cid, c in snapshot.candidates.items()},
+        'results': dict(snapshot.results),
+        'latest_block': {
+            'index': latest_block.index,
+            'hash': latest_block.hash,
+            'nonce': latest_block.nonce,
+            'transaction_count': len(latest_block.transactions)
+        },
+        **snapshot.to_stats_dict(voting_system.get_voter_count())
+    }
+
+
+# One feed per process, woken whenever any election publishes a new snapshot.
+# With a shared database it also polls for changes made by other workers.
+live_feed = LiveFeed(live_feed_state, poll_interval=LIVE_FEED_POLL_INTERVAL if election_store else None,
+                     max_clients=MAX_LIVE_STREAMS)
+default_bus.subscribe(live_feed.notify, EVENT_SNAPSHOT_PUBLISHED)
+
+
+def create_voting_system(election_id, election_name, difficulty=2, mining_workers=1,
+                         sealing_policy=None, genesis_time=None):
+    """Create an election, backed by a block log and vote journal when persistence is enabled."""
+    if not election_store:
+        return VotingSystem(election_name, difficulty, mining_workers, sealing_policy,
+                            voter_registry=shared_voters, genesis_time=genesis_time)
+    return VotingSystem(election_name, difficulty, mining_workers, sealing_policy,
+                        election_store.open_block_store(election_id),
+                        election_store.open_vote_journal(election_id),
+                        voter_registry=shared_voters, genesis_time=genesis_time)
+
+
+def add_election(election_id, voting_system):
+    """Publish a new election and make it the current one."""
+    global elections, current_election_id
+    with elections_lock:
+        elections = {**elections, election_id: voting_system}
+        current_election_id = election_id
+    if election_store:
+        election_store.save_current_election(election_id)
+    live_feed.notify()
+
+
+def persist_election(election_id):
+    """Save an election's manifest after its settings, candidates or status change."""
+    if election_store:
+        election_store.save_election(election_id, elections[election_id])
+
+
+def persist_voter(voter):
+    """Add a newly registered voter to the durable voter roll."""
+    if election_store:
+        election_store.save_voter(voter)
 
 
 @app.route('/')
@@ -46,16 +221,7 @@ def admin():
     
     stats = None
     if voting_system:
-        stats = {
-            'election_name': voting_system.election_name,
-            'is_active': voting_system.is_active,
-            'voter_count': voting_system.get_voter_count(),
-            'candidate_count': voting_system.get_candidate_count(),
-            'votes_cast': voting_system.get_votes_cast(),
-            'pending_votes': len(voting_system.blockchain.pending_transactions),
-            'blockchain_blocks': len(voting_system.blockchain.chain),
-            'blockchain_valid': voting_system.blockchain.is_chain_valid()
-        }
+        stats = voting_system.snapshot.to_stats_dict(voting_system.get_voter_count())
     
     election_list = [{'id': eid, 'name': e.election_name, 'is_active': e.is_active} 
                      for eid, e in elections.items()]
@@ -102,12 +268,13 @@ def results():
     if not voting_system:
         return render_template('results.html', system_exists=False, elections=election_list)
     
-    results_data = voting_system.get_results()
+    snapshot = election_snapshot(current_election_id)
+    results_data = snapshot.results
     candidates_info = []
     total_votes = sum(results_data.values())
     
     for candidate_id, votes in sorted(results_data.items(), key=lambda x: x[1], reverse=True):
-        candidate = voting_system.candidates[candidate_id]
+        candidate = snapshot.candidates[candidate_id]
         percentage = (votes / total_votes * 100) if total_votes > 0 else 0
         candidates_info.append({
             'id': candidate_id,
@@ -118,7 +285,7 @@ def results():
         })
     
     stats = {
-        'election_name': voting_system.election_name,
+        'election_name': snapshot.election_name,
         'election_id': current_election_id,
         'total_votes': total_votes,
         'total_voters': voting_system.get_voter_count(),
@@ -141,6 +308,9 @@ def api_create_election():
     data = request.json
     election_name = data.get('election_name')
     difficulty = int(data.get('difficulty', 2))
+    mining_workers = min(max(int(data.get('mining_workers', 1)), 1), os.cpu_count() or 1)
+    seal_max_votes = data.get('seal_max_votes')
+    seal_max_seconds = data.get('seal_max_seconds')
     
     if not election_name:
         return jsonify({'success': False, 'message': 'Election name is required'})
@@ -149,14 +319,15 @@ def api_create_election():
     election_id = f"election_{len(elections) + 1}_{secrets.token_hex(4)}"
     
     # Create new election
-    new_election = VotingSystem(election_name, difficulty)
-    
-    # Copy shared voters to new election
-    for voter_id, voter in shared_voters.items():
-        new_election.voters[voter_id] = voter
+    sealing_policy = SealingPolicy(
+        max_pending_votes=int(seal_max_votes) if seal_max_votes else None,
+        max_wait_seconds=float(seal_max_seconds) if seal_max_seconds else None
+    )
+    new_election = create_voting_system(election_id, election_name, difficulty, mining_workers,
+                                        sealing_policy)
     
-    elections[election_id] = new_election
-    current_election_id = election_id
+    add_election(election_id, new_election)
+    persist_election(election_id)
     
     return jsonify({
         'success': True, 
@@ -176,6 +347,9 @@ def api_switch_election():
         return jsonify({'success': False, 'message': 'Invalid election ID'})
     
     current_election_id = election_id
+    if election_store:
+        election_store.save_current_election(election_id)
+    live_feed.notify()
     return jsonify({
         'success': True, 
         'message': f'Switched to {elections[election_id].election_name}'
@@ -197,16 +371,11 @@ def api_register_voter():
     if voter_id in shared_voters:
         return jsonify({'success': False, 'message': 'Voter ID already exists'})
     
-    # Create voter using any election (or create temporary one)
-    from voting_system import Voter
+    # Every election sees the voter through the shared registry
     voter = Voter(voter_id, name, email)
-    
-    # Add to shared voters
-    shared_voters[voter_id] = voter
-    
-    # Add to all existing elections
-    for election in elections.values():
-        election.voters[voter_id] = voter
+    if not shared_voters.add(voter):
+        return jsonify({'success': False, 'message': 'Voter ID already exists'})
+    persist_voter(voter)
     
     return jsonify({
         'success': True, 
@@ -215,6 +384,32 @@ def api_register_voter():
     })
 
 
+@app.route('/api/import-voters', methods=['POST'])
+def api_import_voters():
+    """
+    API: Bulk import voters from a CSV or NDJSON request body.
+    
+    The body is parsed as it arrives and the issued credentials are streamed
+    back as an NDJSON download, one line per input row, ending with a summary.
+    """
+    fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'success': False, 'message': f'format must be one of {", ".join(IMPORT_FORMATS)}'}), 400
+    workers = min(max(request.args.get('workers', 1, type=int), 1), os.cpu_count() or 1)
+    
+    importer = VoterImporter(shared_voters, election_store, workers=workers)
+    # Servers' input streams are not all full file objects (gunicorn's lacks readable()), so decode its lines
+    body = codecs.iterdecode(request.stream, 'utf-8')
+    
+    def generate():
+        for result in importer.import_records(iter_voter_records(body, fmt)):
+            yield json.dumps(result) + '\n'
+        yield json.dumps({'summary': importer.summary()}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': 'attachment; filename=voter-credentials.ndjson'})
+
+
 @app.route('/api/register-candidate', methods=['POST'])
 def api_register_candidate():
     """API: Register a new candidate."""
@@ -235,6 +430,7 @@ def api_register_candidate():
     
     candidate = voting_system.register_candidate(candidate_id, name, party, description)
     if candidate:
+        persist_election(current_election_id)
         return jsonify({'success': True, 'message': f'Candidate {name} registered successfully'})
     else:
         return jsonify({'success': False, 'message': 'Candidate ID already exists'})
@@ -245,13 +441,14 @@ def api_list_elections():
     """API: List all elections."""
     election_list = []
     for eid, vs in elections.items():
+        snapshot = vs.snapshot
         election_list.append({
             'id': eid,
-            'name': vs.election_name,
-            'is_active': vs.is_active,
-            'candidates': len(vs.candidates),
+            'name': snapshot.election_name,
+            'is_active': snapshot.is_active,
+            'candidates': len(snapshot.candidates),
             'voters': len(vs.voters),
-            'votes': vs.get_votes_cast()
+            'votes': snapshot.votes_cast
         })
     return jsonify({
         'success': True,
@@ -275,6 +472,7 @@ def api_start_election():
         return jsonify({'success': False, 'message': 'Cannot start election: No candidates registered'})
     
     voting_system.start_election()
+    persist_election(current_election_id)
     return jsonify({'success': True, 'message': 'Election started successfully'})
 
 
@@ -289,37 +487,69 @@ def api_end_election():
     if not voting_system.is_active:
         return jsonify({'success': False, 'message': 'Election is not active'})
     
-    voting_system.end_election()
-    return jsonify({'success': True, 'message': 'Election ended successfully'})
+    job = voting_system.end_election(wait=False)
+    persist_election(current_election_id)
+    return jsonify({
+        'success': True,
+        'message': 'Election ended successfully',
+        'job_id': job.job_id if job else None
+    })
 
 
 @app.route('/api/mine-votes', methods=['POST'])
 def api_mine_votes():
-    """API: Mine pending votes."""
+    """API: Start mining pending votes in the background."""
     global current_election_id
     if not current_election_id or current_election_id not in elections:
         return jsonify({'success': False, 'message': 'Please create an election first'})
     
     voting_system = elections[current_election_id]
-    pending_count = len(voting_system.blockchain.pending_transactions)
-    if pending_count == 0:
-        return jsonify({'success': False, 'message': 'No votes to mine'})
-    
-    voting_system.mine_votes()
+    data = request.get_json(silent=True) or {}
+    timeout = data.get('timeout')
     
-    # Get the newly mined block details
-    latest_block = voting_system.blockchain.get_latest_block()
+    job = voting_system.start_mining_job(timeout=float(timeout) if timeout else None)
+    if not job:
+        return jsonify({'success': False, 'message': 'No votes to mine'})
     
     return jsonify({
-        'success': True, 
-        'message': f'{pending_count} votes mined successfully',
-        'block_hash': latest_block.hash,
-        'block_index': latest_block.index,
-        'block_nonce': latest_block.nonce,
-        'transaction_count': len(latest_block.transactions)
+        'success': True,
+        'message': 'Mining started',
+        'job_id': job.job_id,
+        'job': job.to_dict()
     })
 
 
+@app.route('/api/mining-jobs/<job_id>', methods=['GET'])
+def api_mining_job_status(job_id):
+    """API: Get progress of a mining job."""
+    global current_election_id
+    if not current_election_id or current_election_id not in elections:
+        return jsonify({'success': False, 'message': 'Please create an election first'})
+    
+    job = elections[current_election_id].get_mining_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Mining job not found'})
+    
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
+@app.route('/api/mining-jobs/<job_id>/cancel', methods=['POST'])
+def api_cancel_mining_job(job_id):
+    """API: Cancel a running mining job."""
+    global current_election_id
+    if not current_election_id or current_election_id not in elections:
+        return jsonify({'success': False, 'message': 'Please create an election first'})
+    
+    job = elections[current_election_id].get_mining_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Mining job not found'})
+    if job.is_finished:
+        return jsonify({'success': False, 'message': f'Mining job already {job.status}'})
+    
+    job.cancel()
+    return jsonify({'success': True, 'message': 'Cancellation requested', 'job': job.to_dict()})
+
+
 @app.route('/api/cast-vote', methods=['POST'])
 def api_cast_vote():
     """API: Cast a vote."""
@@ -336,28 +566,53 @@ def api_cast_vote():
     if not all([voter_id, candidate_id, private_key]):
         return jsonify({'success': False, 'message': 'All fields are required'})
     
-    success = voting_system.cast_vote(voter_id, candidate_id, private_key)
-    if success:
-        # Get the transaction that was just added
-        pending_txs = voting_system.blockchain.pending_transactions
-        if pending_txs:
-            latest_tx = pending_txs[-1]
-            # Calculate a hash for this transaction
-            import hashlib
-            import json as json_module
-            tx_data = json_module.dumps(latest_tx.to_dict(), sort_keys=True)
-            tx_hash = hashlib.sha256(tx_data.encode()).hexdigest()
-            
-            return jsonify({
-                'success': True, 
-                'message': 'Vote cast successfully!',
-                'transaction_hash': tx_hash,
-                'transaction_id': f"TX-{latest_tx.timestamp}",
-                'pending_count': len(pending_txs)
-            })
-        return jsonify({'success': True, 'message': 'Vote cast successfully!'})
+    result = voting_system.cast_vote(voter_id, candidate_id, private_key)
+    if result:
+        # The transaction hash is the receipt used for inclusion proofs
+        return jsonify({
+            'success': True, 
+            'message': result.message,
+            'transaction_hash': result.tx_hash,
+            'transaction_id': f"TX-{result.timestamp}",
+            'pending_count': voting_system.blockchain.pending_count
+        })
     else:
-        return jsonify({'success': False, 'message': 'Vote casting failed. Check your credentials.'})
+        return jsonify({'success': False, 'status': result.code, 'message': result.message})
+
+
+# Largest number of ballots accepted by one /api/cast-votes request
+MAX_VOTE_BATCH_SIZE = 10000
+
+
+@app.route('/api/cast-votes', methods=['POST'])
+def api_cast_votes():
+    """API: Cast a batch of votes, e.g. synced from a polling-station kiosk."""
+    global current_election_id
+    if not current_election_id or current_election_id not in elections:
+        return jsonify({'success': False, 'message': 'Please create an election first'})
+    
+    voting_system = elections[current_election_id]
+    data = request.get_json(silent=True) or {}
+    ballots = data.get('ballots')
+    
+    if not isinstance(ballots, list) or not ballots:
+        return jsonify({'success': False, 'message': 'ballots must be a non-empty list'})
+    if len(ballots) > MAX_VOTE_BATCH_SIZE:
+        return jsonify({'success': False,
+                        'message': f'At most {MAX_VOTE_BATCH_SIZE} ballots per request'})
+    
+    batch = [(b.get('voter_id'), b.get('candidate_id'), b.get('private_key'))
+             if isinstance(b, dict) else (None, None, None) for b in ballots]
+    outcomes = voting_system.cast_votes(batch)
+    accepted = sum(1 for result in outcomes if result.accepted)
+    
+    return jsonify({
+        'success': True,
+        'accepted': accepted,
+        'rejected': len(outcomes) - accepted,
+        'results': [{'status': result.code, 'transaction_hash': result.tx_hash} for result in outcomes],
+        'pending_count': voting_system.blockchain.pending_count
+    })
 
 
 @app.route('/api/check-status', methods=['POST'])
@@ -380,7 +635,7 @@ def api_check_status():
         'voter': {
             'name': voter.name,
             'email': voter.email,
-            'has_voted': voter.has_voted
+            'has_voted': voting_system.has_voted(voter_id)
         }
     })
 
@@ -393,7 +648,8 @@ def api_verify_blockchain():
         return jsonify({'success': False, 'message': 'Please create an election first'})
     
     voting_system = elections[current_election_id]
-    is_valid = voting_system.blockchain.is_chain_valid()
+    deep = request.args.get('deep', 'false').lower() == 'true'
+    is_valid = voting_system.blockchain.is_chain_valid(deep=deep)
     return jsonify({
         'success': True,
         'is_valid': is_valid,
@@ -401,39 +657,227 @@ def api_verify_blockchain():
     })
 
 
+@app.route('/api/audit-results', methods=['GET'])
+def api_audit_results():
+    """
+    API: Verify the results from the tallies committed to by the block headers.
+    
+    Checks the header chain and the latest block's votes, or with
+    ``full=true`` every block's votes.
+    """
+    global current_election_id
+    if not current_election_id or current_election_id not in elections:
+        return jsonify({'success': False, 'message': 'Please create an election first'})
+    
+    voting_system = elections[current_election_id]
+    full = request.args.get('full', 'false').lower() == 'true'
+    audit = voting_system.audit_results(full=full)
+    return jsonify({
+        'success': True,
+        'election_name': voting_system.election_name,
+        **audit,
+        'message': 'Results verified ✓' if audit['is_valid'] else f"Results audit FAILED ✗: {audit['problem']}"
+    })
+
+
+@app.route('/api/inclusion-proof/<tx_hash>', methods=['GET'])
+def api_inclusion_proof(tx_hash):
+    """API: Get a Merkle inclusion proof for a vote receipt."""
+    global current_election_id
+    if not current_election_id or current_election_id not in elections:
+        return jsonify({'success': False, 'message': 'Please create an election first'})
+    
+    blockchain = elections[current_election_id].blockchain
+    proof = blockchain.get_inclusion_proof(tx_hash)
+    if proof:
+        return jsonify({'success': True, 'status': 'included', **proof})
+    
+    if blockchain.is_pending(tx_hash):
+        return jsonify({'success': True, 'status': 'pending',
+                        'message': 'Vote is waiting to be mined into a block'})
+    
+    return jsonify({'success': False, 'message': 'Transaction not found'})
+
+
+# Blocks per page of /api/blockchain-data
+BLOCKCHAIN_PAGE_SIZE = 50
+MAX_BLOCKCHAIN_PAGE_SIZE = 500
+
+
+def serialize_block(block, headers_only=False):
+    """Convert a block for the explorer API, optionally without its transactions."""
+    data = block.to_header_dict()
+    if not headers_only:
+        data['transactions'] = [t.to_dict() for t in block.transactions]
+    return data
+
+
+def blockchain_page_params(height):
+    """
+    Parse cursor, limit, order and headers_only from the query string for a
+    chain of ``height`` blocks; raises ValueError if cursor or limit is malformed.
+    """
+    headers_only = request.args.get('headers_only', 'false').lower() == 'true'
+    descending = request.args.get('order', 'asc').lower() == 'desc'
+    limit = min(max(1, int(request.args.get('limit', BLOCKCHAIN_PAGE_SIZE))), MAX_BLOCKCHAIN_PAGE_SIZE)
+    # Descending pages start at the last block; ascending ones may start at the end (an empty page)
+    last = height - 1 if descending else height
+    cursor = min(max(0, int(request.args.get('cursor', last if descending else 0))), last)
+    return cursor, limit, descending, headers_only
+
+
 @app.route('/api/blockchain-data', methods=['GET'])
 def api_blockchain_data():
-    """API: Get detailed blockchain data with all hashes."""
+    """
+    API: Get one page of blocks with their hashes.
+    
+    Query parameters: ``cursor`` (block height to start from), ``limit``,
+    ``order`` (``asc`` or ``desc``), ``headers_only`` and ``include_pending``.
+    ``next_cursor`` is the height to request for the following page, or null.
+    """
     global current_election_id
     if not current_election_id or current_election_id not in elections:
         return jsonify({'success': False, 'message': 'Please create an election first'})
     
     voting_system = elections[current_election_id]
     blockchain = voting_system.blockchain
+    # Page against the published snapshot so blocks mined meanwhile do not shift the page
+    snapshot = voting_system.snapshot
+    height = snapshot.blockchain_blocks
+    try:
+        cursor, limit, descending, headers_only = blockchain_page_params(height)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'cursor and limit must be integers'}), 400
     
-    # Get all blocks with hash information
-    blocks_data = []
-    for block in blockchain.chain:
-        blocks_data.append({
-            'index': block.index,
-            'hash': block.hash,
-            'previous_hash': block.previous_hash,
-            'timestamp': block.timestamp,
-            'nonce': block.nonce,
-            'transaction_count': len(block.transactions),
-            'transactions': [t.to_dict() for t in block.transactions]
-        })
+    if descending:
+        stop = max(-1, cursor - limit)
+        blocks = blockchain.iter_blocks(cursor, stop, -1)
+        next_cursor = stop if stop >= 0 else None
+    else:
+        stop = min(height, cursor + limit)
+        blocks = blockchain.iter_blocks(cursor, stop)
+        next_cursor = stop if stop < height else None
+    blocks_data = [serialize_block(block, headers_only) for block in blocks]
     
-    # Get pending transactions
-    pending_data = [t.to_dict() for t in blockchain.pending_transactions]
+    # Pending transactions, capped at one page
+    pending_data = []
+    if request.args.get('include_pending', 'true').lower() == 'true' and not headers_only:
+        pending = itertools.chain(blockchain.mining_batch, blockchain.pending_transactions)
+        pending_data = [t.to_dict() for t in itertools.islice(pending, limit)]
     
     return jsonify({
         'success': True,
         'blocks': blocks_data,
+        'next_cursor': next_cursor,
         'pending_transactions': pending_data,
-        'total_blocks': len(blockchain.chain),
-        'difficulty': blockchain.difficulty,
-        'is_valid': blockchain.is_chain_valid()
+        'pending_count': snapshot.pending_count,
+        'total_blocks': height,
+        'difficulty': snapshot.difficulty,
+        'is_valid': snapshot.is_valid
+    })
+
+
+@app.route('/api/blockchain-data/stream', methods=['GET'])
+def api_blockchain_stream():
+    """API: Stream blocks as newline-delimited JSON, one block per line."""
+    global current_election_id
+    if not current_election_id or current_election_id not in elections:
+        return jsonify({'success': False, 'message': 'Please create an election first'})
+    
+    voting_system = elections[current_election_id]
+    blockchain = voting_system.blockchain
+    height = voting_system.snapshot.blockchain_blocks
+    try:
+        cursor, _, descending, headers_only = blockchain_page_params(height)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'cursor and limit must be integers'}), 400
+    blocks = (blockchain.iter_blocks(cursor, -1, -1) if descending
+              else blockchain.iter_blocks(cursor, height))
+    
+    def generate():
+        for block in blocks:
+            yield json.dumps(serialize_block(block, headers_only)) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+# Points in a /api/results/series response unless the request asks for another number
+RESULTS_SERIES_POINTS = 50
+MAX_RESULTS_SERIES_POINTS = 1000
+
+
+def float_arg(name):
+    """A query parameter as a finite float, or None if absent; raises ValueError if malformed."""
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be finite")
+    return number
+
+
+@app.route('/api/results', methods=['GET'])
+def api_results():
+    """
+    API: Results as of a block.
+    
+    ``height`` picks the block and ``timestamp`` (Unix seconds) the last
+    block sealed by then; without either the latest block is used.
+    """
+    global current_election_id
+    if not current_election_id or current_election_id not in elections:
+        return jsonify({'success': False, 'message': 'Please create an election first'})
+    
+    voting_system = elections[current_election_id]
+    try:
+        height = request.args.get('height')
+        checkpoint = voting_system.get_results_at(int(height) if height else None, float_arg('timestamp'))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'height must be an integer and timestamp a number'}), 400
+    if checkpoint is None:
+        return jsonify({'success': False, 'message': 'No block at that height or time'})
+    
+    return jsonify({
+        'success': True,
+        'election_name': voting_system.election_name,
+        'candidates': {cid: c.name for cid, c in voting_system.candidates.items()},
+        **checkpoint
+    })
+
+
+@app.route('/api/results/series', methods=['GET'])
+def api_results_series():
+    """
+    API: Results and turnout over time, for charting.
+    
+    Query parameters: ``points`` (evenly spaced samples), ``start`` and
+    ``end`` (Unix seconds; default the election's start and its end or now)
+    and ``results`` (``false`` for turnout only).
+    """
+    global current_election_id
+    if not current_election_id or current_election_id not in elections:
+        return jsonify({'success': False, 'message': 'Please create an election first'})
+    
+    voting_system = elections[current_election_id]
+    try:
+        points = min(max(1, int(request.args.get('points', RESULTS_SERIES_POINTS))), MAX_RESULTS_SERIES_POINTS)
+        start, end = float_arg('start'), float_arg('end')
+    except ValueError:
+        return jsonify({'success': False, 'message': 'points must be an integer and start and end numbers'}), 400
+    include_results = request.args.get('results', 'true').lower() == 'true'
+    
+    series = voting_system.get_results_series(points, start, end, include_results)
+    voter_count = voting_system.get_voter_count()
+    for point in series:
+        point['turnout'] = round(point['votes_cast'] / voter_count * 100, 2) if voter_count else 0
+    
+    return jsonify({
+        'success': True,
+        'election_name': voting_system.election_name,
+        'voter_count': voter_count,
+        'candidates': {cid: c.name for cid, c in voting_system.candidates.items()} if include_results else None,
+        'series': series
     })
 
 
@@ -447,23 +891,110 @@ def api_stats():
     voting_system = elections[current_election_id]
     return jsonify({
         'success': True,
-        'stats': {
-            'election_name': voting_system.election_name,
-            'is_active': voting_system.is_active,
-            'voter_count': voting_system.get_voter_count(),
-            'candidate_count': voting_system.get_candidate_count(),
-            'votes_cast': voting_system.get_votes_cast(),
-            'pending_votes': len(voting_system.blockchain.pending_transactions),
-            'blockchain_blocks': len(voting_system.blockchain.chain),
-            'blockchain_valid': voting_system.blockchain.is_chain_valid()
-        }
+        'stats': election_snapshot(current_election_id).to_stats_dict(voting_system.get_voter_count())
+    })
+
+
+@app.route('/api/live', methods=['GET'])
+def api_live():
+    """
+    API: Server-sent events stream of the current election's statistics and results.
+    
+    A ``snapshot`` event carries the full state on connect and whenever the
+    election or its candidates change; ``delta`` events carry only the
+    values changed by votes, sealed blocks or status changes since the last.
+    Answers 503 once ``MAX_LIVE_STREAMS`` streams are open on this worker.
+    """
+    stream = live_feed.connect()
+    if stream is None:
+        return (jsonify({'success': False, 'message': 'Too many live streams; poll /api/live-state instead'}),
+                503, {'Retry-After': '30'})
+    return Response(stream, mimetype='text/event-stream', headers={'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/live-state', methods=['GET'])
+def api_live_state():
+    """API: The state /api/live streams, for dashboards that poll instead."""
+    return jsonify(live_feed_state())
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint for this worker process."""
+    if not metrics.ENABLED:
+        return Response('Metrics are disabled\n', status=404, mimetype='text/plain')
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+metrics.MEMPOOL_DEPTH.set_function(
+    lambda: {(election_id,): vs.blockchain.pending_count for election_id, vs in elections.items()})
+
+
+# Largest synthetic election /api/create-sample-data generates in one request
+MAX_SYNTHETIC_VOTERS = 1000000
+
+# Synthetic voters join the shared registry with keys anyone who knows the seed
+# can derive, and a large roll takes the request a while to insert, so the
+# endpoint only generates elections when this is set (for testing deployments)
+SYNTHETIC_ELECTIONS_ENABLED = os.environ.get('ALLOW_SYNTHETIC_ELECTIONS', 'False').lower() == 'true'
+
+# Generated voters whose credentials are returned, to try the election out with
+SYNTHETIC_CREDENTIALS_SHOWN = 20
+
+
+def create_synthetic_sample(options):
+    """Generate a synthetic election from the request options and make it current."""
+    if not SYNTHETIC_ELECTIONS_ENABLED:
+        return jsonify({'success': False,
+                        'message': 'Synthetic elections are disabled; set ALLOW_SYNTHETIC_ELECTIONS=true'}), 403
+    try:
+        synthetic = SyntheticElection(int(options['voters']), int(options.get('candidates', 10)),
+                                      float(options.get('turnout', 0.6)),
+                                      options.get('distribution', 'uniform'),
+                                      float(options.get('zipf_exponent', 1.0)),
+                                      options.get('turnout_curve', 'flat'),
+                                      seed=int(options.get('seed', 0)))
+        block_size = int(options.get('block_size') or 0)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'message': str(e)})
+    if synthetic.voters > MAX_SYNTHETIC_VOTERS:
+        return jsonify({'success': False,
+                        'message': f'At most {MAX_SYNTHETIC_VOTERS:,} voters per synthetic election'})
+    
+    election_id = f"synthetic_{len(elections) + 1}_{int(time.time())}"
+    voting_system = create_voting_system(election_id, synthetic.name, difficulty=2,
+                                         genesis_time=synthetic.start_time)
+    add_election(election_id, voting_system)
+    added = synthetic.populate(voting_system, election_store, block_size=block_size or None)
+    persist_election(election_id)
+    
+    voter_credentials = [{'voter_id': voter.voter_id, 'name': voter.name, 'private_key': voter.private_key,
+                          'has_voted': voting_system.has_voted(voter.voter_id)}
+                         for voter in itertools.islice(synthetic.iter_voters(), SYNTHETIC_CREDENTIALS_SHOWN)]
+    return jsonify({
+        'success': True,
+        'message': (f"Synthetic election created with {added['candidates']:,} candidates, "
+                    f"{synthetic.voters:,} voters and {added['votes']:,} votes"),
+        'election_id': election_id,
+        'voter_credentials': voter_credentials
     })
 
 
 @app.route('/api/create-sample-data', methods=['POST'])
 def api_create_sample_data():
-    """API: Create sample election data."""
-    global current_election_id, shared_voters
+    """
+    API: Create sample election data.
+    
+    With a JSON body naming a number of ``voters`` (plus optionally
+    ``candidates``, ``turnout``, ``distribution``, ``zipf_exponent``,
+    ``turnout_curve``, ``seed`` and ``block_size``) a synthetic election of
+    that size is generated and voted in instead of the hand-written samples.
+    """
+    global current_election_id
+    
+    options = request.get_json(silent=True) or {}
+    if isinstance(options, dict) and 'voters' in options:
+        return create_synthetic_sample(options)
     
     # Determine which election to create based on count
     election_count = len(elections) + 1
@@ -539,9 +1070,8 @@ def api_create_sample_data():
     template = election_templates[template_index]
     
     # Create election with template data
-    voting_system = VotingSystem(template["name"], difficulty=2)
-    elections[election_id] = voting_system
-    current_election_id = election_id
+    voting_system = create_voting_system(election_id, template["name"], difficulty=2)
+    add_election(election_id, voting_system)
     
     # Register Candidates from template
     candidates_data = template["candidates"]
@@ -575,16 +1105,12 @@ def api_create_sample_data():
     
     voter_credentials = []
     for vid, name, email in voters_data:
-        # Check if voter already exists in shared pool
-        if vid in shared_voters:
-            voter = shared_voters[vid]
-            # Add existing voter to this election
-            voting_system.voters[vid] = voter
-        else:
-            # Create new voter and add to shared pool
+        # Reuse the voter if already in the shared pool, otherwise register them there
+        voter = shared_voters.get(vid)
+        if voter is None:
             voter = voting_system.register_voter(vid, name, email)
             if voter:
-                shared_voters[vid] = voter
+                persist_voter(voter)
         
         if voter:
             voter_credentials.append({
@@ -593,6 +1119,8 @@ def api_create_sample_data():
                 'private_key': voter.private_key
             })
     
+    persist_election(election_id)
+    
     return jsonify({
         'success': True,
         'message': f'Sample election created with {len(candidates_data)} candidates and {len(voters_data)} voters',
@@ -0,0 +1,423 @@
+"""
+Benchmarks for the Blockchain-based Voting System.
+Measures proof-of-work hashing throughput, the memory cost of stored votes,
+vote ingestion throughput, and the core voting operations at increasing
+scale, with a JSON report that later runs can be compared against.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import resource
+import sys
+import tracemalloc
+from datetime import datetime
+from time import perf_counter
+from blockchain import Block, Blockchain, Transaction, TransactionColumns, InternTable, find_nonce
+
+
+class DictTransaction:
+    """The original ``Transaction`` layout, with a per-instance ``__dict__``, for comparison."""
+    
+    def __init__(self, voter_id: str, candidate_id: str, timestamp: float):
+        self.voter_id = voter_id
+        self.candidate_id = candidate_id
+        self.timestamp = timestamp
+
+
+def make_block(transaction_count: int) -> Block:
+    """Build an unmined block holding ``transaction_count`` votes."""
+    transactions = [Transaction(f"V{i:07d}", f"C{i % 10:03d}") for i in range(transaction_count)]
+    return Block(1, transactions, '0' * 64)
+
+
+def full_block_hash(block: Block, nonce: int) -> str:
+    """The original ``Block.calculate_hash``, which encoded every transaction, for comparison."""
+    block_string = json.dumps({
+        'index': block.index,
+        'transactions': [t.to_dict() for t in block.transactions],
+        'previous_hash': block.previous_hash,
+        'timestamp': block.timestamp,
+        'nonce': nonce
+    }, sort_keys=True)
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+
+def naive_hash_rate(block: Block, attempts: int) -> float:
+    """Hashes/second re-serializing the whole block for every nonce."""
+    started = perf_counter()
+    for nonce in range(attempts):
+        full_block_hash(block, nonce)
+    return attempts / (perf_counter() - started)
+
+
+def midstate_hash_rate(block: Block, attempts: int) -> float:
+    """Hashes/second using the pre-encoded mining template."""
+    started = perf_counter()
+    prefix, suffix = block.mining_template()
+    # An unreachable difficulty forces the search to try every nonce in range
+    find_nonce(prefix, suffix, 65, start=0, stop=attempts)
+    return attempts / (perf_counter() - started)
+
+
+def benchmark_mining(sizes, attempts: int):
+    """Print hashes/second before and after for each block size."""
+    print(f"{'Votes/block':<14} {'Before (H/s)':>15} {'After (H/s)':>15} {'Speedup':>10}")
+    print("-" * 57)
+    for size in sizes:
+        block = make_block(size)
+        # Fewer attempts for large blocks keeps the naive run reasonable
+        naive_attempts = max(10, attempts // max(1, size))
+        before = naive_hash_rate(block, naive_attempts)
+        after = midstate_hash_rate(block, attempts)
+        print(f"{size:<14} {before:>15,.0f} {after:>15,.0f} {after / before:>9.1f}x")
+
+
+def traced_bytes(build) -> int:
+    """Bytes still allocated by ``build()`` while its result is alive."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return allocated
+
+
+def benchmark_memory(votes: int, candidates: int = 10):
+    """Print bytes per vote for each transaction representation."""
+    # IDs belong to the voter and candidate registries, so they are created outside the measurement
+    voter_ids = [f"V{i:07d}" for i in range(votes)]
+    candidate_ids = [f"C{i:03d}" for i in range(candidates)]
+    rows = [(voter_ids[i], candidate_ids[i % candidates], 1700000000.0 + i) for i in range(votes)]
+    transactions = [Transaction(*row) for row in rows]
+    
+    def build_chain():
+        blockchain = Blockchain(difficulty=1)
+        for transaction in transactions:
+            blockchain.add_transaction(transaction)
+        blockchain.mine_pending_transactions()
+        return blockchain
+    
+    measurements = [
+        ("dict objects (before)", lambda: [DictTransaction(*row) for row in rows]),
+        ("__slots__ objects", lambda: [Transaction(*row) for row in rows]),
+        ("columnar block", lambda: TransactionColumns(transactions, InternTable())),
+        ("mined chain incl. indexes", build_chain)
+    ]
+    
+    print(f"{'Representation':<28} {'Bytes/vote':>12}   ({votes:,} votes)")
+    print("-" * 57)
+    for label, build in measurements:
+        print(f"{label:<28} {traced_bytes(build) / votes:>12.1f}")
+
+
+def ingest_votes_per_second(votes: int, batch_size: int = None) -> float:
+    """
+    Votes/second accepted over HTTP, one per request or ``batch_size`` per request.
+    
+    Uses the Flask test client against a fresh in-memory election with
+    automatic sealing disabled, so only the ingestion path is measured.
+    """
+    import app as web
+    from voting_system import VotingSystem, Voter
+    
+    voting_system = VotingSystem("Ingest benchmark", difficulty=1)
+    voting_system.register_candidate("C001", "Alice", "Party A")
+    voters = [Voter(f"V{i:07d}", f"Voter {i}", f"v{i}@example.com") for i in range(votes)]
+    voting_system.voters.add_many(voters)
+    voting_system.start_election()
+    web.elections['ingest-benchmark'] = voting_system
+    web.current_election_id = 'ingest-benchmark'
+    ballots = [{'voter_id': v.voter_id, 'candidate_id': 'C001', 'private_key': v.private_key}
+               for v in voters]
+    
+    client = web.app.test_client()
+    started = perf_counter()
+    if batch_size is None:
+        for ballot in ballots:
+            client.post('/api/cast-vote', json=ballot)
+    else:
+        for i in range(0, votes, batch_size):
+            client.post('/api/cast-votes', json={'ballots': ballots[i:i + batch_size]})
+    elapsed = perf_counter() - started
+    
+    assert voting_system.blockchain.pending_count == votes
+    del web.elections['ingest-benchmark']
+    return votes / elapsed
+
+
+def benchmark_ingest(votes: int, batch_sizes):
+    """Print votes/second for single-vote requests and each batch size."""
+    print(f"{'Path':<28} {'Votes/s':>12} {'Speedup':>10}   ({votes:,} votes)")
+    print("-" * 57)
+    single = ingest_votes_per_second(votes)
+    print(f"{'/api/cast-vote':<28} {single:>12,.0f} {1.0:>9.1f}x")
+    for batch_size in batch_sizes:
+        batched = ingest_votes_per_second(votes, batch_size)
+        label = f"/api/cast-votes x{batch_size}"
+        print(f"{label:<28} {batched:>12,.0f} {batched / single:>9.1f}x")
+
+
+# Repeated calls of cheap read operations are timed for at least this long
+MIN_REPEAT_SECONDS = 0.2
+
+# Slowdown, as a fraction of baseline ops/sec, reported as a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+# (votes, candidates) elections run by default: each scale with a small ballot,
+# plus large ballots where per-vote work that grows with candidates stays affordable
+DEFAULT_CORE_CASES = [(1000, 10), (1000, 10000), (100000, 10), (100000, 1000), (1000000, 10)]
+
+
+def reset_peak_memory():
+    """Restart peak RSS tracking where the platform allows it (Linux)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+
+def peak_memory_bytes() -> int:
+    """Peak resident set size since the last reset (or since start-up where it cannot be reset)."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class CoreBenchmark:
+    """
+    Drives ``VotingSystem`` and ``Blockchain`` directly through one election.
+    
+    Each step records its wall time, operations per second and peak memory.
+    The election is built up step by step, so later steps (mining,
+    validation, results, export) run against the voters and votes the
+    earlier ones created.
+    """
+    
+    def __init__(self, votes: int, candidates: int, difficulties, block_size: int,
+                 blocks_per_difficulty: int):
+        self.votes = votes
+        self.candidates = candidates
+        self.difficulties = difficulties
+        self.block_size = block_size
+        self.blocks_per_difficulty = blocks_per_difficulty
+        self.results = []
+    
+    def measure(self, name: str, operations: int, run, difficulty: int = None, **details):
+        """Time ``run()`` as one step of ``operations`` operations."""
+        reset_peak_memory()
+        started = perf_counter()
+        run()
+        seconds = perf_counter() - started
+        self.record(name, operations, seconds, difficulty, **details)
+    
+    def measure_repeated(self, name: str, run):
+        """Time a cheap call by repeating it for at least ``MIN_REPEAT_SECONDS``."""
+        reset_peak_memory()
+        calls = 0
+        started = perf_counter()
+        while True:
+            run()
+            calls += 1
+            seconds = perf_counter() - started
+            if seconds >= MIN_REPEAT_SECONDS:
+                break
+        self.record(name, calls, seconds)
+    
+    def record(self, name: str, operations: int, seconds: float, difficulty: int = None, **details):
+        result = {
+            'name': name,
+            'votes': self.votes,
+            'candidates': self.candidates,
+            'difficulty': difficulty,
+            'operations': operations,
+            'seconds': round(seconds, 6),
+            'ops_per_sec': round(operations / seconds, 2) if seconds > 0 else None,
+            'peak_memory_bytes': peak_memory_bytes(),
+            **details
+        }
+        self.results.append(result)
+        print(format_result(result))
+    
+    def run(self):
+        from voting_system import VotingSystem
+        
+        voting_system = VotingSystem(f"Benchmark {self.votes} votes", difficulty=1)
+        candidate_ids = [f"C{i:05d}" for i in range(self.candidates)]
+        for candidate_id in candidate_ids:
+            voting_system.register_candidate(candidate_id, f"Candidate {candidate_id}", "Party")
+        voter_ids = [f"V{i:07d}" for i in range(self.votes)]
+        
+        def register():
+            for voter_id in voter_ids:
+                voting_system.register_voter(voter_id, f"Voter {voter_id}", f"{voter_id}@example.com")
+        self.measure('register_voter', self.votes, register)
+        
+        voting_system.start_election()
+        voters = voting_system.voters
+        ballots = [(voter_id, candidate_ids[i % self.candidates], voters[voter_id].private_key)
+                   for i, voter_id in enumerate(voter_ids)]
+        
+        def cast():
+            for ballot in ballots:
+                voting_system.cast_vote(*ballot)
+        self.measure('cast_vote', self.votes, cast)
+        
+        # Smaller blocks at small scales leave votes to mine at every difficulty
+        blockchain = voting_system.blockchain
+        blocks = self.blocks_per_difficulty
+        votes_per_block = max(1, min(self.block_size, self.votes // (blocks * len(self.difficulties))))
+        for difficulty in self.difficulties:
+            blockchain.difficulty = difficulty
+            
+            def mine():
+                for _ in range(blocks):
+                    blockchain.mine_pending_transactions(max_transactions=votes_per_block)
+            self.measure('mine_pending_transactions', blocks, mine, difficulty,
+                         votes_per_block=votes_per_block)
+        
+        # Seal the rest at the lowest difficulty so the later steps see every vote
+        blockchain.difficulty = 1
+        while blockchain.pending_count:
+            blockchain.mine_pending_transactions(max_transactions=self.block_size)
+        
+        self.measure('is_chain_valid', 1, lambda: blockchain.is_chain_valid(deep=True))
+        self.measure_repeated('get_results', voting_system.get_results)
+        self.measure_repeated('get_votes_cast', voting_system.get_votes_cast)
+        self.measure('export_election_data', 1, voting_system.export_election_data)
+        self.measure('export_chain', 1, blockchain.export_chain)
+        return self.results
+
+
+def format_result(result) -> str:
+    label = result['name']
+    if result['difficulty'] is not None:
+        label += f" d={result['difficulty']}"
+    return (f"{label:<30} {result['votes']:>9,} {result['candidates']:>7,} "
+            f"{result['seconds']:>10.3f} {result['ops_per_sec'] or 0:>14,.1f} "
+            f"{result['peak_memory_bytes'] / 2 ** 20:>9.1f}")
+
+
+def result_key(result):
+    return result['name'], result['votes'], result['candidates'], result['difficulty']
+
+
+def compare_to_baseline(results, baseline_path: str, threshold: float) -> int:
+    """Print each step's change in ops/sec against a saved report; returns the regression count."""
+    with open(baseline_path) as baseline_file:
+        baseline = {result_key(r): r for r in json.load(baseline_file)['results']}
+    
+    print(f"\nCompared with {baseline_path} (regression: more than {threshold:.0%} slower)")
+    print(f"{'Step':<30} {'Votes':>9} {'Cands':>7} {'Baseline/s':>14} {'Now/s':>14} {'Change':>8}")
+    print("-" * 87)
+    regressions = 0
+    for result in results:
+        before = baseline.get(result_key(result))
+        if not before or not before['ops_per_sec'] or not result['ops_per_sec']:
+            continue
+        change = result['ops_per_sec'] / before['ops_per_sec'] - 1
+        flag = ''
+        if change < -threshold:
+            regressions += 1
+            flag = '  REGRESSION'
+        label = result['name'] + (f" d={result['difficulty']}" if result['difficulty'] is not None else '')
+        print(f"{label:<30} {result['votes']:>9,} {result['candidates']:>7,} "
+              f"{before['ops_per_sec']:>14,.1f} {result['ops_per_sec']:>14,.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def benchmark_core(cases, difficulties, block_size: int, blocks_per_difficulty: int,
+                   output: str = None, baseline: str = None,
+                   threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> int:
+    """
+    Run the core suite for each ``(votes, candidates)`` case.
+    
+    Writes a JSON report to ``output`` and compares it with ``baseline``
+    when given. Returns the number of regressions found.
+    """
+    print(f"{'Step':<30} {'Votes':>9} {'Cands':>7} {'Seconds':>10} {'Ops/s':>14} {'Peak MiB':>9}")
+    print("-" * 84)
+    results = []
+    for votes, candidates in cases:
+        results.extend(CoreBenchmark(votes, candidates, difficulties, block_size,
+                                     blocks_per_difficulty).run())
+    
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {
+            'cases': [list(case) for case in cases],
+            'difficulties': difficulties,
+            'block_size': block_size,
+            'blocks_per_difficulty': blocks_per_difficulty
+        },
+        'results': results
+    }
+    if output:
+        with open(output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"\nReport written to {output}")
+    if baseline:
+        return compare_to_baseline(results, baseline, threshold)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Voting system benchmarks")
+    parser.add_argument('suite', nargs='?', choices=['mining', 'memory', 'ingest', 'core'], default='mining',
+                        help="Benchmark to run")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 10, 100, 1000, 10000],
+                        help="Votes per block to benchmark")
+    parser.add_argument('--attempts', type=int, default=20000,
+                        help="Nonce attempts per measurement")
+    parser.add_argument('--votes', type=int, default=100000,
+                        help="Votes to store for the memory and ingest benchmarks")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 1000],
+                        help="Ballots per request for the ingest benchmark")
+    parser.add_argument('--scales', type=int, nargs='+',
+                        help="Votes per election for the core benchmark (default: 1k, 100k and 1M)")
+    parser.add_argument('--candidates', type=int, nargs='+',
+                        help="Candidates per election for the core benchmark, run at every scale")
+    parser.add_argument('--difficulties', type=int, nargs='+', default=[1, 2, 3, 4],
+                        help="Mining difficulties for the core benchmark")
+    parser.add_argument('--block-size', type=int, default=10000,
+                        help="Votes per block mined by the core benchmark")
+    parser.add_argument('--blocks-per-difficulty', type=int, default=3,
+                        help="Blocks timed at each mining difficulty")
+    parser.add_argument('--output', help="Write the core benchmark report to this JSON file")
+    parser.add_argument('--baseline', help="Compare the core benchmark with a saved JSON report")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Fractional ops/sec drop counted as a regression")
+    args = parser.parse_args()
+    if args.suite == 'core':
+        if args.scales or args.candidates:
+            cases = [(votes, candidates) for votes in args.scales or [1000, 100000, 1000000]
+                     for candidates in args.candidates or [10]]
+        else:
+            cases = DEFAULT_CORE_CASES
+        regressions = benchmark_core(cases, args.difficulties, args.block_size, args.blocks_per_difficulty,
+                                     args.output, args.baseline, args.threshold)
+        sys.exit(1 if regressions else 0)
+    elif args.suite == 'memory':
+        benchmark_memory(args.votes)
+    elif args.suite == 'ingest':
+        benchmark_ingest(args.votes, args.batch_sizes)
+    else:
+        benchmark_mining(args.sizes, args.attempts)
+
+
+if __name__ == '__main__':
+    main()
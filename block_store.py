@@ -0,0 +1,143 @@
+"""
+Append-only durable block log for the voting system.
+Each mined block is written as one checksummed record and fsynced before the
+block joins the in-memory chain, so a restart can rebuild the chain from disk.
+"""
+
+import json
+import os
+import struct
+import zlib
+from typing import List, Dict, Any, Iterator, Tuple
+
+
+# Record header: payload length and CRC-32 of the payload
+RECORD_HEADER = struct.Struct('>II')
+
+# A new segment file is started once the current one reaches this size
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+SEGMENT_SUFFIX = '.log'
+
+
+class BlockStoreError(Exception):
+    """Raised when the block log is corrupt beyond a torn final record."""
+
+
+class BlockStore:
+    """
+    Stores blocks in numbered append-only segment files.
+    
+    Opening the store scans every segment once, rebuilding the in-memory
+    offset index and truncating a torn or half-written final record left by a
+    crash. Records are ``length | crc32 | json`` with the JSON being
+    ``Block.to_dict()``.
+    """
+    
+    def __init__(self, directory: str, segment_size: int = DEFAULT_SEGMENT_SIZE):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.index: List[Tuple[int, int]] = []  # Block height -> (segment, offset)
+        self._file = None
+        self._segment = 0
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+    
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:08d}{SEGMENT_SUFFIX}")
+    
+    def _segments(self) -> List[int]:
+        return sorted(int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+                      if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit())
+    
+    def _scan_segment(self, segment: int) -> int:
+        """Index the records of one segment and return the end of the last good record."""
+        offset = 0
+        with open(self._segment_path(segment), 'rb') as f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return offset
+                length, checksum = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    return offset
+                self.index.append((segment, offset))
+                offset += RECORD_HEADER.size + length
+    
+    def _recover(self):
+        """Rebuild the index and cut off a torn final record."""
+        segments = self._segments()
+        for position, segment in enumerate(segments):
+            good_end = self._scan_segment(segment)
+            size = os.path.getsize(self._segment_path(segment))
+            if good_end < size:
+                if position != len(segments) - 1:
+                    raise BlockStoreError(f"Corrupt record in segment {segment} of {self.directory}")
+                with open(self._segment_path(segment), 'r+b') as f:
+                    f.truncate(good_end)
+                    f.flush()
+                    os.fsync(f.fileno())
+        
+        self._segment = segments[-1] if segments else 0
+        self._file = open(self._segment_path(self._segment), 'ab')
+    
+    def _fsync_directory(self):
+        """Make a newly created segment file's directory entry durable."""
+        if hasattr(os, 'O_DIRECTORY'):
+            fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    
+    def append(self, block_data: Dict[str, Any]):
+        """Append one block record and fsync it to disk."""
+        payload = json.dumps(block_data, sort_keys=True).encode()
+        if self._file.tell() and self._file.tell() + len(payload) > self.segment_size:
+            self._file.close()
+            self._segment += 1
+            self._file = open(self._segment_path(self._segment), 'ab')
+            self._fsync_directory()
+        
+        offset = self._file.tell()
+        self._file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.index.append((self._segment, offset))
+    
+    def _read_record(self, f, offset: int) -> Dict[str, Any]:
+        f.seek(offset)
+        length, _ = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+        return json.loads(f.read(length))
+    
+    def read(self, height: int) -> Dict[str, Any]:
+        """Read the block at ``height`` using the offset index."""
+        segment, offset = self.index[height]
+        with open(self._segment_path(segment), 'rb') as f:
+            return self._read_record(f, offset)
+    
+    def iterate(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """Stream blocks from ``start`` in order, one open segment at a time."""
+        current_segment, f = None, None
+        try:
+            for segment, offset in self.index[start:]:
+                if segment != current_segment:
+                    if f:
+                        f.close()
+                    current_segment, f = segment, open(self._segment_path(segment), 'rb')
+                yield self._read_record(f, offset)
+        finally:
+            if f:
+                f.close()
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+    
+    def __len__(self):
+        return len(self.index)
+    
+    def __repr__(self):
+        return f"BlockStore(directory={self.directory}, blocks={len(self.index)})"
@@ -5,13 +5,234 @@ Each block contains votes as transactions with cryptographic hashing for securit
 
 import hashlib
 import json
-from time import time
-from typing import List, Dict, Any
+import multiprocessing
+import threading
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from time import time, perf_counter
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator, Set
+import metrics
+from events import EventBus, default_bus, EVENT_BLOCK_SEALED, EVENT_NOTICE
+
+
+# Placeholder substituted for the nonce when pre-encoding a block for mining
+NONCE_MARKER = '\x00nonce\x00'
+
+# Difficulties at or below this are mined serially; a process pool costs more than it saves
+PARALLEL_MIN_DIFFICULTY = 3
+
+# Nonces each worker tries between checks of the shared stop flag
+NONCE_CHUNK_SIZE = 1 << 14
+
+# Seconds between progress reports while waiting on parallel mining workers
+PROGRESS_INTERVAL = 0.2
+
+# Merkle root of a block with no transactions
+EMPTY_MERKLE_ROOT = hashlib.sha256(b'').hexdigest()
+
+_stop_event = None
+_attempt_counter = None
+
+
+class MiningCancelled(Exception):
+    """Raised when a proof-of-work search is stopped before a nonce is found."""
+
+
+def find_nonce(prefix: bytes, suffix: bytes, difficulty: int, start: int = 0,
+               stop: Optional[int] = None) -> Optional[Tuple[int, str]]:
+    """
+    Search nonces in ``[start, stop)`` for a hash with ``difficulty`` leading zeros.
+    
+    ``prefix`` and ``suffix`` are the block's canonical encoding on either side of
+    the nonce. The prefix is hashed once and its midstate copied for each
+    attempt, so only the nonce digits and suffix are fed per nonce.
+    Returns ``(nonce, hash)`` or ``None`` if the range is exhausted.
+    """
+    target = '0' * difficulty
+    midstate = hashlib.sha256(prefix)
+    nonce = start
+    while stop is None or nonce < stop:
+        attempt = midstate.copy()
+        attempt.update(str(nonce).encode())
+        attempt.update(suffix)
+        block_hash = attempt.hexdigest()
+        if block_hash[:difficulty] == target:
+            return nonce, block_hash
+        nonce += 1
+    return None
+
+
+def serial_find_nonce(prefix: bytes, suffix: bytes, difficulty: int, start: int = 0,
+                      should_stop: Callable[[], bool] = None,
+                      on_progress: Callable[[int], None] = None) -> Tuple[int, str]:
+    """
+    Search nonces from ``start`` in chunks of ``NONCE_CHUNK_SIZE``.
+    
+    Between chunks the total number of attempts is reported to ``on_progress``
+    and ``should_stop`` is polled; a true result raises ``MiningCancelled``.
+    """
+    chunk_start = start
+    while True:
+        found = find_nonce(prefix, suffix, difficulty, chunk_start, chunk_start + NONCE_CHUNK_SIZE)
+        if found:
+            if on_progress:
+                on_progress(found[0] - start + 1)
+            return found
+        chunk_start += NONCE_CHUNK_SIZE
+        if on_progress:
+            on_progress(chunk_start - start)
+        if should_stop and should_stop():
+            raise MiningCancelled()
+
+
+def _init_mining_worker(stop_event, attempt_counter):
+    """Process pool initializer: share the stop flag and attempt counter with the worker."""
+    global _stop_event, _attempt_counter
+    _stop_event = stop_event
+    _attempt_counter = attempt_counter
+
+
+def _mine_stride(prefix: bytes, suffix: bytes, difficulty: int, start: int,
+                 stride: int) -> Optional[Tuple[int, str]]:
+    """Search chunks ``start, start + stride, ...`` until found or told to stop."""
+    chunk_start = start
+    while not _stop_event.is_set():
+        found = find_nonce(prefix, suffix, difficulty, chunk_start, chunk_start + NONCE_CHUNK_SIZE)
+        with _attempt_counter.get_lock():
+            _attempt_counter.value += found[0] - chunk_start + 1 if found else NONCE_CHUNK_SIZE
+        if found:
+            _stop_event.set()
+            return found
+        chunk_start += stride
+    return None
+
+
+def parallel_find_nonce(prefix: bytes, suffix: bytes, difficulty: int, workers: int,
+                        start: int = 0, should_stop: Callable[[], bool] = None,
+                        on_progress: Callable[[int], None] = None) -> Tuple[int, str]:
+    """
+    Split the nonce space across ``workers`` processes.
+    
+    Worker ``i`` searches every ``workers``-th chunk of ``NONCE_CHUNK_SIZE``
+    nonces. The first worker to find a valid hash sets a shared flag that
+    stops the others. ``should_stop`` and ``on_progress`` behave as in
+    ``serial_find_nonce`` and are serviced from the calling process.
+    """
+    context = multiprocessing.get_context()
+    stop_event = context.Event()
+    attempt_counter = context.Value('q', 0)
+    stride = workers * NONCE_CHUNK_SIZE
+    cancelled = False
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_mining_worker,
+                             initargs=(stop_event, attempt_counter)) as pool:
+        futures = [pool.submit(_mine_stride, prefix, suffix, difficulty,
+                               start + i * NONCE_CHUNK_SIZE, stride)
+                   for i in range(workers)]
+        while not wait(futures, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)[0]:
+            if on_progress:
+                on_progress(attempt_counter.value)
+            if should_stop and should_stop():
+                cancelled = True
+                break
+        stop_event.set()
+    
+    if on_progress:
+        on_progress(attempt_counter.value)
+    if cancelled:
+        raise MiningCancelled()
+    
+    # Several workers may finish in the same chunk round; prefer the lowest nonce
+    results = [f.result() for f in futures if f.result() is not None]
+    return min(results)
+
+
+def _hash_pair(left: str, right: str) -> str:
+    """Hash two child nodes of the Merkle tree into their parent."""
+    return hashlib.sha256((left + right).encode()).hexdigest()
+
+
+def build_merkle_levels(leaves: List[str]) -> List[List[str]]:
+    """
+    Build a Merkle tree over transaction hashes, leaves first and root last.
+    
+    A level with an odd number of nodes pairs its last node with itself.
+    """
+    if not leaves:
+        return [[EMPTY_MERKLE_ROOT]]
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([_hash_pair(level[i], level[i + 1] if i + 1 < len(level) else level[i])
+                       for i in range(0, len(level), 2)])
+    return levels
+
+
+def merkle_root(leaves: List[str]) -> str:
+    """Compute the Merkle root of a list of transaction hashes."""
+    return build_merkle_levels(leaves)[-1][0]
+
+
+def verify_merkle_proof(leaf: str, proof: List[Dict[str, str]], root: str) -> bool:
+    """Check that ``leaf`` is included under ``root`` using a proof from ``Block.merkle_proof``."""
+    node = leaf
+    for step in proof:
+        if step['position'] == 'left':
+            node = _hash_pair(step['hash'], node)
+        else:
+            node = _hash_pair(node, step['hash'])
+    return node == root
+
+
+def tally_hash(tally: Dict[str, int]) -> str:
+    """Hash a running tally (votes per candidate ID) as committed to by a block header."""
+    return hashlib.sha256(json.dumps(dict(tally), sort_keys=True).encode()).hexdigest()
+
+
+def count_votes(transactions) -> Dict[str, int]:
+    """Count votes per candidate ID in a list of transactions or ``TransactionColumns``."""
+    if isinstance(transactions, TransactionColumns):
+        return transactions.candidate_counts()
+    counts: Dict[str, int] = {}
+    for transaction in transactions:
+        counts[transaction.candidate_id] = counts.get(transaction.candidate_id, 0) + 1
+    return counts
+
+
+def add_counts(tally: Dict[str, int], candidate_counts: Dict[str, int]) -> Dict[str, int]:
+    """Return a new tally with ``candidate_counts`` added to ``tally``."""
+    total = dict(tally)
+    for candidate_id, count in candidate_counts.items():
+        total[candidate_id] = total.get(candidate_id, 0) + count
+    return total
+
+
+def audit_block(data: Dict[str, Any], previous_tally: Dict[str, int]) -> Optional[str]:
+    """
+    Check one stored block on its own, given only its parent's tally.
+    
+    The Merkle root, hash and tally hash must match the block's contents and
+    its tally must be ``previous_tally`` plus its votes. Returns a description
+    of the first problem found, or None. Blocks are independent of each other
+    here, so a chain can be audited by mapping this over a process pool.
+    """
+    try:
+        block = Block.from_dict(data)
+    except (KeyError, ValueError) as e:
+        return str(e)
+    if not block.is_tally_valid(previous_tally):
+        return f"Tally of block {block.index} does not match its votes"
+    return None
 
 
 class Transaction:
     """Represents a vote transaction in the blockchain."""
     
+    __slots__ = ('voter_id', 'candidate_id', 'timestamp')
+    
     def __init__(self, voter_id: str, candidate_id: str, timestamp: float = None):
         self.voter_id = voter_id
         self.candidate_id = candidate_id
@@ -25,120 +246,828 @@ class Transaction:
             'timestamp': self.timestamp
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Transaction':
+        """Create a transaction from its dictionary form."""
+        return cls(data['voter_id'], data['candidate_id'], data['timestamp'])
+    
+    def calculate_hash(self) -> str:
+        """Calculate the transaction hash used as the vote receipt and Merkle leaf."""
+        tx_string = json.dumps(self.to_dict(), sort_keys=True)
+        return hashlib.sha256(tx_string.encode()).hexdigest()
+    
     def __repr__(self):
         return f"Transaction(voter_id={self.voter_id}, candidate_id={self.candidate_id})"
 
 
+class InternTable:
+    """Maps repeated strings such as voter or candidate IDs to dense integer codes."""
+    
+    __slots__ = ('values', 'codes')
+    
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+    
+    def intern(self, value: str) -> int:
+        """Return the code for ``value``, assigning the next one if it is new."""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+    
+    def __len__(self):
+        return len(self.values)
+
+
+def frozen_array(typecode: str, values) -> memoryview:
+    """A read-only array of ``values``, as a memoryview over an immutable bytes copy."""
+    return memoryview(array(typecode, values).tobytes()).cast(typecode)
+
+
+class TransactionColumns(Sequence):
+    """
+    Column-oriented, read-only storage for a sealed block's transactions.
+    
+    Candidate IDs are stored as small integer codes into a shared intern table
+    and timestamps as doubles, both in read-only memoryviews over immutable
+    bytes so a sealed block cannot be edited in place. Voter IDs are kept as
+    references to the registry's strings: each voter appears at most once per
+    chain, so interning them would add a table entry per vote without saving
+    anything.
+    ``Transaction`` objects are only built when an item is read or the columns
+    are iterated.
+    """
+    
+    __slots__ = ('candidate_table', 'voter_ids', 'candidate_codes', 'timestamps')
+    
+    def __init__(self, transactions, candidate_table: InternTable):
+        candidate_codes = [candidate_table.intern(t.candidate_id) for t in transactions]
+        object.__setattr__(self, 'candidate_table', candidate_table)
+        object.__setattr__(self, 'voter_ids', tuple(t.voter_id for t in transactions))
+        object.__setattr__(self, 'candidate_codes',
+                           frozen_array('H' if len(candidate_table) <= 0xFFFF else 'I', candidate_codes))
+        object.__setattr__(self, 'timestamps', frozen_array('d', [t.timestamp for t in transactions]))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("TransactionColumns is read-only")
+    
+    def _materialize(self, position: int) -> Transaction:
+        return Transaction(self.voter_ids[position],
+                           self.candidate_table.values[self.candidate_codes[position]],
+                           self.timestamps[position])
+    
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._materialize(i) for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError('transaction index out of range')
+        return self._materialize(position)
+    
+    def __iter__(self):
+        candidates = self.candidate_table.values
+        for voter_id, candidate_code, timestamp in zip(self.voter_ids, self.candidate_codes, self.timestamps):
+            yield Transaction(voter_id, candidates[candidate_code], timestamp)
+    
+    def __len__(self):
+        return len(self.timestamps)
+    
+    def candidate_counts(self) -> Dict[str, int]:
+        """Count votes per candidate ID without materializing transactions."""
+        counts: Dict[int, int] = {}
+        for code in self.candidate_codes:
+            counts[code] = counts.get(code, 0) + 1
+        values = self.candidate_table.values
+        return {values[code]: count for code, count in counts.items()}
+
+
+class ReceiptIndex:
+    """
+    Compact hash index from receipt hashes to transaction locations.
+    
+    An open-addressing table over two ``array('Q')`` columns: keys are the first
+    64 bits of the receipt hash (low bit forced on so zero marks an empty slot)
+    and values pack the block and transaction positions. Because only a prefix
+    is stored, callers must confirm the full hash at the returned location.
+    """
+    
+    __slots__ = ('_keys', '_values', '_count')
+    
+    POSITION_BITS = 32
+    
+    def __init__(self, capacity: int = 1024):
+        self._keys = array('Q', bytes(8 * capacity))
+        self._values = array('Q', bytes(8 * capacity))
+        self._count = 0
+    
+    @staticmethod
+    def _key(tx_hash: str) -> int:
+        return int(tx_hash[:16], 16) | 1
+    
+    def _slot(self, key: int) -> int:
+        """Find the slot holding ``key`` or the empty slot where it belongs."""
+        keys = self._keys
+        mask = len(keys) - 1
+        slot = (key >> 1) & mask
+        while keys[slot] and keys[slot] != key:
+            slot = (slot + 1) & mask
+        return slot
+    
+    def _grow(self):
+        old_keys, old_values = self._keys, self._values
+        self._keys = array('Q', bytes(16 * len(old_keys)))
+        self._values = array('Q', bytes(16 * len(old_keys)))
+        for key, value in zip(old_keys, old_values):
+            if key:
+                slot = self._slot(key)
+                self._keys[slot] = key
+                self._values[slot] = value
+    
+    def put(self, tx_hash: str, block_position: int, tx_position: int):
+        """Record where the transaction with ``tx_hash`` is stored."""
+        if 2 * (self._count + 1) > len(self._keys):
+            self._grow()
+        key = self._key(tx_hash)
+        slot = self._slot(key)
+        if not self._keys[slot]:
+            self._count += 1
+        self._keys[slot] = key
+        self._values[slot] = (block_position << ReceiptIndex.POSITION_BITS) | tx_position
+    
+    def get(self, tx_hash: str) -> Optional[Tuple[int, int]]:
+        """Return ``(block position, transaction position)`` or None."""
+        try:
+            key = self._key(tx_hash)
+        except ValueError:
+            return None
+        slot = self._slot(key)
+        if not self._keys[slot]:
+            return None
+        value = self._values[slot]
+        return value >> ReceiptIndex.POSITION_BITS, value & ((1 << ReceiptIndex.POSITION_BITS) - 1)
+    
+    def __len__(self):
+        return self._count
+
+
 class Block:
-    """Represents a block in the blockchain."""
+    """
+    Represents a block in the blockchain.
+    
+    Besides the Merkle root of its votes, the header commits to ``tally``,
+    the running votes per candidate once the block is counted, through
+    ``tally_hash``. The final results can then be verified from the headers
+    alone, plus any block's votes against the change in tally it claims.
+    """
+    
+    HASHED_FIELDS = ('index', 'transactions', 'merkle_root', 'tally', 'tally_hash',
+                     'previous_hash', 'timestamp', 'nonce', 'hash')
     
     def __init__(self, index: int, transactions: List[Transaction], 
-                 previous_hash: str, timestamp: float = None, nonce: int = 0):
+                 previous_hash: str, timestamp: float = None, nonce: int = 0,
+                 tally: Dict[str, int] = None):
         self.index = index
         self.transactions = transactions
+        self.merkle_root = self.calculate_merkle_root()
+        # Defaults to the block's own votes, i.e. a block counted on an empty tally
+        self.tally = tally if tally is not None else count_votes(transactions)
+        self.tally_hash = tally_hash(self.tally)
         self.previous_hash = previous_hash
         self.timestamp = timestamp or time()
         self.nonce = nonce
         self.hash = self.calculate_hash()
     
-    def calculate_hash(self) -> str:
-        """Calculate the hash of the block using SHA-256."""
-        block_string = json.dumps({
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in Block.HASHED_FIELDS:
+            self._notify_change()
+    
+    def _notify_change(self):
+        """Tell the owning chain that a sealed block has been modified."""
+        self._merkle_levels = None
+        on_change = self.__dict__.get('_on_change')
+        if on_change is not None:
+            on_change()
+    
+    def seal(self, on_change, candidate_table: InternTable = None):
+        """
+        Seal the block once it has been appended to a chain.
+        
+        The transactions are converted to read-only ``TransactionColumns``
+        interned against the chain's tables and the tally to a read-only
+        mapping, so neither can be edited in place, and any later assignment
+        to a hashed field of the block calls ``on_change``.
+        """
+        if candidate_table is None:
+            candidate_table = InternTable()
+        self.transactions = TransactionColumns(self.transactions, candidate_table)
+        self.tally = MappingProxyType(dict(self.tally))
+        self._on_change = on_change
+    
+    def calculate_merkle_root(self) -> str:
+        """Calculate the Merkle root over the block's transaction hashes."""
+        return merkle_root([t.calculate_hash() for t in self.transactions])
+    
+    def is_tally_valid(self, previous_tally: Dict[str, int]) -> bool:
+        """Whether the committed tally is ``previous_tally`` plus this block's votes."""
+        return (self.tally_hash == tally_hash(self.tally)
+                and self.tally == add_counts(previous_tally, count_votes(self.transactions)))
+    
+    def merkle_proof(self, position: int) -> List[Dict[str, str]]:
+        """
+        Return the sibling hashes linking transaction ``position`` to the Merkle root.
+        
+        Each step names the sibling hash and whether it sits to the left or the
+        right. The tree is cached until the block or a transaction changes.
+        """
+        levels = self.__dict__.get('_merkle_levels')
+        if levels is None:
+            levels = build_merkle_levels([t.calculate_hash() for t in self.transactions])
+            self._merkle_levels = levels
+        
+        proof = []
+        for level in levels[:-1]:
+            if position % 2:
+                proof.append({'hash': level[position - 1], 'position': 'left'})
+            else:
+                sibling = level[position + 1] if position + 1 < len(level) else level[position]
+                proof.append({'hash': sibling, 'position': 'right'})
+            position //= 2
+        return proof
+    
+    def _hash_content(self, nonce) -> Dict[str, Any]:
+        """Build the block header whose canonical JSON encoding is hashed."""
+        return {
             'index': self.index,
-            'transactions': [t.to_dict() for t in self.transactions],
+            'merkle_root': self.merkle_root,
+            'tally_hash': self.tally_hash,
             'previous_hash': self.previous_hash,
             'timestamp': self.timestamp,
-            'nonce': self.nonce
-        }, sort_keys=True)
+            'nonce': nonce
+        }
+    
+    def calculate_hash(self) -> str:
+        """Calculate the hash of the block using SHA-256."""
+        block_string = json.dumps(self._hash_content(self.nonce), sort_keys=True)
         return hashlib.sha256(block_string.encode()).hexdigest()
     
-    def mine_block(self, difficulty: int = 2):
-        """Mine the block using Proof of Work algorithm."""
-        target = '0' * difficulty
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
-        print(f"Block mined: {self.hash}")
+    def mining_template(self) -> Tuple[bytes, bytes]:
+        """
+        Encode the block once for mining.
+        
+        Returns the canonical encoding split around the nonce, so that
+        ``prefix + str(nonce).encode() + suffix`` hashes identically to
+        ``calculate_hash()``.
+        """
+        block_string = json.dumps(self._hash_content(NONCE_MARKER), sort_keys=True)
+        prefix, _, suffix = block_string.partition(json.dumps(NONCE_MARKER))
+        return prefix.encode(), suffix.encode()
+    
+    def mine_block(self, difficulty: int = 2, workers: int = 1,
+                   should_stop: Callable[[], bool] = None,
+                   on_progress: Callable[[int], None] = None):
+        """
+        Mine the block using Proof of Work algorithm.
+        
+        With ``workers`` > 1 the nonce search is spread over a process pool,
+        except at low difficulties where the serial search is faster.
+        ``on_progress`` receives the running attempt count, and ``should_stop``
+        returning true aborts the search with ``MiningCancelled``.
+        """
+        prefix, suffix = self.mining_template()
+        attempts = 0
+        
+        def progress(count: int):
+            nonlocal attempts
+            attempts = count
+            if on_progress:
+                on_progress(count)
+        
+        started = perf_counter()
+        if workers > 1 and difficulty >= PARALLEL_MIN_DIFFICULTY:
+            self.nonce, self.hash = parallel_find_nonce(prefix, suffix, difficulty, workers,
+                                                        self.nonce, should_stop, progress)
+        else:
+            self.nonce, self.hash = serial_find_nonce(prefix, suffix, difficulty,
+                                                      self.nonce, should_stop, progress)
+        elapsed = perf_counter() - started
+        metrics.MINING_SECONDS.observe(elapsed)
+        metrics.NONCE_ATTEMPTS.observe(attempts)
+        if elapsed > 0:
+            metrics.HASH_RATE.set(attempts / elapsed)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert block to dictionary."""
         return {
             'index': self.index,
             'transactions': [t.to_dict() for t in self.transactions],
+            'merkle_root': self.merkle_root,
+            'tally': dict(self.tally),
+            'tally_hash': self.tally_hash,
             'previous_hash': self.previous_hash,
             'timestamp': self.timestamp,
             'nonce': self.nonce,
             'hash': self.hash
         }
     
+    def to_header_dict(self) -> Dict[str, Any]:
+        """Convert the block header to a dictionary, without the transactions."""
+        return {
+            'index': self.index,
+            'hash': self.hash,
+            'previous_hash': self.previous_hash,
+            'timestamp': self.timestamp,
+            'nonce': self.nonce,
+            'merkle_root': self.merkle_root,
+            'tally': dict(self.tally),
+            'tally_hash': self.tally_hash,
+            'transaction_count': len(self.transactions)
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Block':
+        """
+        Rebuild a block from its dictionary form.
+        
+        Raises ValueError if the stored Merkle root, tally hash or hash does
+        not match the block's contents.
+        """
+        block = cls(
+            index=data['index'],
+            transactions=[Transaction.from_dict(t) for t in data['transactions']],
+            previous_hash=data['previous_hash'],
+            timestamp=data['timestamp'],
+            nonce=data['nonce'],
+            tally=data['tally']
+        )
+        if (block.merkle_root != data['merkle_root'] or block.tally_hash != data['tally_hash']
+                or block.hash != data['hash']):
+            raise ValueError(f"Block {data['index']} does not match its stored hash")
+        return block
+    
     def __repr__(self):
         return f"Block(index={self.index}, hash={self.hash[:10]}..., transactions={len(self.transactions)})"
 
 
+class TallyCheckpoints:
+    """
+    Running vote totals and timestamps as of every block, for historical results.
+    
+    The votes per candidate as of a block are already committed to by its
+    ``tally``, so only the running vote total and the block's timestamp are
+    recorded here, one entry per appended block in parallel columns.
+    Timestamps are kept as a running maximum so they stay sorted even if a
+    block's clock ran behind its predecessor's, which makes a lookup by time
+    a binary search; no lookup scans transactions.
+    """
+    
+    __slots__ = ('votes_cast', 'timestamps')
+    
+    def __init__(self):
+        self.votes_cast = array('Q')
+        self.timestamps = array('d')
+    
+    def record(self, timestamp: float, votes: int):
+        """Add the checkpoint of the next block, given its timestamp and number of votes."""
+        previous = len(self.timestamps) - 1
+        self.votes_cast.append(self.votes_cast[previous] + votes if previous >= 0 else votes)
+        # Appended last: readers bound their lookups by the number of timestamps
+        self.timestamps.append(max(timestamp, self.timestamps[previous]) if previous >= 0 else timestamp)
+    
+    def height_at(self, timestamp: float) -> int:
+        """Height of the last block sealed at or before ``timestamp``, or -1 if none was."""
+        return bisect_right(self.timestamps, timestamp, 0, len(self.timestamps)) - 1
+    
+    def __len__(self):
+        return len(self.timestamps)
+    
+    def __repr__(self):
+        return f"TallyCheckpoints(blocks={len(self)})"
+
+
 class Blockchain:
     """Manages the blockchain for the voting system."""
     
-    def __init__(self, difficulty: int = 2):
+    def __init__(self, difficulty: int = 2, workers: int = 1, store=None, journal=None,
+                 events: EventBus = None, genesis_time: float = None):
         self.chain: List[Block] = []
+        self.events = events or default_bus  # Receives block_sealed and validation notices
+        self.store = store  # Optional BlockStore that mined blocks are written to
+        self.journal = journal  # Optional VoteJournal that pending votes are written to
         self.difficulty = difficulty
+        self.workers = max(1, workers)  # Processes used for proof of work
         self.pending_transactions: List[Transaction] = []
+        self.mining_batch: List[Transaction] = []  # Votes in the block being mined
         self.mining_reward = 0  # No reward for voting system
         
-        # Create genesis block
-        self.create_genesis_block()
+        # Votes may be queued while a block is mined on another thread
+        self._pending_lock = threading.Lock()
+        self._mining_lock = threading.Lock()
+        # Held while a block is stored and appended, so a shared store is never applied twice
+        self._append_lock = threading.RLock()
+        
+        # Running tallies, updated as blocks are appended and votes queued
+        self.tally: Dict[str, int] = {}
+        self.pending_tally: Dict[str, int] = {}
+        self.transaction_count = 0
+        
+        # Receipt hash -> (block position, transaction position) for inclusion proofs
+        self.transaction_locations = ReceiptIndex()
+        
+        # Candidate IDs shared by the columnar storage of every sealed block
+        self.candidate_table = InternTable()
+        
+        # Cumulative tally as of each block, recorded as blocks are appended
+        self.checkpoints = TallyCheckpoints()
+        
+        # Number of leading blocks already verified by is_chain_valid
+        self.verified_height = 0
+        
+        # Called after a block is appended or a stored block is modified
+        self.on_change: Optional[Callable[[], None]] = None
+        
+        # Rebuild from the durable block log, or create genesis block
+        if store is not None and len(store):
+            self.load_from_store()
+        else:
+            self.create_genesis_block(genesis_time)
+        if journal is not None:
+            self.replay_journal()
+    
+    def create_genesis_block(self, timestamp: float = None):
+        """Create the first block in the blockchain, dated ``timestamp`` (default now)."""
+        genesis_block = Block(0, [], "0", timestamp)
+        genesis_block.mine_block(self.difficulty, self.workers)
+        self.append_block(genesis_block)
     
-    def create_genesis_block(self):
-        """Create the first block in the blockchain."""
-        genesis_block = Block(0, [], "0")
-        genesis_block.mine_block(self.difficulty)
-        self.chain.append(genesis_block)
+    def load_from_store(self):
+        """
+        Rebuild the chain by streaming the block store once.
+        
+        Every block's hash and link to its predecessor is checked as it is
+        read, so the loaded chain starts fully verified.
+        """
+        for data in self.store.iterate():
+            block = Block.from_dict(data)
+            if self.chain and block.previous_hash != self.chain[-1].hash:
+                raise ValueError(f"Block {block.index} does not link to the previous block")
+            self.append_block(block, persist=False)
+        self.verified_height = len(self.chain)
+    
+    def replay_journal(self):
+        """
+        Restore journaled votes that never made it into a stored block.
+        
+        Votes already in the chain are dropped from the journal instead.
+        """
+        mined = []
+        for data in self.journal.replay():
+            transaction = Transaction.from_dict(data)
+            tx_hash = transaction.calculate_hash()
+            if self.get_inclusion_proof(tx_hash) is not None:
+                mined.append(tx_hash)
+            else:
+                self.add_transaction(transaction, journal=False)
+        if mined:
+            self.journal.discard(mined)
+    
+    def append_block(self, block: Block, persist: bool = True, from_pending: bool = False,
+                     drop_pending: bool = False):
+        """
+        Append a block to the chain and fold its votes into the tally.
+        
+        With a block store the block is durably written first. With
+        ``from_pending`` the block holds the current mining batch, whose votes
+        leave the pending tally in the same step they join the tally, so
+        ``counts()`` never sees a vote twice or not at all. ``drop_pending``
+        does the same for a block mined elsewhere, removing its voters' votes
+        from the pending queue.
+        """
+        with self._append_lock:
+            # A block mined while another process's block was synced in must not
+            # land on top of it, as the two may hold the same votes
+            if self.chain and block.previous_hash != self.get_latest_block().hash:
+                raise ValueError(f"Block {block.index} does not link to the previous block")
+            if self.store is not None and persist:
+                self.store.append(block.to_dict())
+            position = len(self.chain)
+            tx_hashes = [t.calculate_hash() for t in block.transactions]
+            self.chain.append(block)
+            block.seal(lambda: self._invalidate_from(position), self.candidate_table)
+            if block.index == 0:
+                self.checkpoints.record(block.timestamp, 0)
+                return
+            for tx_position, tx_hash in enumerate(tx_hashes):
+                self.transaction_locations.put(tx_hash, position, tx_position)
+            self._fold_block(block, from_pending, drop_pending)
+        
+        # The block's votes are durable in the block store, so the journal can forget them
+        if self.journal is not None and persist and tx_hashes:
+            self.journal.discard(tx_hashes)
+        if self.on_change:
+            self.on_change()
+    
+    def _fold_block(self, block: Block, from_pending: bool, drop_pending: bool):
+        """Move an appended block's votes into the tally in one pending-lock critical section."""
+        candidate_counts = block.transactions.candidate_counts()
+        with self._pending_lock:
+            if drop_pending:
+                self._drop_pending_voters(set(block.transactions.voter_ids))
+            for candidate_id, count in candidate_counts.items():
+                self.tally[candidate_id] = self.tally.get(candidate_id, 0) + count
+                if from_pending:
+                    self.pending_tally[candidate_id] -= count
+                    if not self.pending_tally[candidate_id]:
+                        del self.pending_tally[candidate_id]
+            self.transaction_count += len(block.transactions)
+            self.checkpoints.record(block.timestamp, len(block.transactions))
+            if from_pending:
+                self.mining_batch = []
+    
+    def _drop_pending_voters(self, voter_ids: Set[str]):
+        """Remove queued votes by ``voter_ids``; the caller holds the pending lock."""
+        kept = []
+        for transaction in self.pending_transactions:
+            if transaction.voter_id not in voter_ids:
+                kept.append(transaction)
+                continue
+            candidate_id = transaction.candidate_id
+            self.pending_tally[candidate_id] -= 1
+            if not self.pending_tally[candidate_id]:
+                del self.pending_tally[candidate_id]
+        self.pending_transactions = kept
+    
+    def sync_from_store(self) -> int:
+        """
+        Append blocks that another process sharing the block store has written.
+        
+        Their votes are removed from this process's pending queue so they are
+        not mined a second time. Returns the number of blocks applied.
+        """
+        applied = 0
+        with self._append_lock:
+            for data in self.store.iterate(len(self.chain)):
+                block = Block.from_dict(data)
+                if block.previous_hash != self.get_latest_block().hash:
+                    raise ValueError(f"Block {block.index} does not link to the previous block")
+                self.append_block(block, persist=False, drop_pending=True)
+                applied += 1
+        return applied
     
     def get_latest_block(self) -> Block:
         """Get the most recent block in the chain."""
         return self.chain[-1]
     
-    def add_transaction(self, transaction: Transaction) -> bool:
-        """Add a transaction to pending transactions."""
+    def add_transaction(self, transaction: Transaction, journal: bool = True) -> bool:
+        """
+        Add a transaction to pending transactions.
+        
+        With a vote journal the transaction is durably journaled before it is
+        queued, so an accepted vote survives a crash. Returns False if the
+        journal refuses it because the voter already voted through another
+        process sharing the same store.
+        """
         if not transaction.voter_id or not transaction.candidate_id:
             return False
         
-        self.pending_transactions.append(transaction)
+        tx_hash = transaction.calculate_hash()
+        if self.journal is not None and journal:
+            if self.journal.append_many([(tx_hash, transaction.to_dict())]):
+                return False
+        
+        with self._pending_lock:
+            # Already in a block synced from another process; see ``add_transactions``
+            if self.store is not None and self.contains_transaction(tx_hash):
+                return True
+            self.pending_transactions.append(transaction)
+            candidate_id = transaction.candidate_id
+            self.pending_tally[candidate_id] = self.pending_tally.get(candidate_id, 0) + 1
         return True
     
-    def mine_pending_transactions(self):
-        """Mine pending transactions into a new block."""
-        if not self.pending_transactions:
-            print("No transactions to mine.")
-            return
+    def add_transactions(self, transactions: List[Transaction]) -> List[Optional[str]]:
+        """
+        Add a batch of transactions to pending transactions in one operation.
         
-        block = Block(
-            index=len(self.chain),
-            transactions=self.pending_transactions,
-            previous_hash=self.get_latest_block().hash
-        )
-        block.mine_block(self.difficulty)
+        The whole batch is journaled with a single fsync and queued under one
+        lock acquisition. Returns the receipt hash of each transaction, or None
+        for one the journal refused (see ``add_transaction``).
+        """
+        tx_hashes = [t.calculate_hash() for t in transactions]
+        if self.journal is not None:
+            rejected = self.journal.append_many([(tx_hash, t.to_dict())
+                                                 for tx_hash, t in zip(tx_hashes, transactions)])
+            if rejected:
+                tx_hashes = [None if tx_hash in rejected else tx_hash for tx_hash in tx_hashes]
+                transactions = [t for t, tx_hash in zip(transactions, tx_hashes) if tx_hash]
+        
+        with self._pending_lock:
+            if self.store is not None:
+                # A block synced from another process may already hold a vote
+                # that was journaled but not yet queued here; see ``_fold_block``
+                transactions = [t for t in transactions
+                                if not self.contains_transaction(t.calculate_hash())]
+            self.pending_transactions.extend(transactions)
+            pending_tally = self.pending_tally
+            for transaction in transactions:
+                candidate_id = transaction.candidate_id
+                pending_tally[candidate_id] = pending_tally.get(candidate_id, 0) + 1
+        return tx_hashes
+    
+    def counts(self) -> Tuple[Dict[str, int], Dict[str, int], int, int]:
+        """
+        Consistent copies of the tally, pending tally, mined vote count and
+        pending vote count, taken together under the pending lock.
+        """
+        with self._pending_lock:
+            return (dict(self.tally), dict(self.pending_tally), self.transaction_count,
+                    len(self.pending_transactions) + len(self.mining_batch))
+    
+    @property
+    def pending_count(self) -> int:
+        """Number of votes not yet in the chain, including any block being mined."""
+        return len(self.pending_transactions) + len(self.mining_batch)
+    
+    def is_mining(self) -> bool:
+        """Whether a block is currently being mined."""
+        return self._mining_lock.locked()
+    
+    def mine_pending_transactions(self, should_stop: Callable[[], bool] = None,
+                                  on_progress: Callable[[int], None] = None,
+                                  max_transactions: int = None, timestamp: float = None) -> Optional[Block]:
+        """
+        Mine pending transactions into a new block and return it.
         
-        self.chain.append(block)
-        self.pending_transactions = []
+        The pending votes (at most ``max_transactions`` of them, oldest first)
+        are taken as one batch when mining starts; votes added while the block
+        is being mined queue up for the next block. If the
+        search is cancelled through ``should_stop`` the batch is put back at the
+        front of the queue and ``MiningCancelled`` propagates. ``timestamp``
+        dates the block, e.g. when replaying an election, and defaults to now.
+        """
+        with self._mining_lock:
+            # Take the batch and its parent block together: a block synced in from
+            # another process has either dropped its votes from the batch already
+            # or arrives later and makes this one stale (see ``append_block``)
+            with self._append_lock, self._pending_lock:
+                if not self.pending_transactions:
+                    self.events.emit(EVENT_NOTICE, message="No transactions to mine.")
+                    return None
+                batch = self.pending_transactions[:max_transactions]
+                self.pending_transactions = self.pending_transactions[len(batch):]
+                self.mining_batch = batch
+                parent = self.get_latest_block()
+            
+            block = Block(
+                index=parent.index + 1,
+                transactions=batch,
+                previous_hash=parent.hash,
+                timestamp=timestamp,
+                tally=add_counts(parent.tally, count_votes(batch))
+            )
+            try:
+                block.mine_block(self.difficulty, self.workers, should_stop, on_progress)
+            except MiningCancelled:
+                with self._pending_lock:
+                    self.pending_transactions = batch + self.pending_transactions
+                    self.mining_batch = []
+                raise
+            
+            # Written to the block store outside the pending lock so voting is not held up by fsync
+            try:
+                self.append_block(block, from_pending=True)
+            except Exception:
+                # e.g. another process sharing the store appended this height first, or
+                # its block was synced in while this one was mined;
+                # requeue the votes that have not reached the chain some other way
+                with self._pending_lock:
+                    unmined = []
+                    for transaction in batch:
+                        if not self.contains_transaction(transaction.calculate_hash()):
+                            unmined.append(transaction)
+                            continue
+                        candidate_id = transaction.candidate_id
+                        self.pending_tally[candidate_id] -= 1
+                        if not self.pending_tally[candidate_id]:
+                            del self.pending_tally[candidate_id]
+                    self.pending_transactions = unmined + self.pending_transactions
+                    self.mining_batch = []
+                raise
+            self.events.emit(EVENT_BLOCK_SEALED, block_index=block.index, block_hash=block.hash,
+                             transaction_count=len(block.transactions))
+            return block
+    
+    def _invalidate_from(self, position: int):
+        """Lower the verified watermark so the block at ``position`` is rechecked."""
+        self.verified_height = min(self.verified_height, position)
+        if self.on_change:
+            self.on_change()
     
-    def is_chain_valid(self) -> bool:
-        """Validate the integrity of the blockchain."""
-        for i in range(1, len(self.chain)):
+    @metrics.timed(metrics.CHAIN_VALIDATION_SECONDS)
+    def is_chain_valid(self, deep: bool = False) -> bool:
+        """
+        Validate the integrity of the blockchain.
+        
+        Only blocks past the verified watermark are checked unless ``deep`` is
+        set, in which case every block is re-hashed from the start.
+        """
+        start = 1 if deep else max(1, self.verified_height)
+        # Blocks appended while this runs are left for the next check
+        end = len(self.chain)
+        watermark = self.verified_height
+        for i in range(start, end):
             current_block = self.chain[i]
             previous_block = self.chain[i - 1]
             
+            # Check if the Merkle root matches the transactions
+            if current_block.merkle_root != current_block.calculate_merkle_root():
+                self.events.emit(EVENT_NOTICE, message=f"Invalid merkle root at block {i}")
+                self.verified_height = min(self.verified_height, i)
+                return False
+            
             # Check if hash is correct
             if current_block.hash != current_block.calculate_hash():
-                print(f"Invalid hash at block {i}")
+                self.events.emit(EVENT_NOTICE, message=f"Invalid hash at block {i}")
+                self.verified_height = min(self.verified_height, i)
                 return False
             
             # Check if previous hash matches
             if current_block.previous_hash != previous_block.hash:
-                print(f"Invalid previous hash at block {i}")
+                self.events.emit(EVENT_NOTICE, message=f"Invalid previous hash at block {i}")
+                self.verified_height = min(self.verified_height, i)
+                return False
+            
+            # Check if the committed tally adds this block's votes to the previous one
+            if not current_block.is_tally_valid(previous_block.tally):
+                self.events.emit(EVENT_NOTICE, message=f"Invalid tally at block {i}")
+                self.verified_height = min(self.verified_height, i)
                 return False
         
+        # A block modified meanwhile has lowered the watermark; keep it lowered
+        if self.verified_height >= watermark:
+            self.verified_height = end
         return True
     
+    def audit_results(self, full: bool = False, workers: int = 1) -> Dict[str, Any]:
+        """
+        Verify the final results from the tally commitments in the block headers.
+        
+        Every header's hash, tally hash and link to its parent is checked
+        first, in O(blocks) and without reading a vote. Then the latest
+        block's votes are checked against the change in tally it claims, or
+        with ``full`` every block's are; each block needs only its parent's
+        header for that, so with ``workers`` > 1 they are spread over a
+        process pool. Returns the results as of the latest block, how many
+        blocks had their votes checked and the first problem found, if any.
+        """
+        chain = self.chain[:]
+        problem = None
+        for i in range(1, len(chain)):
+            block = chain[i]
+            if block.hash != block.calculate_hash() or block.tally_hash != tally_hash(block.tally):
+                problem = f"Invalid header at block {i}"
+            elif block.previous_hash != chain[i - 1].hash:
+                problem = f"Invalid previous hash at block {i}"
+            if problem:
+                break
+        
+        heights = range(1 if full else max(1, len(chain) - 1), len(chain))
+        if problem is None and workers > 1 and len(heights) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                problems = pool.map(audit_block, (chain[i].to_dict() for i in heights),
+                                    (dict(chain[i - 1].tally) for i in heights),
+                                    chunksize=max(1, len(heights) // (4 * workers)))
+                problem = next((p for p in problems if p), None)
+        elif problem is None:
+            for i in heights:
+                block = chain[i]
+                if block.merkle_root != block.calculate_merkle_root():
+                    problem = f"Invalid merkle root at block {i}"
+                elif not block.is_tally_valid(chain[i - 1].tally):
+                    problem = f"Tally of block {i} does not match its votes"
+                if problem:
+                    break
+        
+        if problem:
+            self.events.emit(EVENT_NOTICE, message=problem)
+        return {
+            'is_valid': problem is None,
+            'height': len(chain) - 1,
+            'block_hash': chain[-1].hash,
+            'results': dict(chain[-1].tally),
+            'blocks_checked': len(heights),
+            'problem': problem
+        }
+    
+    def iter_blocks(self, start: int = 0, stop: int = None, step: int = 1) -> Iterator[Block]:
+        """Yield blocks by height without copying the chain."""
+        chain = self.chain
+        stop = len(chain) if stop is None else stop
+        for height in range(start, stop, step):
+            yield chain[height]
+    
     def get_all_transactions(self) -> List[Transaction]:
         """Get all transactions from the blockchain."""
         all_transactions = []
@@ -146,6 +1075,85 @@ class Blockchain:
             all_transactions.extend(block.transactions)
         return all_transactions
     
+    def recount(self) -> Dict[str, int]:
+        """Recount votes per candidate by scanning every block."""
+        counts: Dict[str, int] = {}
+        for block in self.chain[1:]:  # Skip genesis block
+            for candidate_id, count in block.transactions.candidate_counts().items():
+                counts[candidate_id] = counts.get(candidate_id, 0) + count
+        return counts
+    
+    def checkpoint(self, height: int) -> Optional[Dict[str, Any]]:
+        """
+        The tally as of block ``height``: its hash and timestamp, the votes
+        cast so far and the votes per candidate. None if there is no such block.
+        """
+        checkpoints = self.checkpoints
+        if not 0 <= height < len(checkpoints):
+            return None
+        block = self.chain[height]
+        return {
+            'height': height,
+            'block_hash': block.hash,
+            'timestamp': checkpoints.timestamps[height],
+            'votes_cast': checkpoints.votes_cast[height],
+            'results': {candidate_id: count for candidate_id, count in block.tally.items() if count}
+        }
+    
+    def height_at(self, timestamp: float) -> int:
+        """Height of the last block sealed at or before ``timestamp``, or -1 if none was."""
+        return self.checkpoints.height_at(timestamp)
+    
+    def is_tally_consistent(self) -> bool:
+        """Check the running tally, latest block's tally and vote totals against a full recount."""
+        pending: Dict[str, int] = {}
+        for transaction in self.mining_batch + self.pending_transactions:
+            pending[transaction.candidate_id] = pending.get(transaction.candidate_id, 0) + 1
+        
+        return (self.recount() == self.tally
+                and self.get_latest_block().tally == self.tally
+                and pending == self.pending_tally
+                and self.transaction_count == len(self.get_all_transactions())
+                and self.checkpoints.votes_cast[-1] == self.transaction_count)
+    
+    def get_inclusion_proof(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Build an inclusion proof for the vote with receipt hash ``tx_hash``.
+        
+        Returns None if the vote is not in the chain. The proof holds one
+        sibling hash per tree level, so it is O(log n) in the block size.
+        """
+        location = self.transaction_locations.get(tx_hash)
+        if location is None:
+            return None
+        
+        block_position, tx_position = location
+        block = self.chain[block_position]
+        # The index is keyed by a hash prefix, so confirm the full hash
+        if block.transactions[tx_position].calculate_hash() != tx_hash:
+            return None
+        return {
+            'transaction_hash': tx_hash,
+            'block_index': block.index,
+            'block_hash': block.hash,
+            'merkle_root': block.merkle_root,
+            'transaction_position': tx_position,
+            'proof': block.merkle_proof(tx_position)
+        }
+    
+    def contains_transaction(self, tx_hash: str) -> bool:
+        """Whether a vote with this receipt hash is stored in the chain."""
+        location = self.transaction_locations.get(tx_hash)
+        if location is None:
+            return False
+        block_position, tx_position = location
+        return self.chain[block_position].transactions[tx_position].calculate_hash() == tx_hash
+    
+    def is_pending(self, tx_hash: str) -> bool:
+        """Whether a vote with this receipt hash is waiting to be mined."""
+        return any(t.calculate_hash() == tx_hash
+                   for t in self.mining_batch + self.pending_transactions)
+    
     def export_chain(self) -> List[Dict[str, Any]]:
         """Export the blockchain to a list of dictionaries."""
         return [block.to_dict() for block in self.chain]
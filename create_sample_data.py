@@ -1,9 +1,53 @@
 """
 Sample Data Generator for Blockchain Voting System
 This script creates sample elections, candidates, and voters for testing.
+Run with options (see --help) to generate a synthetic election of any size
+instead, either straight into a data directory or database or as NDJSON/CSV
+files for the import paths.
 """
 
-from voting_system import VotingSystem
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, List, Tuple, Iterator, Optional
+from voting_system import VotingSystem, Voter, Candidate
+from events import attach_console_logger
+
+
+# Voters, candidates or ballots generated, registered or cast together
+GENERATOR_CHUNK_SIZE = 10000
+
+CANDIDATE_DISTRIBUTIONS = ('uniform', 'zipf')
+
+# Relative turnout over the voting window, as a density on [0, 1]
+TURNOUT_CURVES = {
+    'flat': lambda t: 1.0,
+    'early': lambda t: (1 - t) ** 2,  # Queues at opening, tailing off
+    'late': lambda t: t ** 2,  # Last-minute surge
+    'peaks': lambda t: 0.1 + math.exp(-((t - 0.2) / 0.08) ** 2) + math.exp(-((t - 0.8) / 0.08) ** 2)
+}
+
+# Points at which a turnout curve is tabulated to invert its distribution
+CURVE_RESOLUTION = 1000
+
+# Default opening time of generated elections, fixed so output is reproducible
+SYNTHETIC_START_TIME = datetime(2025, 11, 4, 7, 0, tzinfo=timezone.utc).timestamp()
+
+FIRST_NAMES = ("Alice", "Bob", "Charlie", "Diana", "Ethan", "Fiona", "George", "Hannah", "Ian", "Julia",
+               "Kevin", "Laura", "Marcus", "Nina", "Oliver", "Priya", "Quinn", "Rachel", "Samuel", "Tina")
+LAST_NAMES = ("Williams", "Martinez", "Brown", "Prince", "Hunt", "Chen", "Kumar", "Lee", "Smith", "Anderson",
+              "Nguyen", "Garcia", "Johnson", "Patel", "Davis", "Sharma", "Wilson", "Kim", "Zhang", "Thompson")
+PARTIES = ("Progressive Student Alliance", "Academic Excellence Party", "Diversity & Inclusion Coalition",
+           "Sports & Wellness Movement", "Independent")
 
 
 def create_sample_election():
@@ -225,9 +269,280 @@ def create_sample_with_votes():
     return election, voter_credentials
 
 
+class SyntheticElection:
+    """
+    A generated election of any size, reproducible from its seed.
+    
+    Voters, candidates and ballots are produced as streams, a chunk at a
+    time, so memory stays flat however many voters there are; only the
+    candidate weights are held (one float per candidate). Ballots come out
+    in time order: each vote's timestamp is drawn from its own slice of the
+    turnout curve's distribution, and voters are visited in a scrambled
+    order given by a stride permutation rather than a shuffled list.
+    
+    Private keys are derived from the seed and voter ID, so the same
+    voters get the same keys in every run. They are guessable by anyone who
+    knows the seed: use generated elections for testing only.
+    """
+    
+    def __init__(self, voters: int, candidates: int, turnout: float = 0.6,
+                 distribution: str = 'uniform', zipf_exponent: float = 1.0,
+                 turnout_curve: str = 'flat', duration: float = 12 * 3600,
+                 start_time: float = SYNTHETIC_START_TIME, seed: int = 0, name: str = None):
+        if voters < 0 or candidates < 1:
+            raise ValueError("A synthetic election needs at least one candidate and no negative voter count")
+        if not 0 <= turnout <= 1:
+            raise ValueError("turnout must be between 0 and 1")
+        if distribution not in CANDIDATE_DISTRIBUTIONS:
+            raise ValueError(f"Unknown candidate distribution: {distribution}")
+        if turnout_curve not in TURNOUT_CURVES:
+            raise ValueError(f"Unknown turnout curve: {turnout_curve}")
+        
+        self.voters = voters
+        self.candidates = candidates
+        self.votes = round(voters * turnout)
+        self.distribution = distribution
+        self.zipf_exponent = zipf_exponent
+        self.turnout_curve = turnout_curve
+        self.duration = duration
+        self.start_time = start_time
+        self.seed = seed
+        self.name = name or f"Synthetic Election ({voters:,} voters, {candidates:,} candidates)"
+        self._voter_digits = max(3, len(str(voters)))
+        self._candidate_digits = max(3, len(str(candidates)))
+    
+    def candidate_id(self, position: int) -> str:
+        return f"SC{position + 1:0{self._candidate_digits}d}"
+    
+    def voter_id(self, index: int) -> str:
+        return f"SV{index + 1:0{self._voter_digits}d}"
+    
+    def private_key(self, voter_id: str) -> str:
+        return hashlib.sha256(f"synthetic:{self.seed}:{voter_id}".encode()).hexdigest()
+    
+    def iter_candidates(self) -> Iterator[Candidate]:
+        for position in range(self.candidates):
+            first = FIRST_NAMES[position % len(FIRST_NAMES)]
+            last = LAST_NAMES[position // len(FIRST_NAMES) % len(LAST_NAMES)]
+            yield Candidate(self.candidate_id(position), f"{first} {last}",
+                            PARTIES[position % len(PARTIES)], f"Synthetic candidate #{position + 1}")
+    
+    def iter_voters(self) -> Iterator[Voter]:
+        for index in range(self.voters):
+            voter_id = self.voter_id(index)
+            first = FIRST_NAMES[index % len(FIRST_NAMES)]
+            last = LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)]
+            yield Voter(voter_id, f"{first} {last}", f"{first}.{last}.{index + 1}@example.edu".lower(),
+                        self.private_key(voter_id))
+    
+    def _voter_order(self, rng: random.Random):
+        """A bijection from vote position to voter index: ``(stride * position + offset) mod voters``."""
+        voters = self.voters
+        stride = int(voters * 0.6180339887) | 1
+        while math.gcd(stride, voters) != 1:
+            stride += 1
+        offset = rng.randrange(voters)
+        return lambda position: (stride * position + offset) % voters
+    
+    def _cumulative_weights(self) -> Optional[List[float]]:
+        """Cumulative candidate weights for ``random.choices``, or None for uniform."""
+        if self.distribution == 'uniform':
+            return None
+        weights = []
+        total = 0.0
+        for rank in range(1, self.candidates + 1):
+            total += rank ** -self.zipf_exponent
+            weights.append(total)
+        return weights
+    
+    def _time_quantile(self):
+        """Inverse of the turnout curve's distribution over the window, by linear interpolation."""
+        density = TURNOUT_CURVES[self.turnout_curve]
+        points = [i / CURVE_RESOLUTION for i in range(CURVE_RESOLUTION + 1)]
+        cumulative = [0.0]
+        for left, right in zip(points, points[1:]):
+            cumulative.append(cumulative[-1] + (density(left) + density(right)) / 2)
+        total = cumulative[-1]
+        cumulative = [value / total for value in cumulative]
+        
+        def quantile(q: float) -> float:
+            step = min(bisect_right(cumulative, q), CURVE_RESOLUTION) - 1
+            low, high = cumulative[step], cumulative[step + 1]
+            fraction = (q - low) / (high - low) if high > low else 0.0
+            return (step + fraction) / CURVE_RESOLUTION
+        return quantile
+    
+    def iter_ballot_chunks(self) -> Iterator[List[Tuple[str, str, str, float]]]:
+        """Yield ``(voter_id, candidate_id, private_key, timestamp)`` ballots in time order, a chunk at a time."""
+        if not self.votes:
+            return
+        rng = random.Random(f"synthetic:{self.seed}:ballots")
+        voter_at = self._voter_order(rng)
+        cum_weights = self._cumulative_weights()
+        quantile = self._time_quantile()
+        positions = range(self.candidates)
+        votes = self.votes
+        
+        for first in range(0, votes, GENERATOR_CHUNK_SIZE):
+            size = min(GENERATOR_CHUNK_SIZE, votes - first)
+            picks = rng.choices(positions, cum_weights=cum_weights, k=size)
+            chunk = []
+            for position, pick in enumerate(picks, first):
+                voter_id = self.voter_id(voter_at(position))
+                timestamp = self.start_time + self.duration * quantile((position + rng.random()) / votes)
+                chunk.append((voter_id, self.candidate_id(pick), self.private_key(voter_id), timestamp))
+            yield chunk
+    
+    def populate(self, voting_system: VotingSystem, store=None, block_size: int = None) -> Dict[str, int]:
+        """
+        Write the election straight into ``voting_system``.
+        
+        Candidates are registered, voters added to its registry (and saved
+        to ``store``, if given), the election started and every ballot cast
+        with its generated timestamp. With ``block_size`` the votes are mined
+        as they arrive, in blocks of that many; otherwise they stay pending.
+        The election's start and each block are dated within the generated
+        window like the votes, so create the voting system with
+        ``genesis_time=election.start_time`` for its whole chain to agree.
+        Returns the numbers of candidates, voters and votes added.
+        """
+        candidates = voting_system.register_candidates(self.iter_candidates())
+        
+        voters = 0
+        stream = self.iter_voters()
+        while True:
+            chunk = list(islice(stream, GENERATOR_CHUNK_SIZE))
+            if not chunk:
+                break
+            new = [voter for voter in chunk if voter.voter_id not in voting_system.voters]
+            if store and new:
+                store.save_voters(new)
+            voters += voting_system.voters.add_many(new)
+        
+        if not voting_system.is_active:
+            voting_system.start_election()
+            voting_system.start_time = datetime.fromtimestamp(self.start_time)
+            voting_system.publish_snapshot()
+        votes = 0
+        blockchain = voting_system.blockchain
+        for chunk in self.iter_ballot_chunks():
+            results = voting_system.cast_votes([ballot[:3] for ballot in chunk],
+                                               timestamps=[ballot[3] for ballot in chunk])
+            votes += sum(1 for result in results if result.accepted)
+            while block_size and blockchain.pending_count >= block_size:
+                # Dated by its last vote rather than when it happened to be generated
+                last_vote = blockchain.pending_transactions[block_size - 1]
+                blockchain.mine_pending_transactions(max_transactions=block_size, timestamp=last_vote.timestamp)
+        return {'candidates': candidates, 'voters': voters, 'votes': votes}
+    
+    def write_files(self, directory: str, voter_format: str = 'ndjson') -> Dict[str, str]:
+        """
+        Stream the election to files in ``directory`` and return their paths.
+        
+        ``candidates.ndjson`` lists the ballot; ``voters.ndjson`` (or
+        ``voters.csv``) is a roll for ``voter_import.py`` or
+        ``/api/import-voters`` whose rows carry their private keys; and
+        ``ballots.ndjson`` holds the votes in time order, each line usable as
+        a ballot for ``/api/cast-votes``.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = {'candidates': os.path.join(directory, 'candidates.ndjson'),
+                 'voters': os.path.join(directory, f'voters.{voter_format}'),
+                 'ballots': os.path.join(directory, 'ballots.ndjson')}
+        
+        with open(paths['candidates'], 'w') as f:
+            for candidate in self.iter_candidates():
+                f.write(json.dumps(candidate.to_dict()) + '\n')
+        
+        with open(paths['voters'], 'w', newline='') as f:
+            fields = ('voter_id', 'name', 'email', 'private_key')
+            writer = csv.writer(f) if voter_format == 'csv' else None
+            if writer:
+                writer.writerow(fields)
+            for voter in self.iter_voters():
+                row = (voter.voter_id, voter.name, voter.email, voter.private_key)
+                if writer:
+                    writer.writerow(row)
+                else:
+                    f.write(json.dumps(dict(zip(fields, row))) + '\n')
+        
+        with open(paths['ballots'], 'w') as f:
+            for chunk in self.iter_ballot_chunks():
+                f.writelines(json.dumps({'voter_id': voter_id, 'candidate_id': candidate_id,
+                                         'private_key': private_key, 'timestamp': timestamp}) + '\n'
+                             for voter_id, candidate_id, private_key, timestamp in chunk)
+        return paths
+    
+    def __repr__(self):
+        return (f"SyntheticElection(voters={self.voters}, candidates={self.candidates}, "
+                f"votes={self.votes}, distribution={self.distribution}, curve={self.turnout_curve})")
+
+
+def generate_synthetic_election():
+    """Generate a synthetic election from command-line options."""
+    from election_store import ElectionStore
+    from sqlite_store import SQLiteElectionStore
+    
+    parser = argparse.ArgumentParser(description="Generate a synthetic election of any size")
+    parser.add_argument('--voters', type=int, default=100000, help="Registered voters")
+    parser.add_argument('--candidates', type=int, default=10, help="Candidates on the ballot")
+    parser.add_argument('--turnout', type=float, default=0.6, help="Fraction of voters who vote")
+    parser.add_argument('--distribution', choices=CANDIDATE_DISTRIBUTIONS, default='uniform',
+                        help="How votes spread over candidates")
+    parser.add_argument('--zipf-exponent', type=float, default=1.0,
+                        help="Skew of the zipf distribution; larger favours the leaders more")
+    parser.add_argument('--turnout-curve', choices=sorted(TURNOUT_CURVES), default='flat',
+                        help="How votes spread over the voting window")
+    parser.add_argument('--hours', type=float, default=12, help="Length of the voting window")
+    parser.add_argument('--seed', type=int, default=0, help="Same seed, same election")
+    parser.add_argument('--name', help="Election name")
+    parser.add_argument('--output-dir', help="Write candidates, voters and ballots files here")
+    parser.add_argument('--voter-format', choices=('ndjson', 'csv'), default='ndjson',
+                        help="Format of the voter roll file")
+    parser.add_argument('--data-dir', help="Write the election into this data directory")
+    parser.add_argument('--database', help="Write the election into this SQLite database")
+    parser.add_argument('--difficulty', type=int, default=2, help="Mining difficulty of the election")
+    parser.add_argument('--block-size', type=int, default=GENERATOR_CHUNK_SIZE,
+                        help="Mine votes in blocks of this many as they are cast (0 leaves them pending)")
+    args = parser.parse_args()
+    if not (args.output_dir or args.data_dir or args.database):
+        parser.error("one of --output-dir, --data-dir or --database is required")
+    
+    election = SyntheticElection(args.voters, args.candidates, args.turnout, args.distribution,
+                                 args.zipf_exponent, args.turnout_curve, args.hours * 3600,
+                                 seed=args.seed, name=args.name)
+    started = time.perf_counter()
+    if args.output_dir:
+        for kind, path in election.write_files(args.output_dir, args.voter_format).items():
+            print(f"✓ Wrote {kind}: {path}")
+    
+    if args.data_dir or args.database:
+        store = SQLiteElectionStore(args.database) if args.database else ElectionStore(args.data_dir)
+        try:
+            election_id = f"synthetic_{args.seed}_{int(time.time())}"
+            voting_system = VotingSystem(election.name, args.difficulty,
+                                         block_store=store.open_block_store(election_id),
+                                         vote_journal=store.open_vote_journal(election_id),
+                                         voter_registry=store.load_voters(),
+                                         genesis_time=election.start_time)
+            added = election.populate(voting_system, store, block_size=args.block_size or None)
+            store.save_election(election_id, voting_system)
+            store.save_current_election(election_id)
+            print(f"✓ Election {election_id}: {added['candidates']:,} candidates, "
+                  f"{added['voters']:,} new voters, {added['votes']:,} votes "
+                  f"({voting_system.blockchain.pending_count:,} pending)")
+        finally:
+            # Releases the shared tally segments and lock files the store holds
+            store.close()
+    print(f"✓ Generated {election!r} in {time.perf_counter() - started:.1f}s")
+
+
 if __name__ == "__main__":
-    import sys
+    if len(sys.argv) > 1:
+        generate_synthetic_election()
+        sys.exit()
     
+    attach_console_logger()
     print("\n🗳️  SAMPLE DATA GENERATOR FOR BLOCKCHAIN VOTING SYSTEM\n")
     print("Choose an option:")
     print("1. Create election with candidates and voters only")
@@ -4,6 +4,7 @@ This script showcases all features of the system with sample data.
 """
 
 from voting_system import VotingSystem
+from events import attach_console_logger
 import time
 
 
@@ -224,4 +225,5 @@ def interactive_demo():
 
 
 if __name__ == "__main__":
+    attach_console_logger()
     interactive_demo()
@@ -0,0 +1,178 @@
+"""
+On-disk layout for persisted elections.
+Keeps each election's manifest and block log, plus the shared voter roll,
+under one data directory so the web app can rebuild its state after a restart.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, Tuple, List, Optional
+from block_store import BlockStore
+from vote_journal import VoteJournal
+from mining_jobs import SealingPolicy
+from voting_system import VotingSystem, Voter, VoterRegistry
+
+
+class ElectionStore:
+    """
+    Persists elections under ``data_dir``::
+    
+        voters.jsonl                  shared voter roll, one voter per line
+        elections/<id>/election.json  name, settings, candidates and status
+        elections/<id>/blocks/        append-only block log (BlockStore)
+        elections/<id>/votes.wal      votes accepted but not yet mined (VoteJournal)
+    """
+    
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.elections_dir = os.path.join(data_dir, 'elections')
+        self.voters_path = os.path.join(data_dir, 'voters.jsonl')
+        os.makedirs(self.elections_dir, exist_ok=True)
+    
+    def _election_dir(self, election_id: str) -> str:
+        return os.path.join(self.elections_dir, election_id)
+    
+    def open_block_store(self, election_id: str) -> BlockStore:
+        """Open (or create) the block log for an election."""
+        return BlockStore(os.path.join(self._election_dir(election_id), 'blocks'))
+    
+    def open_vote_journal(self, election_id: str) -> VoteJournal:
+        """Open (or create) the pending vote journal for an election."""
+        return VoteJournal(os.path.join(self._election_dir(election_id), 'votes.wal'))
+    
+    def build_manifest(self, election_id: str, voting_system: VotingSystem) -> Dict:
+        """Describe an election's name, settings, candidates and status."""
+        return {
+            'election_id': election_id,
+            'election_name': voting_system.election_name,
+            'difficulty': voting_system.blockchain.difficulty,
+            'mining_workers': voting_system.blockchain.workers,
+            'sealing_policy': voting_system.sealing_policy.to_dict(),
+            'is_active': voting_system.is_active,
+            'start_time': voting_system.start_time.isoformat() if voting_system.start_time else None,
+            'end_time': voting_system.end_time.isoformat() if voting_system.end_time else None,
+            'candidates': [c.to_dict() for c in voting_system.candidates.values()],
+            'created_at': voting_system.created_at
+        }
+    
+    def save_election(self, election_id: str, voting_system: VotingSystem):
+        """Atomically rewrite an election's manifest."""
+        manifest = self.build_manifest(election_id, voting_system)
+        directory = self._election_dir(election_id)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, 'election.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+    
+    def save_voter(self, voter: Voter):
+        """Durably append a voter, including their private key, to the voter roll."""
+        self.save_voters([voter])
+    
+    def save_voters(self, voters: List[Voter]):
+        """Durably append a batch of voters to the voter roll with a single fsync."""
+        lines = [json.dumps(dict(voter.to_dict(), private_key=voter.private_key)) + '\n'
+                 for voter in voters]
+        with open(self.voters_path, 'a') as f:
+            f.write(''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def load_voters(self) -> VoterRegistry:
+        """Read the voter roll, skipping a torn final line."""
+        voters = VoterRegistry()
+        if not os.path.exists(self.voters_path):
+            return voters
+        with open(self.voters_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                voters.add(Voter(record['voter_id'], record['name'],
+                                 record['email'], record['private_key']))
+        return voters
+    
+    def read_manifest(self, election_id: str) -> Dict:
+        """Read an election's saved manifest."""
+        with open(os.path.join(self._election_dir(election_id), 'election.json')) as f:
+            return json.load(f)
+    
+    def election_ids(self) -> List[str]:
+        """IDs of every stored election."""
+        return [name for name in os.listdir(self.elections_dir)
+                if os.path.exists(os.path.join(self._election_dir(name), 'election.json'))]
+    
+    def load_election(self, election_id: str, voters: VoterRegistry) -> VotingSystem:
+        """Rebuild one election from its manifest and block log."""
+        manifest = self.read_manifest(election_id)
+        
+        voting_system = VotingSystem(
+            manifest['election_name'],
+            difficulty=manifest['difficulty'],
+            mining_workers=manifest.get('mining_workers', 1),
+            sealing_policy=SealingPolicy(**manifest.get('sealing_policy', {})),
+            block_store=self.open_block_store(election_id),
+            vote_journal=self.open_vote_journal(election_id),
+            voter_registry=voters
+        )
+        voting_system.created_at = manifest['created_at']
+        # Votes in the chain or replayed from the journal mark their voters as having voted
+        blockchain = voting_system.blockchain
+        for transaction in blockchain.get_all_transactions() + blockchain.pending_transactions:
+            voting_system.mark_voted(transaction.voter_id)
+        
+        self.apply_manifest(voting_system, manifest)
+        if voting_system.is_active and voting_system.sealing_policy.is_enabled:
+            voting_system.sealer.start()
+        return voting_system
+    
+    def apply_manifest(self, voting_system: VotingSystem, manifest: Dict):
+        """Bring an election's candidates and status in line with a manifest."""
+        for candidate in manifest['candidates']:
+            if candidate['candidate_id'] not in voting_system.candidates:
+                voting_system.register_candidate(candidate['candidate_id'], candidate['name'],
+                                                 candidate['party'], candidate['description'])
+        if manifest['start_time']:
+            voting_system.start_time = datetime.fromisoformat(manifest['start_time'])
+        if manifest['end_time']:
+            voting_system.end_time = datetime.fromisoformat(manifest['end_time'])
+        voting_system.is_active = manifest['is_active']
+        voting_system.publish_snapshot()
+    
+    def load(self) -> Tuple[Dict[str, VotingSystem], VoterRegistry]:
+        """Rebuild every stored election, oldest first, and the shared voter roll."""
+        voters = self.load_voters()
+        elections = {}
+        loaded = [(eid, self.load_election(eid, voters)) for eid in self.election_ids()]
+        loaded.sort(key=lambda item: item[1].created_at)
+        for election_id, voting_system in loaded:
+            elections[election_id] = voting_system
+        return elections, voters
+    
+    def refresh(self, elections: Dict[str, VotingSystem], voters: VoterRegistry) -> Dict[str, VotingSystem]:
+        """
+        Bring in changes made by other processes sharing the store.
+        
+        The file layout is owned by a single process, so there is nothing to do.
+        """
+        return elections
+    
+    def save_current_election(self, election_id: str):
+        """Remember which election the web app has selected (not stored in the file layout)."""
+    
+    def load_current_election(self) -> Optional[str]:
+        return None
+    
+    def live_tally(self, election_id: str):
+        """Counts shared between processes; a single process reads its own snapshots instead."""
+        return None
+    
+    def close(self):
+        """Release anything the store holds open; the file layout holds nothing."""
+    
+    def __repr__(self):
+        return f"ElectionStore(data_dir={self.data_dir})"
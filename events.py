@@ -0,0 +1,140 @@
+"""
+Event hooks for the Blockchain-based Voting System.
+The core classes report what happens - votes accepted or rejected, blocks
+sealed, elections opening and closing - by emitting events instead of
+printing. Nothing is written to the console unless a subscriber such as
+``ConsoleLogger`` is attached.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Callable, Any, Optional
+
+
+EVENT_VOTE_ACCEPTED = 'vote_accepted'
+EVENT_VOTE_REJECTED = 'vote_rejected'
+EVENT_BLOCK_SEALED = 'block_sealed'
+EVENT_ELECTION_STARTED = 'election_started'
+EVENT_ELECTION_ENDED = 'election_ended'
+EVENT_VOTER_REGISTERED = 'voter_registered'
+EVENT_CANDIDATE_REGISTERED = 'candidate_registered'
+EVENT_NOTICE = 'notice'  # Anything else worth telling an operator, with a ``message``
+EVENT_SNAPSHOT_PUBLISHED = 'snapshot_published'  # An election's read-only view was replaced
+
+logger = logging.getLogger(__name__)
+
+
+class Event:
+    """One thing that happened: its name plus keyword data, readable as attributes."""
+    
+    __slots__ = ('name', 'data')
+    
+    def __init__(self, name: str, data: Dict[str, Any]):
+        self.name = name
+        self.data = data
+    
+    def __getattr__(self, key):
+        try:
+            return self.data[key]
+        except KeyError:
+            raise AttributeError(key) from None
+    
+    def __repr__(self):
+        return f"Event(name={self.name}, data={self.data})"
+
+
+class EventBus:
+    """
+    Delivers events to subscribed callbacks, synchronously on the emitting thread.
+    
+    Subscriber lists are copied on change, so ``emit`` reads them without
+    locking, and an event nobody listens to costs one dict lookup. A
+    subscriber that raises is logged and does not affect the caller or the
+    other subscribers.
+    """
+    
+    def __init__(self):
+        self._subscribers: Dict[Optional[str], List[Callable[[Event], None]]] = {}
+        self._lock = threading.Lock()
+    
+    def subscribe(self, callback: Callable[[Event], None], *names: str) -> Callable[[Event], None]:
+        """Call ``callback`` for the named events, or for every event if none are named."""
+        with self._lock:
+            subscribers = dict(self._subscribers)
+            for name in names or (None,):
+                subscribers[name] = subscribers.get(name, []) + [callback]
+            self._subscribers = subscribers
+        return callback
+    
+    def unsubscribe(self, callback: Callable[[Event], None]):
+        with self._lock:
+            self._subscribers = {name: [c for c in callbacks if c is not callback]
+                                 for name, callbacks in self._subscribers.items()}
+    
+    def has_subscribers(self, name: str) -> bool:
+        """Whether emitting ``name`` would reach anyone; lets callers skip building costly data."""
+        subscribers = self._subscribers
+        return bool(subscribers.get(name) or subscribers.get(None))
+    
+    def emit(self, name: str, **data):
+        subscribers = self._subscribers
+        callbacks = subscribers.get(name, []) + subscribers.get(None, [])
+        if not callbacks:
+            return
+        event = Event(name, data)
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Event subscriber failed on %s", name)
+    
+    def __repr__(self):
+        return f"EventBus(subscribers={sum(len(c) for c in self._subscribers.values())})"
+
+
+# Used by every election and blockchain that is not given a bus of its own
+default_bus = EventBus()
+
+
+class ConsoleLogger:
+    """
+    Subscriber that writes each event as a one-line message.
+    
+    ``write`` defaults to ``print``, giving the command-line tools their
+    familiar output; pass e.g. ``logging.getLogger('voting').info`` instead
+    to route events into logging.
+    """
+    
+    def __init__(self, write: Callable[[str], None] = print):
+        self.write = write
+    
+    def __call__(self, event: Event):
+        # Published after every change, including each vote; not news to an operator
+        if event.name == EVENT_SNAPSHOT_PUBLISHED:
+            return
+        self.write(self.format(event))
+    
+    @staticmethod
+    def format(event: Event) -> str:
+        if event.name == EVENT_VOTE_ACCEPTED:
+            return f"Vote cast successfully by {event.voter_name} for {event.candidate_name}"
+        if event.name == EVENT_VOTE_REJECTED:
+            return f"Error: {event.message}"
+        if event.name == EVENT_BLOCK_SEALED:
+            return f"Block mined: {event.block_hash}"
+        if event.name == EVENT_ELECTION_STARTED:
+            return f"Election '{event.election}' started at {event.start_time}"
+        if event.name == EVENT_ELECTION_ENDED:
+            return f"Election '{event.election}' ended at {event.end_time}"
+        if event.name == EVENT_VOTER_REGISTERED:
+            return f"Voter registered: {event.voter_name} (ID: {event.voter_id})"
+        if event.name == EVENT_CANDIDATE_REGISTERED:
+            return f"Candidate registered: {event.candidate_name} ({event.party})"
+        return event.data.get('message', event.name)
+
+
+def attach_console_logger(bus: EventBus = None, write: Callable[[str], None] = print) -> ConsoleLogger:
+    """Subscribe a ``ConsoleLogger`` to every event on ``bus`` (the default bus if omitted)."""
+    console = ConsoleLogger(write)
+    (bus or default_bus).subscribe(console)
+    return console
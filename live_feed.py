@@ -0,0 +1,180 @@
+"""
+Server-sent events feed of live election statistics for the Blockchain-based Voting System.
+A ``LiveFeed`` reads the election's state once per change, works out what
+changed and encodes it as one event-stream frame that every connected
+dashboard is sent as is, so the cost of an update does not grow with the
+number of clients.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Callable, Any, Optional, Iterator, Tuple
+
+
+# Minimum seconds between two updates; a burst of votes is sent as one delta
+FEED_INTERVAL = 0.25
+
+# Seconds of silence after which a comment is sent, so proxies keep the stream
+# open and a client that went away is noticed
+KEEPALIVE_INTERVAL = 15
+
+# Updates kept for clients that fall behind; one further back is sent the full state
+FEED_HISTORY = 64
+
+# Milliseconds a browser waits before reconnecting a dropped stream
+RECONNECT_DELAY = 2000
+
+# State keys that identify what a dashboard shows; a change sends the full state
+RESET_KEYS = ('election_id', 'candidates')
+
+# Dict-valued keys sent as only their changed entries, which clients merge
+# into what they hold; any other value, e.g. ``latest_block``, is sent whole
+MERGED_KEYS = ('results',)
+
+logger = logging.getLogger(__name__)
+
+
+def encode_event(name: str, data: Dict[str, Any], event_id: int) -> bytes:
+    """Encode one server-sent event."""
+    return f"id: {event_id}\nevent: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+def state_delta(previous: Optional[Dict[str, Any]], state: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Compare two states and return ``('snapshot', state)`` if the dashboard
+    must start over, ``('delta', changes)`` with only the changed values, or
+    None if nothing changed. The ``MERGED_KEYS`` dicts, i.e. per-candidate
+    results, are compared entry by entry, so a vote sends one candidate's
+    count; other changed values are sent in full.
+    """
+    if previous is None or any(previous.get(key) != state.get(key) for key in RESET_KEYS):
+        return 'snapshot', state
+    changes = {}
+    for key, value in state.items():
+        old = previous.get(key)
+        if key in MERGED_KEYS and isinstance(value, dict) and isinstance(old, dict):
+            changed = {k: v for k, v in value.items() if old.get(k) != v}
+            if changed:
+                changes[key] = changed
+        elif old != value:
+            changes[key] = value
+    return ('delta', changes) if changes else None
+
+
+class LiveFeed:
+    """
+    Pushes changes in a state dict to any number of event-stream clients.
+    
+    ``read_state`` is called on a single background thread when ``notify``
+    reports a change (at most once per ``interval``), and also every
+    ``poll_interval`` seconds if set, for changes made by other processes.
+    Each change is encoded once, appended to a short history and handed to
+    every client's stream, which sends the current state on connect and then
+    the deltas. Nothing is read while no client is connected. Each stream
+    holds a server thread while it is open, so ``connect`` turns clients
+    away past ``max_clients``.
+    """
+    
+    def __init__(self, read_state: Callable[[], Dict[str, Any]], interval: float = FEED_INTERVAL,
+                 poll_interval: Optional[float] = None, history: int = FEED_HISTORY,
+                 max_clients: Optional[int] = None):
+        self.read_state = read_state
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self.max_clients = max_clients
+        self._condition = threading.Condition()
+        self._frames: deque = deque(maxlen=history)  # (event id, encoded frame)
+        self._event_id = 0
+        self._state: Optional[Dict[str, Any]] = None
+        self._snapshot_frame = b''  # The current state in full, for new and lagging clients
+        self._clients = 0
+        self._changed = threading.Event()
+        self._publish_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def client_count(self) -> int:
+        return self._clients
+    
+    def notify(self, event=None):
+        """Report that the state may have changed; usable as an ``EventBus`` subscriber."""
+        if self._clients:
+            self._changed.set()
+    
+    def publish(self) -> bool:
+        """Read the state now and send any change to the clients; returns whether there was one."""
+        with self._publish_lock:
+            state = self.read_state()
+            change = state_delta(self._state, state)
+            if change is None:
+                return False
+            
+            name, data = change
+            with self._condition:
+                self._event_id += 1
+                self._state = state
+                self._snapshot_frame = encode_event('snapshot', state, self._event_id)
+                frame = self._snapshot_frame if name == 'snapshot' else encode_event(name, data, self._event_id)
+                self._frames.append((self._event_id, frame))
+                self._condition.notify_all()
+            return True
+    
+    def _run(self):
+        while True:
+            self._changed.wait(self.poll_interval)
+            self._changed.clear()
+            if not self._clients:
+                continue
+            try:
+                self.publish()
+            except Exception:
+                logger.exception("Live feed update failed")
+            time.sleep(self.interval)
+    
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+            self._thread.start()
+    
+    def _next_frames(self, last_id: int) -> Tuple[int, Optional[List[bytes]]]:
+        """Wait for frames after ``last_id``; None means send a keepalive."""
+        with self._condition:
+            if self._event_id == last_id:
+                self._condition.wait(KEEPALIVE_INTERVAL)
+            if self._event_id == last_id:
+                return last_id, None
+            if self._frames and self._frames[0][0] <= last_id + 1:
+                return self._event_id, [frame for event_id, frame in self._frames if event_id > last_id]
+            # Fell further behind than the history reaches; start over from the full state
+            return self._event_id, [self._snapshot_frame]
+    
+    def connect(self) -> Optional[Iterator[bytes]]:
+        """
+        Admit one client and return its event-stream frames: the current
+        state, then its changes. None if ``max_clients`` are already connected.
+        """
+        with self._condition:
+            if self.max_clients is not None and self._clients >= self.max_clients:
+                return None
+            self._clients += 1
+            self._start()
+        return self._stream()
+    
+    def _stream(self) -> Iterator[bytes]:
+        try:
+            self.publish()
+            with self._condition:
+                last_id, frame = self._event_id, self._snapshot_frame
+            yield f"retry: {RECONNECT_DELAY}\n\n".encode() + frame
+            while True:
+                last_id, frames = self._next_frames(last_id)
+                yield b''.join(frames) if frames else b': keepalive\n\n'
+        finally:
+            with self._condition:
+                self._clients -= 1
+    
+    def __repr__(self):
+        return f"LiveFeed(clients={self._clients}, events={self._event_id})"
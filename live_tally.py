@@ -0,0 +1,353 @@
+"""
+Live election tallies in shared memory.
+Worker processes serving the same SQLite database keep one small segment per
+election holding its current counts. Writers update it under the election's
+file lock after each committed vote or block; readers copy it without any
+lock, using a sequence counter to detect a concurrent update and retry.
+"""
+
+import hashlib
+import os
+import struct
+import sys
+import threading
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, so no shared tallies
+    fcntl = None
+
+
+# Segments hold at most this many candidates; larger elections fall back to per-process snapshots
+MAX_CANDIDATES = 256
+CANDIDATE_ID_BYTES = 32
+
+# seq, state, votes_cast, pending_count, blocks, candidate_count, latest_hash
+HEADER = struct.Struct('<QQQQQQ64s')
+ENTRY = struct.Struct(f'<{CANDIDATE_ID_BYTES}sQQ')  # candidate_id, votes, pending votes
+SEGMENT_SIZE = HEADER.size + ENTRY.size * MAX_CANDIDATES
+
+STATE_EMPTY = 0  # Created but not yet filled from the database
+STATE_CLEAN = 1
+STATE_DIRTY = 2  # A writer died or failed mid-update; rebuilt by the next writer
+STATE_OVERFLOW = 3  # Too many candidates, or an ID too long to store
+
+# SharedMemory accepts track=False from Python 3.13; before that segments are unregistered by hand
+UNTRACKED_SEGMENTS = sys.version_info >= (3, 13)
+
+# Seqlock reads retried this many times before giving up and using the snapshot
+READ_ATTEMPTS = 100
+
+
+def segment_name(instance: str, election_id: str) -> str:
+    """Shared memory name for one election of one database instance."""
+    digest = hashlib.sha1(f"{instance}:{election_id}".encode()).hexdigest()
+    return f"vt_{digest[:20]}"
+
+
+def shared_tallies_supported() -> bool:
+    """Whether this platform can share tallies between processes."""
+    return fcntl is not None
+
+
+def _open_segment(name: str, create: bool) -> shared_memory.SharedMemory:
+    """
+    Open a segment without the resource tracker, which would otherwise unlink
+    it when the first worker exits while the others still use it.
+    """
+    size = SEGMENT_SIZE if create else 0
+    if UNTRACKED_SEGMENTS:
+        return shared_memory.SharedMemory(name, create=create, size=size, track=False)
+    segment = shared_memory.SharedMemory(name, create=create, size=size)
+    resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+class TallyCounts:
+    """One consistent reading of an election's live counts."""
+    
+    __slots__ = ('results', 'pending_results', 'votes_cast', 'pending_count', 'blocks', 'latest_hash')
+    
+    def __init__(self, results: Dict[str, int], pending_results: Dict[str, int], votes_cast: int,
+                 pending_count: int, blocks: int, latest_hash: str):
+        self.results = results
+        self.pending_results = pending_results
+        self.votes_cast = votes_cast
+        self.pending_count = pending_count
+        self.blocks = blocks
+        self.latest_hash = latest_hash
+    
+    def __repr__(self):
+        return (f"TallyCounts(votes_cast={self.votes_cast}, pending_count={self.pending_count}, "
+                f"blocks={self.blocks})")
+
+
+class TallyDelta:
+    """Changes made by one database write transaction, applied once it commits."""
+    
+    def __init__(self):
+        self.results: Dict[str, int] = {}
+        self.pending_results: Dict[str, int] = {}
+        self.blocks = 0
+        self.latest_hash: Optional[str] = None
+    
+    def vote_queued(self, candidate_id: str):
+        self.pending_results[candidate_id] = self.pending_results.get(candidate_id, 0) + 1
+    
+    def vote_mined(self, candidate_id: str, was_pending: bool):
+        self.results[candidate_id] = self.results.get(candidate_id, 0) + 1
+        if was_pending:
+            self.pending_results[candidate_id] = self.pending_results.get(candidate_id, 0) - 1
+    
+    def block_stored(self, height: int, block_hash: str):
+        self.blocks = height + 1
+        self.latest_hash = block_hash
+    
+    def clear(self):
+        """Forget the changes, e.g. after the transaction rolled back."""
+        self.__init__()
+    
+    def __bool__(self):
+        return bool(self.results or self.pending_results or self.latest_hash)
+
+
+class SharedTally:
+    """
+    One election's counts in a shared memory segment.
+    
+    ``read`` never blocks: it copies the segment between two reads of the
+    sequence counter and retries if a writer bumped it meanwhile. Writers go
+    through ``update``, which serializes them across processes with a file
+    lock and applies a transaction's ``TallyDelta`` only after it commits.
+    ``loader`` rebuilds the counts from the database; it is called under
+    the lock when the segment is new or was left dirty.
+    """
+    
+    def __init__(self, name: str, lock_path: str, loader: Callable[[], TallyCounts]):
+        self.name = name
+        self.lock_path = lock_path
+        self.loader = loader
+        self._segment: Optional[shared_memory.SharedMemory] = None
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._pid = None
+    
+    @contextmanager
+    def _locked(self) -> Iterator[memoryview]:
+        """Hold the writer lock, across threads and processes, and yield the segment buffer."""
+        with self._lock:
+            # A lock file inherited across fork() shares its lock with the parent, so reopen it
+            if self._pid != os.getpid():
+                self._lock_file = open(self.lock_path, 'a+b')
+                self._pid = os.getpid()
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                buffer = self._attach()
+                if HEADER.unpack_from(buffer)[1] in (STATE_EMPTY, STATE_DIRTY):
+                    self._write(buffer, self.loader())
+                yield buffer
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+    
+    def _attach(self) -> memoryview:
+        if self._segment is None:
+            try:
+                self._segment = _open_segment(self.name, create=True)
+            except FileExistsError:
+                self._segment = _open_segment(self.name, create=False)
+        return self._segment.buf
+    
+    def read(self) -> Optional[TallyCounts]:
+        """The current counts, or None if the segment cannot be used yet."""
+        buffer = self._attach()
+        if HEADER.unpack_from(buffer)[1] == STATE_EMPTY:
+            # Nobody has filled it since it was created; do it now
+            with self._locked() as buffer:
+                pass
+        
+        for _ in range(READ_ATTEMPTS):
+            seq = HEADER.unpack_from(buffer)[0]
+            if seq & 1:
+                continue
+            data = bytes(buffer)
+            if HEADER.unpack_from(buffer)[0] == seq:
+                return self._decode(data)
+        return None
+    
+    @staticmethod
+    def _decode(data: bytes) -> Optional[TallyCounts]:
+        _, state, votes_cast, pending_count, blocks, candidate_count, latest_hash = HEADER.unpack_from(data)
+        if state in (STATE_EMPTY, STATE_OVERFLOW):
+            return None
+        results = {}
+        pending_results = {}
+        for position in range(candidate_count):
+            candidate_id, votes, pending = ENTRY.unpack_from(data, HEADER.size + position * ENTRY.size)
+            candidate_id = candidate_id.rstrip(b'\0').decode()
+            results[candidate_id] = votes
+            pending_results[candidate_id] = pending
+        return TallyCounts(results, pending_results, votes_cast, pending_count, blocks,
+                           latest_hash.rstrip(b'\0').decode())
+    
+    @staticmethod
+    def _write(buffer: memoryview, counts: TallyCounts, state: int = STATE_CLEAN):
+        """Replace the segment's contents; the caller holds the writer lock."""
+        candidate_ids = list(dict.fromkeys([*counts.results, *counts.pending_results]))
+        encoded = [cid.encode() for cid in candidate_ids]
+        if len(encoded) > MAX_CANDIDATES or any(len(cid) > CANDIDATE_ID_BYTES for cid in encoded):
+            state = STATE_OVERFLOW
+            encoded = []
+        
+        seq = HEADER.unpack_from(buffer)[0]
+        HEADER.pack_into(buffer, 0, seq + 1, state, 0, 0, 0, 0, b'')
+        for position, (candidate_id, encoded_id) in enumerate(zip(candidate_ids, encoded)):
+            ENTRY.pack_into(buffer, HEADER.size + position * ENTRY.size, encoded_id,
+                            counts.results.get(candidate_id, 0), counts.pending_results.get(candidate_id, 0))
+        HEADER.pack_into(buffer, 0, seq + 2, state, counts.votes_cast, counts.pending_count,
+                         counts.blocks, len(encoded), counts.latest_hash.encode())
+    
+    @contextmanager
+    def update(self) -> Iterator[TallyDelta]:
+        """
+        Run one database write transaction and apply its changes to the segment.
+        
+        The segment is marked dirty for the duration, so if this process dies
+        or the transaction fails after recording changes, the next writer
+        rebuilds the counts from the database rather than trusting them.
+        """
+        with self._locked() as buffer:
+            if HEADER.unpack_from(buffer)[1] == STATE_OVERFLOW:
+                yield TallyDelta()
+                return
+            self._set_state(buffer, STATE_DIRTY)
+            
+            delta = TallyDelta()
+            try:
+                yield delta
+            except BaseException:
+                if not delta:
+                    self._set_state(buffer, STATE_CLEAN)
+                raise
+            self._apply(buffer, delta)
+    
+    @staticmethod
+    def _set_state(buffer: memoryview, state: int):
+        fields = list(HEADER.unpack_from(buffer))
+        fields[1] = state
+        HEADER.pack_into(buffer, 0, *fields)
+    
+    def _apply(self, buffer: memoryview, delta: TallyDelta):
+        counts = self._decode(bytes(buffer))
+        for candidate_id, change in delta.results.items():
+            counts.results[candidate_id] = counts.results.get(candidate_id, 0) + change
+            counts.votes_cast += change
+        for candidate_id, change in delta.pending_results.items():
+            counts.pending_results[candidate_id] = counts.pending_results.get(candidate_id, 0) + change
+            counts.pending_count += change
+        if delta.latest_hash is not None and delta.blocks > counts.blocks:
+            counts.blocks = delta.blocks
+            counts.latest_hash = delta.latest_hash
+        self._write(buffer, counts)
+    
+    def close(self):
+        """Detach from the segment and drop this process's handle on the lock file."""
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            if self._lock_file is not None and self._pid == os.getpid():
+                self._lock_file.close()
+            self._lock_file = None
+            self._pid = None
+    
+    def unlink(self):
+        """
+        Remove the segment and its lock file; processes that still have the
+        segment open keep their mapping.
+        """
+        self.close()
+        try:
+            os.remove(self.lock_path)
+        except FileNotFoundError:
+            pass
+        try:
+            segment = _open_segment(self.name, create=False)
+        except FileNotFoundError:
+            return
+        segment.close()
+        if not UNTRACKED_SEGMENTS:
+            # unlink() unregisters the segment again, so give the tracker something to remove
+            resource_tracker.register(segment._name, 'shared_memory')
+        segment.unlink()
+    
+    def __repr__(self):
+        return f"SharedTally(name={self.name})"
+
+
+class TallyUsers:
+    """
+    The processes using one database's shared tallies.
+    
+    Each holds a shared lock on one file from its first use of a tally until
+    it leaves, so the last to leave can tell and remove the segments, which
+    would otherwise outlive every process, and then the file itself. A
+    process that joins while the last one is removing them waits until it is
+    done and then starts afresh on a new file.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def join(self):
+        """Mark this process as a user; cheap once it is one."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            # A file inherited across fork() shares its lock with the parent, so open our own
+            while self._pid != os.getpid():
+                lock_file = open(self.path, 'a+b')
+                fcntl.flock(lock_file, fcntl.LOCK_SH)
+                if self._is_current(lock_file):
+                    self._file = lock_file
+                    self._pid = os.getpid()
+                else:
+                    # The last user removed the file while we waited; lock the new one
+                    lock_file.close()
+    
+    @contextmanager
+    def leave(self) -> Iterator[bool]:
+        """
+        Stop using the tallies, yielding whether no other process still does.
+        While True is yielded, no process can start using them.
+        """
+        with self._lock:
+            lock_file = self._file if self._pid == os.getpid() else open(self.path, 'a+b')
+            self._file = None
+            self._pid = None
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                last = True
+            except BlockingIOError:
+                last = False
+            try:
+                yield last
+                if last and self._is_current(lock_file):
+                    os.unlink(self.path)
+            finally:
+                lock_file.close()
+    
+    def _is_current(self, lock_file) -> bool:
+        """Whether ``lock_file`` is still the file at ``path``."""
+        try:
+            return os.path.samestat(os.fstat(lock_file.fileno()), os.stat(self.path))
+        except FileNotFoundError:
+            return False
+    
+    def __repr__(self):
+        return f"TallyUsers(path={self.path})"
@@ -0,0 +1,553 @@
+"""
+HTTP load generator and soak test for the voting web app.
+Starts the app (under gunicorn when installed, sharing a temporary SQLite
+database between workers) or targets a running one, registers a synthetic
+voter roll, then drives a mix of voting and read traffic from many
+concurrent clients while blocks are sealed. Reports throughput, latency
+percentiles and errors per route, and afterwards checks the chain against
+the votes the clients saw accepted.
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from itertools import islice
+from typing import Dict, List, Tuple, Optional
+from urllib.parse import urlsplit
+from create_sample_data import SyntheticElection, CANDIDATE_DISTRIBUTIONS, GENERATOR_CHUNK_SIZE
+
+
+# Routes the clients exercise: name -> (method, path)
+ROUTES = {
+    'cast_vote': ('POST', '/api/cast-vote'),
+    'results': ('GET', '/results'),
+    'stats': ('GET', '/api/stats'),
+    'blockchain': ('GET', '/api/blockchain-data?order=desc&limit=10'),
+}
+
+DEFAULT_MIX = 'cast_vote=60,results=15,stats=15,blockchain=10'
+
+# Voters sent per /api/import-voters request while registering the roll
+IMPORT_BATCH_SIZE = 5 * GENERATOR_CHUNK_SIZE
+
+REQUEST_TIMEOUT = 30.0
+SERVER_START_TIMEOUT = 30.0
+DRAIN_TIMEOUT = 120.0
+
+PERCENTILES = (50, 95, 99)
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse ``route=weight,...`` into weights by route name."""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ROUTES:
+            raise ValueError(f"Unknown route '{name}'; choose from {', '.join(ROUTES)}")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("The traffic mix needs at least one route with a positive weight")
+    return weights
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class AppServer:
+    """
+    The web app in a child process, on a temporary database that is removed on stop.
+    
+    Uses gunicorn with ``workers`` processes when it is installed; otherwise
+    Flask's threaded development server, which runs a single process.
+    """
+    
+    def __init__(self, workers: int = 4, threads: int = 8):
+        self.workers = workers
+        self.threads = threads
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.directory = tempfile.mkdtemp(prefix='voting-load-')
+        self.database = os.path.join(self.directory, 'voting.db')
+        self.uses_gunicorn = importlib.util.find_spec('gunicorn') is not None
+        self.process: Optional[subprocess.Popen] = None
+    
+    def describe(self) -> str:
+        if self.uses_gunicorn:
+            return f"gunicorn, {self.workers} workers x {self.threads} threads"
+        return "Flask development server (gunicorn not installed), 1 process"
+    
+    def start(self):
+        env = dict(os.environ, VOTING_DATABASE=self.database, PORT=str(self.port),
+                   HOST='127.0.0.1', DEBUG='False')
+        if self.uses_gunicorn:
+            command = [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f'127.0.0.1:{self.port}',
+                       '--workers', str(self.workers), '--threads', str(self.threads), '--log-level', 'warning']
+        else:
+            command = [sys.executable, 'app.py']
+        self.process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"The app exited with status {self.process.returncode} on startup")
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError(f"The app did not accept connections within {SERVER_START_TIMEOUT:.0f}s")
+    
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self._unlink_live_tallies()
+        shutil.rmtree(self.directory, ignore_errors=True)
+    
+    def _unlink_live_tallies(self):
+        """Remove shared tallies left behind by a worker that was killed before it could exit cleanly."""
+        if not os.path.exists(self.database):
+            return
+        from sqlite_store import SQLiteElectionStore
+        # With every worker gone, closing the store is the last use and removes them
+        SQLiteElectionStore(self.database).close()
+
+
+class Client:
+    """One keep-alive HTTP connection to the app."""
+    
+    def __init__(self, url: str, timeout: float = REQUEST_TIMEOUT):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.connection = None
+    
+    def request(self, method: str, path: str, body=None, content_type: str = 'application/json') -> Tuple[int, bytes]:
+        """Send one request and return its status and body; reconnects after a dropped connection."""
+        headers = {}
+        if body is not None:
+            if not isinstance(body, (bytes, str)):
+                body = json.dumps(body)
+            headers['Content-Type'] = content_type
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, self.prefix + path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # A keep-alive connection the server closed while idle; retrying cannot double a vote
+                self.close()
+                if attempt:
+                    raise
+            except Exception:
+                self.close()
+                raise
+    
+    def json(self, method: str, path: str, body=None) -> Dict:
+        status, data = self.request(method, path, body)
+        if status != 200:
+            raise RuntimeError(f"{method} {path} returned HTTP {status}")
+        return json.loads(data)
+    
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class RouteStats:
+    """Latencies and outcomes of one route, as recorded by one client thread."""
+    
+    __slots__ = ('latencies', 'errors')
+    
+    def __init__(self):
+        self.latencies = array('d')
+        self.errors: Dict[str, int] = {}
+    
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+class LoadTest:
+    """
+    Sets up a synthetic election on the app and drives traffic at it.
+    
+    Every accepted vote is remembered with its candidate, every refused one
+    by reason, and votes whose outcome the client never learned (timeouts,
+    server errors) as unknown. A fraction of requests re-send an already
+    accepted ballot, which the app must refuse. ``verify`` then closes the
+    election, waits for the last block and reads the whole chain back.
+    """
+    
+    def __init__(self, url: str, election: SyntheticElection, mix: Dict[str, float], clients: int,
+                 duration: float, rate: float = None, revote_fraction: float = 0.01,
+                 seal_max_votes: int = 500, seal_max_seconds: float = 1.0, difficulty: int = 2,
+                 report_interval: float = 5.0):
+        self.url = url
+        self.election = election
+        self.mix = mix
+        self.clients = clients
+        self.duration = duration
+        self.rate = rate
+        self.revote_fraction = revote_fraction
+        self.seal_max_votes = seal_max_votes
+        self.seal_max_seconds = seal_max_seconds
+        self.difficulty = difficulty
+        self.report_interval = report_interval
+        
+        self.election_id = None
+        self.stats: List[Dict[str, RouteStats]] = []
+        self.accepted: Dict[str, str] = {}  # voter_id -> candidate_id
+        self._accepted_order: List[str] = []  # The same voters, to pick re-sent ballots from
+        self.refused: Dict[str, int] = {}
+        self.unknown: Dict[str, str] = {}  # voter_id -> candidate_id
+        self.revotes_accepted = 0
+        self.elapsed = 0.0
+        self._ballots = None
+        self._ballot_lock = threading.Lock()
+        self._outcome_lock = threading.Lock()
+        self._completed = 0
+    
+    # Setup
+    
+    def setup(self):
+        """Create and start the election, with its candidates and voter roll."""
+        client = Client(self.url)
+        election = self.election
+        created = client.json('POST', '/api/create-election', {
+            'election_name': election.name, 'difficulty': self.difficulty,
+            'seal_max_votes': self.seal_max_votes, 'seal_max_seconds': self.seal_max_seconds})
+        if not created.get('success'):
+            raise RuntimeError(f"Could not create the election: {created.get('message')}")
+        self.election_id = created['election_id']
+        
+        for candidate in election.iter_candidates():
+            client.json('POST', '/api/register-candidate', {
+                'candidate_id': candidate.candidate_id, 'name': candidate.name,
+                'party': candidate.party, 'description': candidate.description})
+        
+        # The roll carries the generated keys, so the clients know every voter's credentials
+        imported = rejected = 0
+        voters = election.iter_voters()
+        while True:
+            batch = list(islice(voters, IMPORT_BATCH_SIZE))
+            if not batch:
+                break
+            body = ''.join(json.dumps({'voter_id': v.voter_id, 'name': v.name, 'email': v.email,
+                                       'private_key': v.private_key}) + '\n' for v in batch)
+            status, data = client.request('POST', '/api/import-voters?format=ndjson', body,
+                                          content_type='application/x-ndjson')
+            if status != 200:
+                raise RuntimeError(f"Importing voters returned HTTP {status}")
+            summary = json.loads(data.splitlines()[-1])['summary']
+            imported += summary['imported']
+            rejected += summary['rejected']
+        
+        started = client.json('POST', '/api/start-election')
+        if not started.get('success'):
+            raise RuntimeError(f"Could not start the election: {started.get('message')}")
+        client.close()
+        self._ballots = (ballot for chunk in election.iter_ballot_chunks() for ballot in chunk)
+        return {'candidates': election.candidates, 'voters_imported': imported,
+                'voters_already_registered': rejected}
+    
+    # Traffic
+    
+    def _next_ballot(self) -> Optional[Tuple[str, str, str, float]]:
+        with self._ballot_lock:
+            return next(self._ballots, None)
+    
+    def _cast_vote(self, client: Client, route: RouteStats, rng: random.Random, scheduled: float):
+        revote = None
+        if self._accepted_order and rng.random() < self.revote_fraction:
+            voter_id = rng.choice(self._accepted_order)
+            revote = (voter_id, self.accepted[voter_id], self.election.private_key(voter_id))
+        ballot = revote or self._next_ballot()
+        if ballot is None:
+            return False
+        voter_id, candidate_id, private_key = ballot[:3]
+        
+        try:
+            status, data = client.request('POST', '/api/cast-vote', {
+                'voter_id': voter_id, 'candidate_id': candidate_id, 'private_key': private_key})
+        except Exception as e:
+            route.error(type(e).__name__)
+            status, data = None, None
+        route.latencies.append(time.perf_counter() - scheduled)
+        
+        outcome = json.loads(data) if status == 200 else None
+        with self._outcome_lock:
+            if outcome is None:
+                if status is not None:
+                    route.error(f"http_{status}")
+                if not revote:
+                    self.unknown[voter_id] = candidate_id
+            elif outcome.get('success'):
+                if revote:
+                    self.revotes_accepted += 1
+                else:
+                    self.accepted[voter_id] = candidate_id
+                    self._accepted_order.append(voter_id)
+            else:
+                reason = outcome.get('status', 'failed')
+                self.refused[reason] = self.refused.get(reason, 0) + 1
+                if not revote:
+                    route.error(reason)
+        return True
+    
+    def _read(self, client: Client, name: str, route: RouteStats, scheduled: float):
+        method, path = ROUTES[name]
+        try:
+            status, _ = client.request(method, path)
+            if status != 200:
+                route.error(f"http_{status}")
+        except Exception as e:
+            route.error(type(e).__name__)
+        route.latencies.append(time.perf_counter() - scheduled)
+    
+    def _run_client(self, number: int, deadline: float, stats: Dict[str, RouteStats]):
+        client = Client(self.url)
+        rng = random.Random(f"load:{self.election.seed}:{number}")
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        interval = self.clients / self.rate if self.rate else 0.0
+        scheduled = time.perf_counter() + rng.random() * interval
+        while True:
+            if interval:
+                # Open loop: latency counts from the scheduled start, so a backed-up server is not hidden
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+            if scheduled >= deadline:
+                break
+            
+            name = rng.choices(names, weights)[0]
+            if name == 'cast_vote':
+                if not self._cast_vote(client, stats[name], rng, scheduled):
+                    # Every voter has voted; keep going with the read traffic only
+                    weights[names.index(name)] = 0
+                    if not any(weights):
+                        break
+                    continue
+            else:
+                self._read(client, name, stats[name], scheduled)
+            self._completed += 1
+            scheduled += interval
+        client.close()
+    
+    def run(self):
+        """Drive traffic for ``duration`` seconds, printing progress every ``report_interval``."""
+        self.stats = [{name: RouteStats() for name in self.mix} for _ in range(self.clients)]
+        started = time.perf_counter()
+        deadline = started + self.duration
+        threads = [threading.Thread(target=self._run_client, args=(number, deadline, self.stats[number]),
+                                    daemon=True) for number in range(self.clients)]
+        for thread in threads:
+            thread.start()
+        
+        last_completed, last_time = 0, started
+        while True:
+            alive = [thread for thread in threads if thread.is_alive()]
+            if not alive:
+                break
+            alive[0].join(max(0.0, last_time + self.report_interval - time.perf_counter()))
+            now = time.perf_counter()
+            if now - last_time >= self.report_interval:
+                completed = self._completed
+                print(f"  {now - started:7.1f}s  {(completed - last_completed) / (now - last_time):9,.1f} req/s  "
+                      f"{len(self.accepted):,} votes accepted  {sum(self.refused.values()):,} refused  "
+                      f"{len(self.unknown):,} unknown")
+                last_completed, last_time = completed, now
+        self.elapsed = time.perf_counter() - started
+    
+    # Results
+    
+    def route_summary(self) -> List[Dict]:
+        rows = []
+        for name in self.mix:
+            latencies = sorted(value for stats in self.stats for value in stats[name].latencies)
+            errors: Dict[str, int] = {}
+            for stats in self.stats:
+                for kind, count in stats[name].errors.items():
+                    errors[kind] = errors.get(kind, 0) + count
+            row = {'route': name, 'requests': len(latencies),
+                   'throughput': len(latencies) / self.elapsed if self.elapsed else 0.0,
+                   'errors': errors}
+            for pct in PERCENTILES:
+                row[f'p{pct}_ms'] = percentile(latencies, pct) * 1000
+            rows.append(row)
+        return rows
+    
+    def verify(self) -> Dict:
+        """
+        End the election, wait for every vote to be sealed and compare the chain
+        with what the clients saw.
+        
+        Votes the app accepted must each be in the chain once, for the right
+        candidate; no voter may appear twice; and any vote in the chain the
+        clients did not see accepted must be one whose response was lost.
+        """
+        client = Client(self.url)
+        client.json('POST', '/api/end-election')
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        while True:
+            stats = client.json('GET', '/api/stats')['stats']
+            if not stats['pending_votes'] or time.monotonic() > deadline:
+                break
+            # The worker that ended the election may not hold every pending vote
+            client.request('POST', '/api/mine-votes')
+            time.sleep(0.5)
+        
+        chained: Dict[str, str] = {}
+        duplicates = 0
+        status, body = client.request('GET', '/api/blockchain-data/stream')
+        if status != 200:
+            raise RuntimeError(f"Reading the chain returned HTTP {status}")
+        for line in body.splitlines():
+            for transaction in json.loads(line)['transactions']:
+                voter_id = transaction['voter_id']
+                if voter_id in chained:
+                    duplicates += 1
+                chained[voter_id] = transaction['candidate_id']
+        deep_valid = client.json('GET', '/api/verify-blockchain?deep=true')['is_valid']
+        stats = client.json('GET', '/api/stats')['stats']
+        client.close()
+        
+        lost = [voter_id for voter_id in self.accepted if voter_id not in chained]
+        wrong_candidate = [voter_id for voter_id, candidate_id in self.accepted.items()
+                           if voter_id in chained and chained[voter_id] != candidate_id]
+        unexpected = [voter_id for voter_id in chained
+                      if voter_id not in self.accepted and voter_id not in self.unknown]
+        report = {
+            'accepted': len(self.accepted),
+            'chained': len(chained),
+            'unknown_outcome': len(self.unknown),
+            'unknown_in_chain': sum(1 for voter_id in self.unknown if voter_id in chained),
+            'still_pending': stats['pending_votes'],
+            'votes_cast_reported': stats['votes_cast'],
+            'lost': len(lost),
+            'double_counted': duplicates,
+            'wrong_candidate': len(wrong_candidate),
+            'unexpected': len(unexpected),
+            'revotes_accepted': self.revotes_accepted,
+            'chain_valid': deep_valid,
+        }
+        report['passed'] = (not lost and not duplicates and not wrong_candidate and not unexpected
+                            and not self.revotes_accepted and not stats['pending_votes'] and deep_valid
+                            and stats['votes_cast'] == len(chained) + duplicates)
+        return report
+
+
+def print_report(rows: List[Dict], elapsed: float, verification: Dict):
+    print(f"\n{'Route':<12} {'Requests':>10} {'Req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  Errors")
+    print("-" * 80)
+    for row in rows:
+        errors = ', '.join(f"{kind}={count:,}" for kind, count in sorted(row['errors'].items())) or '-'
+        print(f"{row['route']:<12} {row['requests']:>10,} {row['throughput']:>10,.1f} {row['p50_ms']:>9.1f} "
+              f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}  {errors}")
+    total = sum(row['requests'] for row in rows)
+    print(f"{'total':<12} {total:>10,} {total / elapsed if elapsed else 0:>10,.1f}")
+    
+    print("\nVote accounting")
+    for key, value in verification.items():
+        if key != 'passed':
+            print(f"  {key.replace('_', ' '):<24} {value:,}" if isinstance(value, int) and not isinstance(value, bool)
+                  else f"  {key.replace('_', ' '):<24} {value}")
+    print(f"\n{'✓ No votes lost or double-counted' if verification['passed'] else '✗ Vote accounting FAILED'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and soak test the voting web app")
+    parser.add_argument('--url', help="Test a running app instead of starting one (it gets a new election)")
+    parser.add_argument('--workers', type=int, default=4, help="gunicorn worker processes for the started app")
+    parser.add_argument('--threads', type=int, default=8, help="Threads per gunicorn worker")
+    parser.add_argument('--voters', type=int, default=50000, help="Voters registered; each votes at most once")
+    parser.add_argument('--candidates', type=int, default=10, help="Candidates on the ballot")
+    parser.add_argument('--distribution', choices=CANDIDATE_DISTRIBUTIONS, default='zipf',
+                        help="How votes spread over candidates")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the voter roll and ballots")
+    parser.add_argument('--clients', type=int, default=32, help="Concurrent client connections")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds of traffic; raise for a soak test")
+    parser.add_argument('--rate', type=float,
+                        help="Target requests/second across all clients (default: as fast as the app answers)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Route weights (default: {DEFAULT_MIX})")
+    parser.add_argument('--revote-fraction', type=float, default=0.01,
+                        help="Share of votes that re-send an accepted ballot, which must be refused")
+    parser.add_argument('--difficulty', type=int, default=2, help="Mining difficulty of the election")
+    parser.add_argument('--seal-max-votes', type=int, default=500, help="Seal a block once this many votes wait")
+    parser.add_argument('--seal-max-seconds', type=float, default=1.0, help="Seal a block once a vote waited this long")
+    parser.add_argument('--report-interval', type=float, default=5.0, help="Seconds between progress lines")
+    parser.add_argument('--output', help="Write the report to this JSON file")
+    args = parser.parse_args()
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    server = None if args.url else AppServer(args.workers, args.threads)
+    try:
+        if server:
+            server.start()
+            print(f"Started the app at {server.url} ({server.describe()})")
+        election = SyntheticElection(args.voters, args.candidates, turnout=1.0, distribution=args.distribution,
+                                     seed=args.seed, name=f"Load test {time.strftime('%Y-%m-%d %H:%M:%S')}")
+        test = LoadTest(args.url or server.url, election, mix, args.clients, args.duration, args.rate,
+                        args.revote_fraction, args.seal_max_votes, args.seal_max_seconds, args.difficulty,
+                        args.report_interval)
+        setup = test.setup()
+        print(f"Election {test.election_id}: {setup['candidates']:,} candidates, "
+              f"{setup['voters_imported']:,} voters imported ({setup['voters_already_registered']:,} already registered)")
+        print(f"Driving {args.clients} clients for {args.duration:.0f}s"
+              + (f" at {args.rate:,.0f} req/s" if args.rate else "") + "...")
+        test.run()
+        rows = test.route_summary()
+        verification = test.verify()
+    finally:
+        if server:
+            server.stop()
+    
+    print_report(rows, test.elapsed, verification)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'server': server.describe() if server else args.url,
+                       'elapsed_seconds': test.elapsed, 'routes': rows, 'verification': verification}, f, indent=2)
+        print(f"Report written to {args.output}")
+    sys.exit(0 if verification['passed'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,7 @@ Provides a command-line interface for both administrators and voters.
 
 import sys
 from voting_system import VotingSystem
+from events import attach_console_logger
 
 
 class VotingApp:
@@ -239,7 +240,7 @@ class VotingApp:
             voter = self.system.voters[voter_id]
             print(f"\nVoter: {voter.name}")
             print(f"Email: {voter.email}")
-            print(f"Voting Status: {'✓ Voted' if voter.has_voted else '✗ Not voted yet'}")
+            print(f"Voting Status: {'✓ Voted' if self.system.has_voted(voter_id) else '✗ Not voted yet'}")
         else:
             print("\nVoter not found.")
     
@@ -258,7 +259,7 @@ class VotingApp:
             return
         
         print("\n--- Blockchain Integrity Check ---")
-        self.system.verify_blockchain_integrity()
+        self.system.verify_blockchain_integrity(deep=True)
     
     def view_statistics(self):
         """View election statistics."""
@@ -318,6 +319,8 @@ class VotingApp:
 
 def main():
     """Main entry point."""
+    # Show vote, election and mining messages from the voting system on the console
+    attach_console_logger()
     app = VotingApp()
     app.run()
 
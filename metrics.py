@@ -0,0 +1,244 @@
+"""
+Instrumentation for the Blockchain-based Voting System.
+Counters, gauges and histograms kept in process memory and rendered in the
+Prometheus text exposition format by the web app's /metrics endpoint.
+Set VOTING_METRICS=0 to turn recording into a single flag check.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import Dict, List, Tuple, Callable, Iterator, Optional
+
+
+ENABLED = os.environ.get('VOTING_METRICS', '1') != '0'
+
+# Upper bounds (seconds) for latency histograms
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Nonce attempts grow 16x with each difficulty level
+NONCE_BUCKETS = tuple(16 ** exponent for exponent in range(1, 9))
+
+
+def set_enabled(enabled: bool):
+    """Turn recording on or off for the whole process."""
+    global ENABLED
+    ENABLED = enabled
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    """Base class: a named family of samples, one per combination of label values."""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+    
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield ``(suffix, labels, value)`` for every sample of the family."""
+        raise NotImplementedError
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+    
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+    
+    def __repr__(self):
+        return f"{type(self).__name__}(name={self.name})"
+
+
+class Counter(Metric):
+    """A value that only goes up, e.g. ballots processed."""
+    
+    kind = 'counter'
+    
+    def inc(self, *label_values, amount: float = 1):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0)
+    
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in sorted(values):
+            yield '_total', _format_labels(self.labels, label_values), value
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down, e.g. mempool depth.
+    
+    Either ``set`` it as things change or give it a function that is called
+    at scrape time and returns the value, or a dict of label values to value.
+    """
+    
+    kind = 'gauge'
+    
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._function: Optional[Callable[[], object]] = None
+    
+    def set(self, value: float, *label_values):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[label_values] = value
+    
+    def set_function(self, function: Callable[[], object]):
+        self._function = function
+    
+    def samples(self):
+        if self._function is not None:
+            values = self._function()
+            values = values.items() if isinstance(values, dict) else [((), values)]
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        for label_values, value in sorted(values):
+            yield '', _format_labels(self.labels, label_values), value
+
+
+class Histogram(Metric):
+    """Distribution of observed values in fixed buckets, with their sum and count."""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, *label_values):
+        if not ENABLED:
+            return
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), then sum
+                series = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[position] += 1
+            series[-1] += value
+    
+    @contextmanager
+    def time(self, *label_values):
+        """Observe the duration of the ``with`` block."""
+        if not ENABLED:
+            yield
+            return
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - started, *label_values)
+    
+    def count(self, *label_values) -> int:
+        series = self._values.get(label_values)
+        return sum(series[:-1]) if series else 0
+    
+    def samples(self):
+        with self._lock:
+            values = [(label_values, list(series)) for label_values, series in self._values.items()]
+        for label_values, series in sorted(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield '_bucket', _format_labels(self.labels, label_values, le), cumulative
+            labels = _format_labels(self.labels, label_values)
+            yield '_sum', labels, series[-1]
+            yield '_count', labels, cumulative
+
+
+def timed(histogram: Histogram):
+    """Decorator observing each call's duration in ``histogram``."""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+class Registry:
+    """The metrics exposed by one process."""
+    
+    def __init__(self):
+        self.metrics: List[Metric] = []
+    
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+    
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+VOTES = REGISTRY.register(Counter(
+    'voting_votes', 'Ballots processed, by outcome (accepted or the rejection reason)', ('outcome',)))
+CAST_VOTE_SECONDS = REGISTRY.register(Histogram(
+    'voting_cast_vote_seconds', 'Time to validate, journal and queue one vote'))
+MEMPOOL_DEPTH = REGISTRY.register(Gauge(
+    'voting_mempool_depth', 'Votes waiting to be mined', ('election',)))
+MINING_SECONDS = REGISTRY.register(Histogram(
+    'voting_block_mining_seconds', 'Proof-of-work search time per block'))
+NONCE_ATTEMPTS = REGISTRY.register(Histogram(
+    'voting_block_nonce_attempts', 'Nonces tried per mined block', buckets=NONCE_BUCKETS))
+HASH_RATE = REGISTRY.register(Gauge(
+    'voting_block_hash_rate', 'Hashes per second achieved mining the latest block'))
+CHAIN_VALIDATION_SECONDS = REGISTRY.register(Histogram(
+    'voting_chain_validation_seconds', 'Time spent in is_chain_valid'))
+RESULTS_SECONDS = REGISTRY.register(Histogram(
+    'voting_get_results_seconds', 'Time spent in get_results'))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'voting_http_request_seconds', 'Web request latency by route', ('endpoint', 'method', 'status')))
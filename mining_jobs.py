@@ -0,0 +1,260 @@
+"""
+Background mining jobs for the voting system.
+Runs proof of work on a worker thread so callers can poll progress or cancel.
+"""
+
+import secrets
+import threading
+from time import time
+from typing import Dict, Any, Optional
+from blockchain import Blockchain, Block, MiningCancelled
+
+
+class MiningJob:
+    """Mines the pending votes of a blockchain into one block in the background."""
+    
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    CANCELLED = 'cancelled'
+    TIMED_OUT = 'timed_out'
+    NO_VOTES = 'no_votes'
+    FAILED = 'failed'
+    
+    def __init__(self, blockchain: Blockchain, timeout: float = None, max_transactions: int = None):
+        self.job_id = secrets.token_hex(8)
+        self.blockchain = blockchain
+        self.timeout = timeout
+        self.max_transactions = max_transactions
+        self.status = MiningJob.RUNNING
+        self.attempts = 0
+        self.block: Optional[Block] = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel_requested = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"mining-{self.job_id}", daemon=True)
+    
+    def start(self) -> 'MiningJob':
+        """Start mining on a background thread."""
+        self.started_at = time()
+        self._thread.start()
+        return self
+    
+    def cancel(self):
+        """Ask the job to stop at the next progress check."""
+        self._cancel_requested.set()
+    
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the job finishes; returns False if ``timeout`` expires first."""
+        return self._done.wait(timeout)
+    
+    @property
+    def is_finished(self) -> bool:
+        return self._done.is_set()
+    
+    @property
+    def elapsed(self) -> float:
+        """Seconds spent on the job so far."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time()) - self.started_at
+    
+    @property
+    def hash_rate(self) -> float:
+        """Nonce attempts per second."""
+        elapsed = self.elapsed
+        return self.attempts / elapsed if elapsed > 0 else 0.0
+    
+    def _timed_out(self) -> bool:
+        return self.timeout is not None and self.elapsed >= self.timeout
+    
+    def _should_stop(self) -> bool:
+        return self._cancel_requested.is_set() or self._timed_out()
+    
+    def _on_progress(self, attempts: int):
+        self.attempts = attempts
+    
+    def _run(self):
+        try:
+            self.block = self.blockchain.mine_pending_transactions(
+                should_stop=self._should_stop, on_progress=self._on_progress,
+                max_transactions=self.max_transactions
+            )
+            self.status = MiningJob.COMPLETED if self.block else MiningJob.NO_VOTES
+        except MiningCancelled:
+            self.status = MiningJob.CANCELLED if self._cancel_requested.is_set() else MiningJob.TIMED_OUT
+        except Exception as e:
+            self.status = MiningJob.FAILED
+            self.error = str(e)
+        finally:
+            self.finished_at = time()
+            self._done.set()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert job status to dictionary."""
+        data = {
+            'job_id': self.job_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'hash_rate': round(self.hash_rate, 2),
+            'elapsed': round(self.elapsed, 3),
+            'timeout': self.timeout,
+            'error': self.error
+        }
+        if self.block:
+            data.update({
+                'block_hash': self.block.hash,
+                'block_index': self.block.index,
+                'block_nonce': self.block.nonce,
+                'transaction_count': len(self.block.transactions)
+            })
+        return data
+    
+    def __repr__(self):
+        return f"MiningJob(id={self.job_id}, status={self.status}, attempts={self.attempts})"
+
+
+class SealingPolicy:
+    """When to seal pending votes into a block: after N votes or T seconds, whichever comes first."""
+    
+    def __init__(self, max_pending_votes: int = None, max_wait_seconds: float = None):
+        self.max_pending_votes = max_pending_votes
+        self.max_wait_seconds = max_wait_seconds
+    
+    @property
+    def is_enabled(self) -> bool:
+        return self.max_pending_votes is not None or self.max_wait_seconds is not None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert policy to dictionary."""
+        return {
+            'max_pending_votes': self.max_pending_votes,
+            'max_wait_seconds': self.max_wait_seconds
+        }
+    
+    def __repr__(self):
+        return f"SealingPolicy(max_pending_votes={self.max_pending_votes}, max_wait_seconds={self.max_wait_seconds})"
+
+
+class BlockSealer:
+    """
+    Background scheduler that seals an election's pending votes into blocks.
+    
+    A block is mined as soon as the policy's vote threshold is reached or the
+    oldest pending vote has waited the policy's time limit. Each block holds at
+    most ``max_pending_votes`` votes. ``drain`` seals everything that is left
+    and then stops the scheduler.
+    """
+    
+    def __init__(self, voting_system, policy: SealingPolicy):
+        self.voting_system = voting_system
+        self.policy = policy
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._draining = False
+        self._retry_at = 0.0
+        self._idle = False  # Waiting with no timer until a vote arrives
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """Start the scheduler thread if it is not already running."""
+        with self._condition:
+            if self.is_running:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="block-sealer", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Stop the scheduler without sealing the remaining votes."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+    
+    def join(self, timeout: float = None):
+        """Wait for the scheduler thread to exit; after ``drain``, once every vote is sealed."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def vote_added(self):
+        """Wake the scheduler when a vote may have made a block due."""
+        pending = len(self.voting_system.blockchain.pending_transactions)
+        threshold = self.policy.max_pending_votes
+        # The first vote starts the timer; reaching the threshold seals immediately.
+        # _idle is read under the lock so a scheduler about to wait cannot miss the wakeup
+        with self._condition:
+            if self._idle or (threshold is not None and pending >= threshold):
+                self._condition.notify()
+    
+    def drain(self) -> Optional[MiningJob]:
+        """
+        Seal all pending votes, then stop.
+        
+        The first block is started from the calling thread and its job returned;
+        any further blocks are sealed by the scheduler thread, which exits (and
+        ``join`` returns) once that first block and every later one are done.
+        """
+        job = self.voting_system.start_mining_job(max_transactions=self.policy.max_pending_votes)
+        with self._condition:
+            self._draining = True
+            self._retry_at = 0.0
+            self._condition.notify()
+        self.start()
+        return job
+    
+    def _oldest_pending_age(self) -> Optional[float]:
+        pending = self.voting_system.blockchain.pending_transactions
+        return time() - pending[0].timestamp if pending else None
+    
+    def _seconds_until_due(self) -> Optional[float]:
+        """Seconds until the pending votes must be sealed, or None to wait for a vote."""
+        if time() < self._retry_at:
+            return self._retry_at - time()
+        
+        pending = len(self.voting_system.blockchain.pending_transactions)
+        if not pending:
+            return None
+        if self._draining:
+            return 0.0
+        if self.policy.max_pending_votes is not None and pending >= self.policy.max_pending_votes:
+            return 0.0
+        if self.policy.max_wait_seconds is not None:
+            return max(0.0, self.policy.max_wait_seconds - self._oldest_pending_age())
+        return None
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    wait_time = self._seconds_until_due()
+                    if wait_time == 0.0:
+                        break
+                    if self._draining and wait_time is None:
+                        # The block being mined holds its votes outside the queue, and
+                        # they return to it if the block fails; wait for it to finish
+                        job = self.voting_system.current_mining_job
+                        if job is not None and not job.is_finished:
+                            break
+                        self._thread = None
+                        self._draining = False
+                        return
+                    self._idle = wait_time is None
+                    self._condition.wait(wait_time)
+                    self._idle = False
+                if self._stopped:
+                    return
+            
+            # Returns the job already running, if any, rather than starting another
+            job = self.voting_system.start_mining_job(max_transactions=self.policy.max_pending_votes)
+            if job is None:
+                continue
+            job.wait()
+            if job.status != MiningJob.COMPLETED:
+                # Do not immediately restart a block that was cancelled or failed
+                self._retry_at = time() + (self.policy.max_wait_seconds or 1.0)
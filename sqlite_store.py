@@ -0,0 +1,588 @@
+"""
+SQLite storage backend for the voting system.
+Keeps voters, elections, candidates, votes and blocks in one database in WAL
+mode so several web worker processes can serve the same elections: readers
+never block each other, and writers are serialized by SQLite's write lock.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Tuple, Set, Iterator, Any, Optional
+from block_store import BlockStoreError
+from blockchain import Transaction
+from election_store import ElectionStore
+from live_tally import SharedTally, TallyCounts, TallyDelta, TallyUsers, segment_name, shared_tallies_supported
+from voting_system import VotingSystem, Voter, VoterRegistry
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+-- Identifies this database, so shared tally segments of a deleted one are not reused
+INSERT OR IGNORE INTO meta (key, value) VALUES ('instance', lower(hex(randomblob(8))));
+
+CREATE TABLE IF NOT EXISTS voters (
+    idx INTEGER PRIMARY KEY AUTOINCREMENT,
+    voter_id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    private_key TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS elections (
+    election_id TEXT PRIMARY KEY,
+    manifest TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS candidates (
+    election_id TEXT NOT NULL,
+    candidate_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    party TEXT NOT NULL,
+    description TEXT NOT NULL,
+    PRIMARY KEY (election_id, candidate_id)
+);
+
+CREATE TABLE IF NOT EXISTS blocks (
+    election_id TEXT NOT NULL,
+    height INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (election_id, height)
+);
+
+-- One row per accepted vote; height is NULL until the vote is stored in a block.
+-- The unique voter constraint stops a voter voting twice through different workers.
+CREATE TABLE IF NOT EXISTS votes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    election_id TEXT NOT NULL,
+    voter_id TEXT NOT NULL,
+    tx_hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    height INTEGER,
+    UNIQUE (election_id, voter_id)
+);
+CREATE INDEX IF NOT EXISTS votes_pending ON votes (election_id, seq) WHERE height IS NULL;
+"""
+
+# Sequence recorded for a vote this process is still committing; above every real one
+UNCOMMITTED_SEQ = float('inf')
+
+
+class BlockConflictError(BlockStoreError):
+    """Raised when another process has already stored a block at the same height."""
+
+
+class SQLiteDatabase:
+    """
+    A WAL-mode SQLite database shared by every process serving the app.
+    
+    Each process opens its own connection (reopened after a fork), shared by
+    its threads under a lock. Every write transaction bumps a version number
+    so other processes can cheaply tell whether anything changed.
+    """
+    
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._depth = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # SQLite connections must not be used across fork(), so each worker opens its own
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout,
+                                               isolation_level=None, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=FULL')
+            self._connection.executescript(SCHEMA)
+            self._pid = os.getpid()
+            self._depth = 0
+        return self._connection
+    
+    @contextmanager
+    def transaction(self, write: bool = False):
+        """
+        Run a read or write transaction.
+        
+        Reads see one consistent snapshot of the database. Writes take SQLite's
+        write lock up front (``BEGIN IMMEDIATE``), waiting up to ``timeout``
+        seconds for another process to finish. Nested calls join the outer
+        transaction.
+        """
+        with self._lock:
+            connection = self.connection
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield connection
+                finally:
+                    self._depth -= 1
+                return
+            
+            connection.execute('BEGIN IMMEDIATE' if write else 'BEGIN')
+            self._depth = 1
+            try:
+                yield connection
+                if write:
+                    connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            finally:
+                self._depth = 0
+    
+    def instance(self) -> str:
+        """Random identifier chosen when the database was created."""
+        with self._lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'instance'").fetchone()
+        return row[0]
+    
+    def version(self) -> int:
+        """Number of write transactions committed so far, by any process."""
+        with self._lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0])
+    
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+            self._pid = None
+    
+    def __repr__(self):
+        return f"SQLiteDatabase(path={self.path})"
+
+
+class SQLiteBlockStore:
+    """
+    One election's blocks in the ``blocks`` table, with the ``BlockStore`` interface.
+    
+    Storing a block also marks its votes as mined in the same transaction.
+    Appending a height another process has already written raises
+    ``BlockConflictError``. With a ``SharedTally`` the block's votes are
+    moved from pending to counted there once the transaction commits.
+    """
+    
+    def __init__(self, database: SQLiteDatabase, election_id: str, tally: Optional[SharedTally] = None):
+        self.database = database
+        self.election_id = election_id
+        self.tally = tally
+    
+    def append(self, block_data: Dict[str, Any]):
+        """Store one block and mark its votes as mined."""
+        height = block_data['index']
+        payload = json.dumps(block_data, sort_keys=True)
+        with self.tally.update() if self.tally else nullcontext(TallyDelta()) as delta:
+            try:
+                with self.database.transaction(write=True) as connection:
+                    connection.execute(
+                        "INSERT INTO blocks (election_id, height, hash, data) VALUES (?, ?, ?, ?)",
+                        (self.election_id, height, block_data['hash'], payload))
+                    for transaction in block_data['transactions']:
+                        cursor = connection.execute(
+                            "UPDATE votes SET height = ? WHERE election_id = ? AND voter_id = ? AND height IS NULL",
+                            (height, self.election_id, transaction['voter_id']))
+                        delta.vote_mined(transaction['candidate_id'], was_pending=bool(cursor.rowcount))
+                    delta.block_stored(height, block_data['hash'])
+            except sqlite3.IntegrityError:
+                delta.clear()
+                raise BlockConflictError(f"Block {height} of {self.election_id} was stored by another process")
+    
+    def read(self, height: int) -> Dict[str, Any]:
+        """Read the block at ``height``."""
+        with self.database.transaction() as connection:
+            row = connection.execute("SELECT data FROM blocks WHERE election_id = ? AND height = ?",
+                                     (self.election_id, height)).fetchone()
+        if row is None:
+            raise IndexError(f"No block at height {height}")
+        return json.loads(row[0])
+    
+    def iterate(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield blocks from ``start`` in order."""
+        with self.database.transaction() as connection:
+            rows = connection.execute(
+                "SELECT data FROM blocks WHERE election_id = ? AND height >= ? ORDER BY height",
+                (self.election_id, start)).fetchall()
+        for (data,) in rows:
+            yield json.loads(data)
+    
+    def close(self):
+        pass
+    
+    def __len__(self):
+        with self.database.transaction() as connection:
+            row = connection.execute("SELECT COUNT(*) FROM blocks WHERE election_id = ?",
+                                     (self.election_id,)).fetchone()
+        return row[0]
+    
+    def __repr__(self):
+        return f"SQLiteBlockStore(election_id={self.election_id})"
+
+
+class _JournalRequest:
+    """One caller's entries waiting for a group commit."""
+    
+    __slots__ = ('entries', 'rejected', 'done', 'error')
+    
+    def __init__(self, entries: List[Tuple[str, dict]]):
+        self.entries = entries
+        self.rejected: Set[str] = set()
+        self.done = False
+        self.error: Optional[BaseException] = None
+
+
+class SQLiteVoteJournal:
+    """
+    One election's unmined votes in the ``votes`` table, with the ``VoteJournal`` interface.
+    
+    Concurrent appends are group committed: the first caller to find no
+    commit in progress writes every queued vote in one transaction. A vote
+    whose voter already has a row, for example one accepted by another
+    worker, is refused and reported back to its caller. Accepted votes are
+    added to the pending counts of the ``SharedTally``, if there is one.
+    """
+    
+    def __init__(self, database: SQLiteDatabase, election_id: str, tally: Optional[SharedTally] = None):
+        self.database = database
+        self.election_id = election_id
+        self.tally = tally
+        self.fsync_count = 0  # Commits, each one a WAL fsync
+        self.synced_seq = 0  # Highest vote sequence number this process has seen
+        self._condition = threading.Condition()
+        self._queue: List[_JournalRequest] = []
+        self._flushing = False
+        self._own: Dict[str, int] = {}  # Receipt hash -> sequence of votes appended by this process
+    
+    def replay(self) -> List[dict]:
+        """Return the unmined votes in the order they were accepted."""
+        with self.database.transaction() as connection:
+            rows = connection.execute(
+                "SELECT data FROM votes WHERE election_id = ? AND height IS NULL ORDER BY seq",
+                (self.election_id,)).fetchall()
+            self.synced_seq = self._max_seq(connection)
+        return [json.loads(data) for (data,) in rows]
+    
+    def _max_seq(self, connection) -> int:
+        row = connection.execute("SELECT MAX(seq) FROM votes WHERE election_id = ?",
+                                 (self.election_id,)).fetchone()
+        return row[0] or 0
+    
+    def fetch_new(self) -> List[dict]:
+        """Return unmined votes appended by other processes since the last call."""
+        with self.database.transaction() as connection:
+            rows = connection.execute(
+                "SELECT seq, tx_hash, data FROM votes WHERE election_id = ? AND height IS NULL AND seq > ? ORDER BY seq",
+                (self.election_id, self.synced_seq)).fetchall()
+            max_seq = self._max_seq(connection)
+        
+        with self._condition:
+            new = [json.loads(data) for seq, tx_hash, data in rows if tx_hash not in self._own]
+            self.synced_seq = max(self.synced_seq, max_seq)
+            self._own = {tx_hash: seq for tx_hash, seq in self._own.items() if seq > self.synced_seq}
+        return new
+    
+    def append(self, tx_hash: str, transaction: dict):
+        """Durably record one vote."""
+        self.append_many([(tx_hash, transaction)])
+    
+    def append_many(self, entries: List[Tuple[str, dict]]) -> Set[str]:
+        """Durably record ``(receipt hash, vote)`` pairs; returns the hashes that were refused."""
+        if not entries:
+            return set()
+        request = _JournalRequest(entries)
+        with self._condition:
+            self._queue.append(request)
+            while not request.done:
+                if self._flushing:
+                    self._condition.wait()
+                    continue
+                
+                # Become the leader: commit everything queued so far in one transaction
+                self._flushing = True
+                batch, self._queue = self._queue, []
+                self._condition.release()
+                error = None
+                try:
+                    self._commit(batch)
+                except BaseException as exc:
+                    error = exc
+                finally:
+                    self._condition.acquire()
+                    self._flushing = False
+                for queued in batch:
+                    queued.done = True
+                    queued.error = error
+                self._condition.notify_all()
+        
+        if request.error is not None:
+            raise request.error
+        return request.rejected
+    
+    def _commit(self, batch: List[_JournalRequest]):
+        # Claim the votes before they become visible, or a concurrent fetch_new
+        # in this process would take them for another worker's and queue them twice
+        claimed = [tx_hash for request in batch for tx_hash, _ in request.entries]
+        with self._condition:
+            for tx_hash in claimed:
+                self._own[tx_hash] = UNCOMMITTED_SEQ
+        
+        own = {}
+        try:
+            self._write(batch, own)
+        finally:
+            with self._condition:
+                for tx_hash in claimed:
+                    if tx_hash in own:
+                        self._own[tx_hash] = own[tx_hash]
+                    else:
+                        self._own.pop(tx_hash, None)
+    
+    def _write(self, batch: List[_JournalRequest], own: Dict[str, int]):
+        with self.tally.update() if self.tally else nullcontext(TallyDelta()) as delta:
+            with self.database.transaction(write=True) as connection:
+                for request in batch:
+                    for tx_hash, transaction in request.entries:
+                        cursor = connection.execute(
+                            "INSERT OR IGNORE INTO votes (election_id, voter_id, tx_hash, data) VALUES (?, ?, ?, ?)",
+                            (self.election_id, transaction['voter_id'], tx_hash,
+                             json.dumps(transaction, sort_keys=True)))
+                        if cursor.rowcount:
+                            own[tx_hash] = cursor.lastrowid
+                            delta.vote_queued(transaction['candidate_id'])
+                        else:
+                            request.rejected.add(tx_hash)
+        self.fsync_count += 1
+    
+    def discard(self, tx_hashes):
+        """Mined votes are already marked by ``SQLiteBlockStore.append``; nothing to drop."""
+    
+    def close(self):
+        pass
+    
+    def __len__(self):
+        with self.database.transaction() as connection:
+            row = connection.execute("SELECT COUNT(*) FROM votes WHERE election_id = ? AND height IS NULL",
+                                     (self.election_id,)).fetchone()
+        return row[0]
+    
+    def __repr__(self):
+        return f"SQLiteVoteJournal(election_id={self.election_id})"
+
+
+class SQLiteElectionStore(ElectionStore):
+    """
+    Persists elections in a SQLite database shared by several processes.
+    
+    Besides the ``ElectionStore`` operations, ``refresh`` brings a process up
+    to date with changes made by the others. It first compares the database
+    version number, so it costs one query when nothing has changed.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.database = SQLiteDatabase(path)
+        self._revisions: Dict[str, int] = {}  # Manifest revision last applied per election
+        self._voter_idx = 0  # Highest voter row loaded
+        self._synced_version: Optional[int] = None
+        self._refresh_lock = threading.Lock()
+        self._tallies: Dict[str, SharedTally] = {}
+        self._tally_users = TallyUsers(f"{path}-tally-users.lock")
+        self._instance: Optional[str] = None
+    
+    def open_block_store(self, election_id: str) -> SQLiteBlockStore:
+        return SQLiteBlockStore(self.database, election_id, self.live_tally(election_id))
+    
+    def open_vote_journal(self, election_id: str) -> SQLiteVoteJournal:
+        return SQLiteVoteJournal(self.database, election_id, self.live_tally(election_id))
+    
+    def live_tally(self, election_id: str) -> Optional[SharedTally]:
+        """The election's counts in shared memory, kept current by every process's writes."""
+        if not shared_tallies_supported():
+            return None
+        self._tally_users.join()
+        tally = self._tallies.get(election_id)
+        if tally is None:
+            tally = self._tallies.setdefault(election_id, self._shared_tally(election_id))
+        return tally
+    
+    def _shared_tally(self, election_id: str) -> SharedTally:
+        if self._instance is None:
+            self._instance = self.database.instance()
+        name = segment_name(self._instance, election_id)
+        # Each election has its own writer lock, so votes in one never wait on another
+        return SharedTally(name, f"{self.path}-{name}.lock", lambda: self._count_votes(election_id))
+    
+    def _count_votes(self, election_id: str) -> TallyCounts:
+        """Rebuild an election's live counts from its stored blocks and unmined votes."""
+        results = Counter()
+        blocks = 0
+        latest_hash = ''
+        with self.database.transaction() as connection:
+            for data, block_hash in connection.execute(
+                    "SELECT data, hash FROM blocks WHERE election_id = ? ORDER BY height", (election_id,)):
+                results.update(t['candidate_id'] for t in json.loads(data)['transactions'])
+                blocks += 1
+                latest_hash = block_hash
+            pending = Counter(json.loads(data)['candidate_id'] for (data,) in connection.execute(
+                "SELECT data FROM votes WHERE election_id = ? AND height IS NULL", (election_id,)))
+            candidates = [cid for (cid,) in connection.execute(
+                "SELECT candidate_id FROM candidates WHERE election_id = ? ORDER BY rowid", (election_id,))]
+        for candidate_id in candidates:
+            results.setdefault(candidate_id, 0)
+        return TallyCounts(dict(results), dict(pending), sum(results.values()), sum(pending.values()),
+                           blocks, latest_hash)
+    
+    def save_election(self, election_id: str, voting_system: VotingSystem):
+        """Store an election's manifest and candidates, bumping its revision."""
+        manifest = self.build_manifest(election_id, voting_system)
+        candidates = manifest.pop('candidates')
+        with self.database.transaction(write=True) as connection:
+            connection.execute(
+                "INSERT INTO elections (election_id, manifest, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (election_id) DO UPDATE SET manifest = excluded.manifest, revision = revision + 1",
+                (election_id, json.dumps(manifest), manifest['created_at']))
+            connection.executemany(
+                "INSERT OR IGNORE INTO candidates (election_id, candidate_id, name, party, description) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(election_id, c['candidate_id'], c['name'], c['party'], c['description']) for c in candidates])
+            revision = connection.execute("SELECT revision FROM elections WHERE election_id = ?",
+                                          (election_id,)).fetchone()[0]
+        self._revisions[election_id] = revision
+    
+    def save_voters(self, voters: List[Voter]):
+        """Add voters to the shared voter table in one transaction."""
+        with self.database.transaction(write=True) as connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO voters (voter_id, name, email, private_key) VALUES (?, ?, ?, ?)",
+                [(v.voter_id, v.name, v.email, v.private_key) for v in voters])
+    
+    def _load_new_voters(self, voters: VoterRegistry):
+        with self.database.transaction() as connection:
+            rows = connection.execute(
+                "SELECT idx, voter_id, name, email, private_key FROM voters WHERE idx > ? ORDER BY idx",
+                (self._voter_idx,)).fetchall()
+        voters.add_many(Voter(voter_id, name, email, private_key) for _, voter_id, name, email, private_key in rows)
+        if rows:
+            self._voter_idx = rows[-1][0]
+    
+    def load_voters(self) -> VoterRegistry:
+        """Read the shared voter table."""
+        voters = VoterRegistry()
+        self._voter_idx = 0
+        self._load_new_voters(voters)
+        return voters
+    
+    def read_manifest(self, election_id: str) -> Dict:
+        """Read an election's manifest and candidates."""
+        with self.database.transaction() as connection:
+            manifest, revision = connection.execute(
+                "SELECT manifest, revision FROM elections WHERE election_id = ?", (election_id,)).fetchone()
+            candidates = connection.execute(
+                "SELECT candidate_id, name, party, description FROM candidates WHERE election_id = ? ORDER BY rowid",
+                (election_id,)).fetchall()
+        manifest = json.loads(manifest)
+        manifest['candidates'] = [{'candidate_id': cid, 'name': name, 'party': party, 'description': description}
+                                  for cid, name, party, description in candidates]
+        self._revisions[election_id] = revision
+        return manifest
+    
+    def election_ids(self) -> List[str]:
+        with self.database.transaction() as connection:
+            rows = connection.execute("SELECT election_id FROM elections ORDER BY created_at").fetchall()
+        return [election_id for (election_id,) in rows]
+    
+    def load(self) -> Tuple[Dict[str, VotingSystem], VoterRegistry]:
+        # Anything committed while loading has a higher version and is picked up by refresh
+        self._synced_version = self.database.version()
+        return super().load()
+    
+    def save_current_election(self, election_id: str):
+        with self.database.transaction(write=True) as connection:
+            connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('current_election_id', ?)",
+                               (election_id,))
+    
+    def load_current_election(self) -> Optional[str]:
+        with self.database.transaction() as connection:
+            row = connection.execute("SELECT value FROM meta WHERE key = 'current_election_id'").fetchone()
+        return row[0] if row else None
+    
+    def _refresh_election(self, election_id: str, voting_system: VotingSystem):
+        """Apply another process's blocks, votes and manifest changes to one election."""
+        with self.database.transaction() as connection:
+            row = connection.execute("SELECT revision FROM elections WHERE election_id = ?",
+                                     (election_id,)).fetchone()
+        if row and row[0] != self._revisions.get(election_id):
+            self.apply_manifest(voting_system, self.read_manifest(election_id))
+        
+        blockchain = voting_system.blockchain
+        applied = blockchain.sync_from_store()
+        for block in blockchain.chain[len(blockchain.chain) - applied:] if applied else []:
+            for voter_id in block.transactions.voter_ids:
+                voting_system.mark_voted(voter_id)
+        # The election's own journal knows which votes this process wrote itself
+        for data in blockchain.journal.fetch_new():
+            transaction = Transaction.from_dict(data)
+            voting_system.mark_voted(transaction.voter_id)
+            blockchain.add_transaction(transaction, journal=False)
+        voting_system.publish_snapshot()
+    
+    def refresh(self, elections: Dict[str, VotingSystem], voters: VoterRegistry) -> Dict[str, VotingSystem]:
+        """
+        Bring this process up to date with changes committed by other processes.
+        
+        Returns the elections map, with any elections created elsewhere added.
+        """
+        with self._refresh_lock:
+            version = self.database.version()
+            if version == self._synced_version:
+                return elections
+            # Commits made after this point raise the version again and trigger another refresh
+            self._synced_version = version
+            
+            self._load_new_voters(voters)
+            updated = dict(elections)
+            for election_id in self.election_ids():
+                if election_id in updated:
+                    self._refresh_election(election_id, updated[election_id])
+                else:
+                    updated[election_id] = self.load_election(election_id, voters)
+            return updated
+    
+    def close(self):
+        """
+        Detach from the shared tallies and close the database connection.
+        
+        The last process to close the store removes every election's tally
+        segment and lock file; the next process to use a tally rebuilds it
+        from the database.
+        """
+        if shared_tallies_supported():
+            for tally in self._tallies.values():
+                tally.close()
+            with self._tally_users.leave() as last:
+                if last:
+                    for election_id in self.election_ids():
+                        (self._tallies.get(election_id) or self._shared_tally(election_id)).unlink()
+            self._tallies.clear()
+        self.database.close()
+    
+    def __repr__(self):
+        return f"SQLiteElectionStore(path={self.path})"
@@ -3,13 +3,9 @@
 // Load latest block hash
 async function loadLatestBlockHash() {
     try {
-        const result = await apiRequest('/api/blockchain-data', 'GET');
+        const result = await apiRequest('/api/blockchain-data?order=desc&limit=1&headers_only=true', 'GET');
         if (result.success && result.blocks.length > 0) {
-            const latestBlock = result.blocks[result.blocks.length - 1];
-            document.getElementById('latestHashValue').textContent = latestBlock.hash;
-            document.getElementById('latestBlockIndex').textContent = latestBlock.index;
-            document.getElementById('latestBlockNonce').textContent = latestBlock.nonce;
-            document.getElementById('latestBlockTxCount').textContent = latestBlock.transaction_count;
+            updateLatestBlock(result.blocks[0]);
         }
     } catch (error) {
         console.error('Failed to load latest block hash:', error);
@@ -202,6 +198,30 @@ document.getElementById('endElectionBtn')?.addEventListener('click', async () =>
     }
 });
 
+// Poll a background mining job until it finishes
+async function waitForMiningJob(jobId, btn) {
+    while (true) {
+        const result = await apiRequest(`/api/mining-jobs/${jobId}`, 'GET');
+        if (!result.success) {
+            return result;
+        }
+        
+        const job = result.job;
+        if (job.status !== 'running') {
+            return {
+                ...job,
+                success: job.status === 'completed',
+                message: job.status === 'completed'
+                    ? `${job.transaction_count} votes mined successfully`
+                    : `Mining ${job.status.replace('_', ' ')}`
+            };
+        }
+        
+        btn.textContent = `Mining... ${job.attempts.toLocaleString()} hashes (${Math.round(job.hash_rate).toLocaleString()} H/s)`;
+        await new Promise(resolve => setTimeout(resolve, 500));
+    }
+}
+
 // Mine Votes
 document.getElementById('mineVotesBtn')?.addEventListener('click', async () => {
     const btn = document.getElementById('mineVotesBtn');
@@ -209,7 +229,10 @@ document.getElementById('mineVotesBtn')?.addEventListener('click', async () => {
     btn.textContent = 'Mining...';
     
     try {
-        const result = await apiRequest('/api/mine-votes', 'POST');
+        let result = await apiRequest('/api/mine-votes', 'POST');
+        if (result.success) {
+            result = await waitForMiningJob(result.job_id, btn);
+        }
         
         if (result.success) {
             // Show modal with block hash information
@@ -491,19 +514,25 @@ window.downloadCredentials = function() {
     showNotification('Credentials downloaded!', 'success');
 };
 
-// Auto-refresh stats every 30 seconds
+// Keep stats and the latest block live as votes arrive and blocks are sealed
 if (window.location.pathname === '/admin') {
-    setInterval(async () => {
-        try {
-            const result = await apiRequest('/api/stats', 'GET');
-            if (result.success) {
-                // Update stats without full page reload
-                updateStatsDisplay(result.stats);
-            }
-        } catch (error) {
-            console.error('Failed to fetch stats:', error);
+    subscribeLiveStats((state, electionChanged) => {
+        if (state.election_id === null) return;
+        updateStatsDisplay(state);
+        updateLatestBlock(state.latest_block);
+        if (electionChanged) {
+            loadElections();
         }
-    }, 30000);
+    });
+}
+
+function updateLatestBlock(block) {
+    const hashValue = document.getElementById('latestHashValue');
+    if (!hashValue || !block) return;
+    hashValue.textContent = block.hash;
+    document.getElementById('latestBlockIndex').textContent = block.index;
+    document.getElementById('latestBlockNonce').textContent = block.nonce;
+    document.getElementById('latestBlockTxCount').textContent = block.transaction_count;
 }
 
 function updateStatsDisplay(stats) {
@@ -92,3 +92,54 @@ function copyToClipboard(text) {
         showNotification('Copied to clipboard!', 'success');
     }
 }
+
+// Milliseconds between polls of /api/live-state when a live stream is unavailable
+const LIVE_POLL_INTERVAL = 5000;
+
+// Live election state pushed by the server (/api/live). onUpdate receives the
+// full state and whether it was replaced (a different election or candidates)
+// rather than updated by a delta. The browser reconnects by itself; if it has
+// no EventSource or the server turns the stream away (each worker serves a
+// limited number), the state is polled from /api/live-state instead.
+function subscribeLiveStats(onUpdate) {
+    let state = null;
+    const replace = (next) => {
+        const previous = state;
+        state = next;
+        onUpdate(state, previous !== null && previous.election_id !== state.election_id);
+    };
+    
+    let pollTimer = null;
+    const poll = () => {
+        fetch('/api/live-state')
+            .then(response => response.json())
+            .then(replace)
+            .catch(error => console.error('Error polling live state:', error));
+    };
+    const startPolling = () => {
+        if (pollTimer !== null) return;
+        poll();
+        pollTimer = setInterval(poll, LIVE_POLL_INTERVAL);
+    };
+    if (!window.EventSource) {
+        startPolling();
+        return null;
+    }
+    
+    const source = new EventSource('/api/live');
+    source.addEventListener('snapshot', (e) => replace(JSON.parse(e.data)));
+    source.addEventListener('delta', (e) => {
+        if (state === null) return;
+        const delta = JSON.parse(e.data);
+        Object.entries(delta).forEach(([key, value]) => {
+            // Per-candidate results arrive as only the entries that changed
+            state[key] = key === 'results' ? { ...state.results, ...value } : value;
+        });
+        onUpdate(state, false);
+    });
+    // A refused stream (e.g. 503) is not retried by the browser
+    source.addEventListener('error', () => {
+        if (source.readyState === EventSource.CLOSED) startPolling();
+    });
+    return source;
+}
@@ -0,0 +1,40 @@
+"""
+Shared fixtures for the test suite.
+The app is imported without VOTING_DATABASE or VOTING_DATA_DIR, so every
+election lives in memory and each test creates its own.
+"""
+
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.pop('VOTING_DATABASE', None)
+os.environ.pop('VOTING_DATA_DIR', None)
+
+import app as web_app  # noqa: E402
+from voting_system import Candidate  # noqa: E402
+
+# Elections share the app's voter registry, so each fixture registers a new voter
+_voter_numbers = itertools.count(1)
+
+
+@pytest.fixture
+def client():
+    return web_app.app.test_client()
+
+
+@pytest.fixture
+def election(client):
+    """A new current election with one candidate and one mined vote, so two blocks."""
+    created = client.post('/api/create-election', json={'election_name': 'Test election', 'difficulty': 1})
+    voting_system = web_app.elections[created.get_json()['election_id']]
+    voting_system.register_candidates([Candidate('C1', 'Candidate One', 'Party')])
+    voter_id = f"TV{next(_voter_numbers)}"
+    voter = voting_system.register_voter(voter_id, 'Test Voter', f'{voter_id.lower()}@example.edu')
+    voting_system.start_election()
+    voting_system.cast_vote(voter_id, 'C1', voter.private_key)
+    voting_system.blockchain.mine_pending_transactions()
+    return voting_system
@@ -0,0 +1,28 @@
+"""Tests for chain validation."""
+
+from blockchain import Blockchain, Block, Transaction
+
+
+def mined_chain(blocks):
+    blockchain = Blockchain(difficulty=1)
+    for number in range(blocks):
+        blockchain.add_transaction(Transaction(f'V{number}', 'C1'))
+        blockchain.mine_pending_transactions()
+    return blockchain
+
+
+def test_block_appended_during_validation_is_not_marked_verified():
+    blockchain = mined_chain(2)
+    blockchain.verified_height = 0
+    last = blockchain.chain[-1]
+    calculate_merkle_root = last.calculate_merkle_root
+    
+    def append_unchecked_block():
+        # A bad block lands while the last verified one is being checked
+        blockchain.chain.append(Block(last.index + 1, [], 'not the previous hash'))
+        return calculate_merkle_root()
+    
+    last.calculate_merkle_root = append_unchecked_block
+    assert blockchain.is_chain_valid()
+    assert blockchain.verified_height == 3
+    assert not blockchain.is_chain_valid()
@@ -0,0 +1,31 @@
+"""Tests for paging through the chain with /api/blockchain-data and its stream."""
+
+import json
+
+
+def test_descending_cursor_past_the_end_starts_at_the_last_block(client, election):
+    height = len(election.blockchain.chain)
+    response = client.get(f'/api/blockchain-data?order=desc&cursor={height}')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [block['index'] for block in data['blocks']] == [1, 0]
+    assert data['next_cursor'] is None
+
+
+def test_ascending_cursor_past_the_end_is_an_empty_page(client, election):
+    response = client.get('/api/blockchain-data?cursor=100')
+    assert response.status_code == 200
+    assert response.get_json()['blocks'] == []
+
+
+def test_stream_descending_cursor_past_the_end(client, election):
+    height = len(election.blockchain.chain)
+    response = client.get(f'/api/blockchain-data/stream?order=desc&cursor={height}')
+    assert response.status_code == 200
+    assert [json.loads(line)['index'] for line in response.data.splitlines()] == [1, 0]
+
+
+def test_malformed_cursor_or_limit_is_rejected(client, election):
+    assert client.get('/api/blockchain-data?cursor=abc').status_code == 400
+    assert client.get('/api/blockchain-data?limit=1.5').status_code == 400
+    assert client.get('/api/blockchain-data/stream?cursor=abc').status_code == 400
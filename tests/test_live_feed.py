@@ -0,0 +1,59 @@
+"""Tests for the server-sent events feed of live statistics."""
+
+import json
+
+import app as web_app
+from live_feed import LiveFeed, state_delta
+
+
+def block(index, transaction_count=10):
+    return {'index': index, 'hash': f'hash{index}', 'nonce': index * 7, 'transaction_count': transaction_count}
+
+
+def state(latest_block, results=None):
+    return {'election_id': 'e1', 'candidates': {'C1': {}, 'C2': {}},
+            'results': results or {'C1': 0, 'C2': 0}, 'latest_block': latest_block}
+
+
+def last_frame(feed):
+    """The newest frame's event name and data."""
+    lines = feed._frames[-1][1].decode().splitlines()
+    return lines[1][len('event: '):], json.loads(lines[2][len('data: '):])
+
+
+def test_blocks_with_the_same_vote_count_are_sent_whole():
+    states = iter([state(block(1)), state(block(2))])
+    feed = LiveFeed(lambda: next(states))
+    feed.publish()
+    feed.publish()
+    assert last_frame(feed) == ('delta', {'latest_block': block(2)})
+
+
+def test_results_are_sent_as_only_the_changed_candidates():
+    name, changes = state_delta(state(block(1)), state(block(1), {'C1': 1, 'C2': 0}))
+    assert (name, changes) == ('delta', {'results': {'C1': 1}})
+
+
+def test_a_new_election_sends_the_full_state():
+    new = dict(state(block(1)), election_id='e2')
+    assert state_delta(state(block(1)), new) == ('snapshot', new)
+
+
+def test_clients_past_the_limit_are_turned_away():
+    feed = LiveFeed(lambda: state(block(1)), max_clients=1)
+    first = feed.connect()
+    next(first)
+    assert feed.client_count == 1
+    assert feed.connect() is None
+    first.close()
+    assert feed.client_count == 0
+    assert feed.connect() is not None
+
+
+def test_live_endpoint_answers_503_past_the_limit(client, election, monkeypatch):
+    monkeypatch.setattr(web_app.live_feed, 'max_clients', 0)
+    response = client.get('/api/live')
+    assert response.status_code == 503
+    state = client.get('/api/live-state').get_json()
+    assert state['latest_block']['index'] == 1
+    assert state['results'] == {'C1': 1}
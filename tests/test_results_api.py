@@ -0,0 +1,29 @@
+"""Tests for historical results from /api/results and /api/results/series."""
+
+import pytest
+
+
+@pytest.mark.parametrize('query', ['height=abc', 'height=1.5', 'timestamp=soon', 'timestamp=nan'])
+def test_malformed_results_query_is_rejected(client, election, query):
+    response = client.get(f'/api/results?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+@pytest.mark.parametrize('query', ['points=abc', 'points=2.5', 'start=yesterday', 'end=inf'])
+def test_malformed_series_query_is_rejected(client, election, query):
+    response = client.get(f'/api/results/series?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_results_at_a_height(client, election):
+    response = client.get('/api/results?height=1')
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+
+
+def test_results_series(client, election):
+    response = client.get('/api/results/series?points=5')
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
@@ -0,0 +1,207 @@
+"""
+Write-ahead journal for votes waiting to be mined.
+Accepted votes are made durable before the voter is answered, and replayed
+into the mempool after a restart.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Iterable, Tuple, Set
+
+
+# Compact the journal once it holds this many bytes and over twice its live records
+COMPACT_MIN_BYTES = 1 << 20
+COMPACT_RATIO = 2
+
+
+class VoteJournal:
+    """
+    Append-only journal of unmined votes with group commit.
+    
+    Concurrent ``append`` calls are batched: the first writer to find no flush
+    in progress writes every buffered record and issues one fsync on behalf of
+    all of them, while the others wait for that flush to cover their record.
+    If the write fails, every vote in the batch is dropped and each of its
+    writers gets the error. Once votes are stored in a mined block,
+    ``discard`` forgets them: the journal is truncated when nothing is left
+    unmined, and otherwise only rewritten once mined records make up most of
+    it. Mined records still in the file are skipped on replay.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._condition = threading.Condition()
+        self._records: Dict[str, bytes] = {}  # Receipt hash -> journal line, oldest first
+        self._live_bytes = 0  # Size of the lines in _records
+        self._buffer: List[Tuple[int, List[str], bytes]] = []  # (sequence, receipt hashes, lines)
+        self._next_sequence = 1
+        self._durable_sequence = 0
+        self._failed: Dict[int, OSError] = {}  # Sequences whose flush failed, until their writer sees it
+        self._flushing = False
+        self._file_size = 0
+        self.fsync_count = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._load()
+        # Unbuffered, so a failed write leaves nothing behind to be written later
+        self._file = open(path, 'ab', buffering=0)
+    
+    def _load(self):
+        """Read surviving records, cutting off a torn final line."""
+        if not os.path.exists(self.path):
+            return
+        good_end = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self._add_record(record['hash'], line)
+                good_end += len(line)
+        if good_end < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_end)
+                os.fsync(f.fileno())
+        self._file_size = good_end
+    
+    def _add_record(self, tx_hash: str, line: bytes):
+        previous = self._records.pop(tx_hash, None)
+        if previous is not None:
+            self._live_bytes -= len(previous)
+        self._records[tx_hash] = line
+        self._live_bytes += len(line)
+    
+    def _drop_record(self, tx_hash: str):
+        line = self._records.pop(tx_hash, None)
+        if line is not None:
+            self._live_bytes -= len(line)
+    
+    def _fsync_directory(self):
+        """Make the journal's directory entry durable after it is replaced."""
+        if hasattr(os, 'O_DIRECTORY'):
+            fd = os.open(os.path.dirname(self.path) or '.', os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    
+    def replay(self) -> List[dict]:
+        """Return the journaled votes in the order they were accepted."""
+        return [json.loads(line)['transaction'] for line in self._records.values()]
+    
+    def append(self, tx_hash: str, transaction: dict):
+        """Durably record one vote; returns once it has been fsynced."""
+        self.append_many([(tx_hash, transaction)])
+    
+    def append_many(self, entries: List[Tuple[str, dict]]) -> Set[str]:
+        """
+        Durably record a batch of ``(receipt hash, vote)`` pairs with a single fsync.
+        
+        Returns the receipt hashes that were refused, which is always empty
+        here; a journal shared between processes refuses a second vote by the
+        same voter. Raises ``OSError`` if the write failed, in which case none
+        of the batch was recorded.
+        """
+        if not entries:
+            return set()
+        lines = [json.dumps({'hash': tx_hash, 'transaction': transaction}, sort_keys=True).encode() + b'\n'
+                 for tx_hash, transaction in entries]
+        with self._condition:
+            for (tx_hash, _), line in zip(entries, lines):
+                self._add_record(tx_hash, line)
+            sequence = self._next_sequence
+            self._next_sequence += 1
+            self._buffer.append((sequence, [tx_hash for tx_hash, _ in entries], b''.join(lines)))
+            
+            while self._durable_sequence < sequence:
+                if sequence in self._failed:
+                    error = self._failed.pop(sequence)
+                    raise OSError(f"Could not write the vote journal: {error}") from error
+                if self._flushing:
+                    self._condition.wait()
+                    continue
+                self._flush()
+        return set()
+    
+    def _flush(self):
+        """Become the leader: write everything buffered so far with one fsync. Called holding the condition."""
+        self._flushing = True
+        batch, self._buffer = self._buffer, []
+        data = b''.join(lines for _, _, lines in batch)
+        start = self._file_size
+        self._condition.release()
+        error = None
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[self._file.write(view):]
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            error = e
+            # Cut off whatever part of the batch reached the file, so later records are not behind a torn line
+            try:
+                os.ftruncate(self._file.fileno(), start)
+            except OSError:
+                pass
+        finally:
+            self._condition.acquire()
+            self._flushing = False
+        
+        if error is None:
+            self.fsync_count += 1
+            self._file_size = start + len(data)
+            self._durable_sequence = max(self._durable_sequence, batch[-1][0])
+        else:
+            for sequence, tx_hashes, _ in batch:
+                for tx_hash in tx_hashes:
+                    self._drop_record(tx_hash)
+                self._failed[sequence] = error
+        self._condition.notify_all()
+    
+    def discard(self, tx_hashes: Iterable[str]):
+        """Drop votes that are now durably stored in a block, shrinking the journal when it pays."""
+        with self._condition:
+            while self._flushing:
+                self._condition.wait()
+            for tx_hash in tx_hashes:
+                self._drop_record(tx_hash)
+            
+            if not self._records and not self._buffer:
+                # Nothing left unmined
+                os.ftruncate(self._file.fileno(), 0)
+                os.fsync(self._file.fileno())
+                self._file_size = 0
+            elif self._file_size >= COMPACT_MIN_BYTES and self._file_size > COMPACT_RATIO * self._live_bytes:
+                self._compact()
+    
+    def _compact(self):
+        """Rewrite the journal with only the unmined votes, including any still buffered."""
+        temp_path = self.path + '.tmp'
+        data = b''.join(self._records.values())
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(temp_path, self.path)
+        self._fsync_directory()
+        self._file = open(self.path, 'ab', buffering=0)
+        self._file_size = len(data)
+        self._buffer = []
+        self._durable_sequence = self._next_sequence - 1
+        self._condition.notify_all()
+    
+    def close(self):
+        with self._condition:
+            self._file.close()
+    
+    def __len__(self):
+        return len(self._records)
+    
+    def __repr__(self):
+        return f"VoteJournal(path={self.path}, votes={len(self._records)})"
@@ -0,0 +1,212 @@
+"""
+Streaming bulk import for the shared voter registry.
+Reads a CSV or NDJSON voter roll incrementally, generates private keys in
+chunks (optionally across worker processes) and streams the issued
+credentials back out instead of collecting them in memory. Rows that already
+carry a ``private_key``, such as generated test rolls, keep it.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Iterable, Iterator, Any, Callable, TextIO
+from voting_system import Voter, VoterRegistry, generate_private_keys
+
+
+# Voters parsed, keyed and saved together; each chunk costs one voter roll fsync
+IMPORT_CHUNK_SIZE = 1000
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+REQUIRED_FIELDS = ('voter_id', 'name', 'email')
+
+
+def iter_voter_records(stream: TextIO, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yield one record per input row without reading the whole stream."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'ndjson':
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            # Unparseable lines still produce a result so line numbers stay aligned
+            yield record if isinstance(record, dict) else {}
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def format_for_path(path: str) -> str:
+    """Guess the import format from a file name."""
+    return 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+
+class VoterImporter:
+    """
+    Adds voters from a record stream to the shared registry, one chunk at a time.
+    
+    Each record is checked against the registry and the voters already seen in
+    this import, both plain dict/set lookups. Keys for a chunk are generated in
+    one call, on a process pool when ``workers`` > 1, with a few chunks kept in
+    flight so parsing overlaps key generation. Accepted voters are saved to the
+    store and registered a chunk at a time; every election sees them through
+    the shared registry.
+    """
+    
+    def __init__(self, registry: VoterRegistry, store=None, workers: int = 1,
+                 chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.registry = registry
+        self.store = store
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.imported = 0
+        self.rejected = 0
+        self._seen = set()
+    
+    def _chunks(self, records: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    def _validate(self, chunk: List[Dict[str, Any]], first_line: int) -> List[Dict[str, Any]]:
+        """Return one result per record; accepted ones carry the voter's fields and await a key."""
+        results = []
+        for line, record in enumerate(chunk, first_line):
+            fields = {name: str(record.get(name) or '').strip() for name in REQUIRED_FIELDS}
+            voter_id = fields['voter_id']
+            if not all(fields.values()):
+                results.append({'line': line, 'voter_id': voter_id or None, 'error': 'missing_fields'})
+            elif voter_id in self.registry:
+                results.append({'line': line, 'voter_id': voter_id, 'error': 'already_registered'})
+            elif voter_id in self._seen:
+                results.append({'line': line, 'voter_id': voter_id, 'error': 'duplicate'})
+            else:
+                self._seen.add(voter_id)
+                result = dict(fields, line=line)
+                private_key = str(record.get('private_key') or '').strip()
+                if private_key:
+                    result['private_key'] = private_key
+                results.append(result)
+        return results
+    
+    def _commit(self, results: List[Dict[str, Any]], keys: List[str]) -> List[Dict[str, Any]]:
+        """Register a chunk's accepted voters and turn its results into credentials or errors."""
+        voters = []
+        keys = iter(keys)
+        output = []
+        for result in results:
+            if 'error' in result:
+                self.rejected += 1
+                output.append(result)
+                continue
+            voter = Voter(result['voter_id'], result['name'], result['email'],
+                          result.get('private_key') or next(keys))
+            voters.append(voter)
+            output.append({'line': result['line'], 'voter_id': voter.voter_id,
+                           'private_key': voter.private_key})
+        
+        if voters:
+            if self.store:
+                self.store.save_voters(voters)
+            self.registry.add_many(voters)
+            self.imported += len(voters)
+        return output
+    
+    def import_records(self, records: Iterable[Dict[str, Any]],
+                       on_progress: Callable[[int, int], None] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Import ``records`` and yield one result per record, in input order.
+        
+        Results are ``{'line', 'voter_id', 'private_key'}`` for new voters and
+        ``{'line', 'voter_id', 'error'}`` for rejected rows. ``on_progress`` is
+        called with the imported and rejected counts after every chunk.
+        """
+        pool = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        in_flight = deque()
+        line = 1
+        try:
+            for chunk in self._chunks(records):
+                results = self._validate(chunk, line)
+                line += len(chunk)
+                identities = [(r['voter_id'], r['name']) for r in results
+                              if 'error' not in r and 'private_key' not in r]
+                if pool:
+                    in_flight.append((results, pool.submit(generate_private_keys, identities)))
+                    if len(in_flight) <= 2 * self.workers:
+                        continue
+                    results, future = in_flight.popleft()
+                    keys = future.result()
+                else:
+                    keys = generate_private_keys(identities)
+                yield from self._commit(results, keys)
+                if on_progress:
+                    on_progress(self.imported, self.rejected)
+            
+            while in_flight:
+                results, future = in_flight.popleft()
+                yield from self._commit(results, future.result())
+                if on_progress:
+                    on_progress(self.imported, self.rejected)
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+    
+    def summary(self) -> Dict[str, int]:
+        return {'imported': self.imported, 'rejected': self.rejected}
+
+
+def main():
+    """Import a voter roll into a data directory or database and write the issued credentials."""
+    from election_store import ElectionStore
+    from sqlite_store import SQLiteElectionStore
+    
+    parser = argparse.ArgumentParser(description="Bulk import voters into the shared registry")
+    parser.add_argument('input', help="CSV or NDJSON voter roll with voter_id, name and email ('-' for stdin)")
+    parser.add_argument('--format', choices=IMPORT_FORMATS,
+                        help="Input format (default: from the file extension, NDJSON for stdin)")
+    parser.add_argument('--data-dir', default=os.environ.get('VOTING_DATA_DIR'),
+                        help="Data directory of the web app (default: $VOTING_DATA_DIR)")
+    parser.add_argument('--database', default=os.environ.get('VOTING_DATABASE'),
+                        help="SQLite database of the web app (default: $VOTING_DATABASE)")
+    parser.add_argument('--output', default='-',
+                        help="Where to write issued credentials as NDJSON (default: stdout)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes generating private keys")
+    args = parser.parse_args()
+    if not args.data_dir and not args.database:
+        parser.error("--data-dir or --database is required when neither VOTING_DATA_DIR nor VOTING_DATABASE is set")
+    
+    store = SQLiteElectionStore(args.database) if args.database else ElectionStore(args.data_dir)
+    importer = VoterImporter(store.load_voters(), store=store, workers=args.workers)
+    fmt = args.format or ('ndjson' if args.input == '-' else format_for_path(args.input))
+    
+    def report(imported: int, rejected: int):
+        print(f"\rImported {imported:,} voters, rejected {rejected:,}", end='', file=sys.stderr)
+    
+    source = sys.stdin if args.input == '-' else open(args.input, newline='')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        for result in importer.import_records(iter_voter_records(source, fmt), on_progress=report):
+            output.write(json.dumps(result) + '\n')
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,39 +4,202 @@ Includes Voter, Candidate, and VotingSystem classes.
 """
 
 import hashlib
-import secrets
-from typing import List, Dict, Optional
+import os
+import threading
+from collections import Counter
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator, NamedTuple
 from datetime import datetime
 from blockchain import Blockchain, Transaction
+from mining_jobs import MiningJob, SealingPolicy, BlockSealer
+import metrics
+from events import (EventBus, default_bus, EVENT_VOTE_ACCEPTED, EVENT_VOTE_REJECTED,
+                    EVENT_ELECTION_STARTED, EVENT_ELECTION_ENDED, EVENT_VOTER_REGISTERED,
+                    EVENT_CANDIDATE_REGISTERED, EVENT_NOTICE, EVENT_SNAPSHOT_PUBLISHED)
+
+
+# Number of mining jobs kept for status lookups
+MAX_MINING_JOB_HISTORY = 100
+
+# Per-ballot result codes reported in VoteResult.code
+VOTE_ACCEPTED = 'accepted'
+VOTE_ELECTION_INACTIVE = 'election_inactive'
+VOTE_INVALID_BALLOT = 'invalid_ballot'
+VOTE_UNKNOWN_VOTER = 'unknown_voter'
+VOTE_INVALID_KEY = 'invalid_key'
+VOTE_ALREADY_VOTED = 'already_voted'
+VOTE_DUPLICATE_IN_BATCH = 'duplicate_in_batch'
+VOTE_UNKNOWN_CANDIDATE = 'unknown_candidate'
+
+# Human-readable explanation of each result code
+VOTE_MESSAGES = {
+    VOTE_ACCEPTED: "Vote cast successfully!",
+    VOTE_ELECTION_INACTIVE: "Election is not active.",
+    VOTE_INVALID_BALLOT: "Voter ID, candidate ID and private key are all required.",
+    VOTE_UNKNOWN_VOTER: "Voter not registered.",
+    VOTE_INVALID_KEY: "Invalid private key.",
+    VOTE_ALREADY_VOTED: "Voter has already cast their vote.",
+    VOTE_DUPLICATE_IN_BATCH: "Voter appears more than once in the batch.",
+    VOTE_UNKNOWN_CANDIDATE: "Candidate not found."
+}
+
+
+def generate_private_keys(identities: List[Tuple[str, str]]) -> List[str]:
+    """
+    Generate a private key for each ``(voter_id, name)`` pair.
+    
+    Random bytes for the whole batch are drawn from the OS in one call rather
+    than once per voter.
+    """
+    entropy = os.urandom(16 * len(identities)).hex()
+    return [hashlib.sha256(f"{voter_id}{name}{entropy[32 * i:32 * i + 32]}".encode()).hexdigest()
+            for i, (voter_id, name) in enumerate(identities)]
+
+
+class VoteResult(NamedTuple):
+    """
+    Outcome of one ballot: a ``VOTE_*`` result code and, if it was accepted,
+    the vote's receipt hash and timestamp. Truthy only when accepted.
+    """
+    
+    code: str
+    tx_hash: Optional[str] = None
+    timestamp: Optional[float] = None
+    
+    @property
+    def accepted(self) -> bool:
+        return self.code == VOTE_ACCEPTED
+    
+    @property
+    def message(self) -> str:
+        return VOTE_MESSAGES.get(self.code, self.code)
+    
+    def __bool__(self):
+        return self.accepted
 
 
 class Voter:
     """Represents a voter in the system."""
     
-    def __init__(self, voter_id: str, name: str, email: str):
+    def __init__(self, voter_id: str, name: str, email: str, private_key: str = None):
         self.voter_id = voter_id
         self.name = name
         self.email = email
-        self.has_voted = False
-        self.private_key = self._generate_private_key()
+        self.index: Optional[int] = None  # Dense index assigned by the VoterRegistry
+        self.private_key = private_key or self._generate_private_key()
     
     def _generate_private_key(self) -> str:
         """Generate a unique private key for the voter."""
-        return hashlib.sha256(
-            f"{self.voter_id}{self.name}{secrets.token_hex(16)}".encode()
-        ).hexdigest()
+        return generate_private_keys([(self.voter_id, self.name)])[0]
     
     def to_dict(self) -> Dict:
         """Convert voter to dictionary (without private key)."""
         return {
             'voter_id': self.voter_id,
             'name': self.name,
-            'email': self.email,
-            'has_voted': self.has_voted
+            'email': self.email
         }
     
     def __repr__(self):
-        return f"Voter(id={self.voter_id}, name={self.name}, voted={self.has_voted})"
+        return f"Voter(id={self.voter_id}, name={self.name})"
+
+
+class VoterRegistry(Mapping):
+    """
+    Voter roll shared by every election, mapping voter IDs to ``Voter`` objects.
+    
+    Each voter is given a dense integer index on registration. Elections record
+    participation as bits at those indexes instead of holding their own copy of
+    the roll, so adding a voter or an election is O(1).
+    """
+    
+    def __init__(self):
+        self._voters: List[Voter] = []
+        self._indexes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, voter: Voter) -> bool:
+        """Register a voter; returns False if the ID is already taken."""
+        with self._lock:
+            if voter.voter_id in self._indexes:
+                return False
+            voter.index = len(self._voters)
+            self._voters.append(voter)
+            self._indexes[voter.voter_id] = voter.index
+            return True
+    
+    def add_many(self, voters: Iterable[Voter]) -> int:
+        """Register several voters, skipping taken IDs; returns how many were added."""
+        added = 0
+        with self._lock:
+            for voter in voters:
+                if voter.voter_id in self._indexes:
+                    continue
+                voter.index = len(self._voters)
+                self._voters.append(voter)
+                self._indexes[voter.voter_id] = voter.index
+                added += 1
+        return added
+    
+    def index_of(self, voter_id: str) -> Optional[int]:
+        """Dense index of a voter, or None if not registered."""
+        return self._indexes.get(voter_id)
+    
+    def __getitem__(self, voter_id: str) -> Voter:
+        return self._voters[self._indexes[voter_id]]
+    
+    def get(self, voter_id: str, default=None) -> Optional[Voter]:
+        index = self._indexes.get(voter_id)
+        return default if index is None else self._voters[index]
+    
+    def __contains__(self, voter_id) -> bool:
+        return voter_id in self._indexes
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._indexes)
+    
+    def __len__(self):
+        return len(self._voters)
+    
+    def __repr__(self):
+        return f"VoterRegistry(voters={len(self._voters)})"
+
+
+class ParticipationBitset:
+    """One bit per registry index recording which voters have voted in an election."""
+    
+    __slots__ = ('_bits', '_count')
+    
+    def __init__(self):
+        self._bits = bytearray()
+        self._count = 0
+    
+    def add(self, index: int) -> bool:
+        """Set the bit for ``index``; returns False if it was already set."""
+        byte, mask = index >> 3, 1 << (index & 7)
+        if byte >= len(self._bits):
+            # Grow geometrically so setting bits for new voters stays amortized O(1)
+            self._bits.extend(bytes(max(byte + 1, 2 * len(self._bits)) - len(self._bits)))
+        if self._bits[byte] & mask:
+            return False
+        self._bits[byte] |= mask
+        self._count += 1
+        return True
+    
+    def discard(self, index: int):
+        """Clear the bit for ``index`` if it is set."""
+        byte, mask = index >> 3, 1 << (index & 7)
+        if byte < len(self._bits) and self._bits[byte] & mask:
+            self._bits[byte] &= ~mask
+            self._count -= 1
+    
+    def __contains__(self, index: int) -> bool:
+        byte = index >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (index & 7)))
+    
+    def __len__(self):
+        return self._count
 
 
 class Candidate:
@@ -61,129 +224,466 @@ class Candidate:
         return f"Candidate(id={self.candidate_id}, name={self.name}, party={self.party})"
 
 
+class ElectionSnapshot:
+    """
+    Immutable view of one election's state, served to read-only endpoints.
+    
+    ``VotingSystem`` builds a new snapshot when one is read after a change and
+    publishes it by replacing a single reference, so readers never take the
+    election lock and always see results, counts and chain height from the
+    same moment.
+    """
+    
+    __slots__ = ('version', 'election_name', 'is_active', 'start_time', 'end_time',
+                 'candidates', 'results', 'pending_results', 'votes_cast', 'pending_count',
+                 'blockchain_blocks', 'latest_hash', 'difficulty', 'is_valid')
+    
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            value = fields[name]
+            if isinstance(value, dict):
+                value = MappingProxyType(value)
+            object.__setattr__(self, name, value)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("ElectionSnapshot is immutable")
+    
+    def to_stats_dict(self, voter_count: int) -> Dict:
+        """Statistics in the shape returned by the stats endpoints."""
+        return {
+            'election_name': self.election_name,
+            'is_active': self.is_active,
+            'voter_count': voter_count,
+            'candidate_count': len(self.candidates),
+            'votes_cast': self.votes_cast,
+            'pending_votes': self.pending_count,
+            'blockchain_blocks': self.blockchain_blocks,
+            'blockchain_valid': self.is_valid
+        }
+    
+    def with_counts(self, counts) -> 'ElectionSnapshot':
+        """
+        A copy carrying newer counts, e.g. a ``TallyCounts`` read from shared
+        memory, in place of this snapshot's own.
+        """
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(
+            results={cid: counts.results.get(cid, 0) for cid in self.candidates},
+            pending_results={cid: counts.pending_results.get(cid, 0) for cid in self.candidates},
+            votes_cast=counts.votes_cast,
+            pending_count=counts.pending_count,
+            blockchain_blocks=counts.blocks,
+            latest_hash=counts.latest_hash
+        )
+        return ElectionSnapshot(**fields)
+    
+    def __repr__(self):
+        return (f"ElectionSnapshot(election={self.election_name}, version={self.version}, "
+                f"votes={self.votes_cast}, pending={self.pending_count})")
+
+
 class VotingSystem:
     """Main voting system that manages elections using blockchain."""
     
-    def __init__(self, election_name: str, difficulty: int = 2):
+    def __init__(self, election_name: str, difficulty: int = 2, mining_workers: int = 1,
+                 sealing_policy: SealingPolicy = None, block_store=None, vote_journal=None,
+                 voter_registry: VoterRegistry = None, events: EventBus = None,
+                 genesis_time: float = None):
         self.election_name = election_name
-        self.blockchain = Blockchain(difficulty=difficulty)
-        self.voters: Dict[str, Voter] = {}
+        # Votes, elections opening and closing and sealed blocks are reported here, not printed
+        self.events = events or default_bus
+        self.blockchain = Blockchain(difficulty=difficulty, workers=mining_workers,
+                                     store=block_store, journal=vote_journal, events=self.events,
+                                     genesis_time=genesis_time)
+        # The registry may be shared with other elections; participation is per election
+        self.voters = voter_registry if voter_registry is not None else VoterRegistry()
+        self.voted = ParticipationBitset()
         self.candidates: Dict[str, Candidate] = {}
         self.is_active = False
         self.start_time = None
         self.end_time = None
+        self.created_at = datetime.now().timestamp()
+        self.mining_jobs: Dict[str, MiningJob] = {}
+        self.current_mining_job: Optional[MiningJob] = None
+        self._job_lock = threading.Lock()
+        self.sealing_policy = sealing_policy or SealingPolicy()
+        self.sealer = BlockSealer(self, self.sealing_policy)
+        
+        # Writers to this election hold its lock; readers use the published snapshot
+        self._lock = threading.RLock()
+        self._writers = 0  # Accepted votes still being journaled and queued
+        self._writers_done = threading.Condition(self._lock)
+        self._snapshot_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._snapshot: Optional[ElectionSnapshot] = None
+        self._snapshot_version = 0  # Bumped by every change; a snapshot of an older one is stale
+        self._candidate_view = None  # Read-only copy of the candidates, shared by snapshots
+        self.blockchain.on_change = self.publish_snapshot
+        self.publish_snapshot()
     
     def register_voter(self, voter_id: str, name: str, email: str) -> Optional[Voter]:
         """Register a new voter."""
         if voter_id in self.voters:
-            print(f"Voter {voter_id} already registered.")
+            self.events.emit(EVENT_NOTICE, message=f"Voter {voter_id} already registered.")
             return None
         
         voter = Voter(voter_id, name, email)
-        self.voters[voter_id] = voter
-        print(f"Voter registered: {voter.name} (ID: {voter_id})")
+        if not self.voters.add(voter):
+            self.events.emit(EVENT_NOTICE, message=f"Voter {voter_id} already registered.")
+            return None
+        self.events.emit(EVENT_VOTER_REGISTERED, election=self.election_name,
+                         voter_id=voter_id, voter_name=voter.name)
         return voter
     
     def register_candidate(self, candidate_id: str, name: str, party: str, 
                           description: str = "") -> Optional[Candidate]:
         """Register a new candidate."""
-        if candidate_id in self.candidates:
-            print(f"Candidate {candidate_id} already registered.")
-            return None
-        
-        candidate = Candidate(candidate_id, name, party, description)
-        self.candidates[candidate_id] = candidate
-        print(f"Candidate registered: {candidate.name} ({party})")
+        with self._lock:
+            if candidate_id in self.candidates:
+                self.events.emit(EVENT_NOTICE, message=f"Candidate {candidate_id} already registered.")
+                return None
+            
+            candidate = Candidate(candidate_id, name, party, description)
+            self.candidates[candidate_id] = candidate
+            self._candidate_view = None
+        self.publish_snapshot()
+        self.events.emit(EVENT_CANDIDATE_REGISTERED, election=self.election_name,
+                         candidate_id=candidate_id, candidate_name=candidate.name, party=party)
         return candidate
     
+    def register_candidates(self, candidates: Iterable[Candidate]) -> int:
+        """
+        Register many candidates, publishing one snapshot for all of them.
+        
+        Candidates whose ID is already registered are skipped. Returns the
+        number added.
+        """
+        added = []
+        with self._lock:
+            for candidate in candidates:
+                if candidate.candidate_id not in self.candidates:
+                    self.candidates[candidate.candidate_id] = candidate
+                    added.append(candidate)
+            if added:
+                self._candidate_view = None
+        if added:
+            self.publish_snapshot()
+        if self.events.has_subscribers(EVENT_CANDIDATE_REGISTERED):
+            for candidate in added:
+                self.events.emit(EVENT_CANDIDATE_REGISTERED, election=self.election_name,
+                                 candidate_id=candidate.candidate_id, candidate_name=candidate.name,
+                                 party=candidate.party)
+        return len(added)
+    
     def start_election(self):
         """Start the election."""
-        if self.is_active:
-            print("Election is already active.")
-            return
-        
-        if not self.candidates:
-            print("Cannot start election: No candidates registered.")
-            return
-        
-        self.is_active = True
-        self.start_time = datetime.now()
-        print(f"Election '{self.election_name}' started at {self.start_time}")
+        with self._lock:
+            if self.is_active:
+                self.events.emit(EVENT_NOTICE, message="Election is already active.")
+                return
+            
+            if not self.candidates:
+                self.events.emit(EVENT_NOTICE, message="Cannot start election: No candidates registered.")
+                return
+            
+            self.is_active = True
+            self.start_time = datetime.now()
+        self.publish_snapshot()
+        if self.sealing_policy.is_enabled:
+            self.sealer.start()
+        self.events.emit(EVENT_ELECTION_STARTED, election=self.election_name, start_time=self.start_time)
     
-    def end_election(self):
-        """End the election and mine remaining votes."""
-        if not self.is_active:
-            print("Election is not active.")
-            return
+    def end_election(self, wait: bool = True) -> Optional[MiningJob]:
+        """
+        End the election and mine remaining votes.
         
-        self.is_active = False
-        self.end_time = datetime.now()
+        The remaining votes are drained through the block sealer. With ``wait``
+        false this happens in the background and the first mining job is
+        returned.
+        """
+        with self._lock:
+            if not self.is_active:
+                self.events.emit(EVENT_NOTICE, message="Election is not active.")
+                return None
+            
+            self.is_active = False
+            self.end_time = datetime.now()
+            # Votes accepted before closing must reach the mempool before it is drained
+            while self._writers:
+                self._writers_done.wait()
+        self.publish_snapshot()
         
         # Mine any pending transactions
-        if self.blockchain.pending_transactions:
-            print("Mining final votes...")
-            self.blockchain.mine_pending_transactions()
+        if self.blockchain.pending_count:
+            self.events.emit(EVENT_NOTICE, message="Mining final votes...")
+        job = self.sealer.drain()
+        self.events.emit(EVENT_ELECTION_ENDED, election=self.election_name, end_time=self.end_time)
+        if not wait:
+            return job
         
-        print(f"Election '{self.election_name}' ended at {self.end_time}")
+        self.sealer.join()
+        return None
     
-    def cast_vote(self, voter_id: str, candidate_id: str, private_key: str) -> bool:
-        """Cast a vote for a candidate."""
-        # Check if election is active
-        if not self.is_active:
-            print("Error: Election is not active.")
-            return False
-        
-        # Check if voter exists
-        if voter_id not in self.voters:
-            print("Error: Voter not registered.")
-            return False
+    def _finish_write(self, indexes: List[int], succeeded: bool):
+        """Release a vote writer, giving back its reserved participation bits if it failed."""
+        with self._lock:
+            if not succeeded:
+                for index in indexes:
+                    self.voted.discard(index)
+            self._writers -= 1
+            if not self._writers:
+                self._writers_done.notify_all()
+    
+    @metrics.timed(metrics.CAST_VOTE_SECONDS)
+    def cast_vote(self, voter_id: str, candidate_id: str, private_key: str) -> VoteResult:
+        """
+        Cast a vote for a candidate.
         
-        voter = self.voters[voter_id]
+        Returns a ``VoteResult``, truthy only if the vote was accepted; its
+        ``code`` says why it was rejected otherwise. The checks and the
+        voter's participation bit are taken under the election lock; the vote
+        is then journaled and queued outside it, so concurrent voters still
+        share journal fsyncs.
+        """
+        with self._lock:
+            voter = self.voters.get(voter_id)
+            if not self.is_active:
+                code = VOTE_ELECTION_INACTIVE
+            elif voter is None:
+                code = VOTE_UNKNOWN_VOTER
+            elif voter.private_key != private_key:
+                code = VOTE_INVALID_KEY
+            elif voter.index in self.voted:
+                code = VOTE_ALREADY_VOTED
+            elif candidate_id not in self.candidates:
+                code = VOTE_UNKNOWN_CANDIDATE
+            else:
+                code = VOTE_ACCEPTED
+                self.voted.add(voter.index)
+                self._writers += 1
+        if code != VOTE_ACCEPTED:
+            result = VoteResult(code)
+            self._report_votes([(voter_id, candidate_id)], [result])
+            return result
         
-        # Verify private key
-        if voter.private_key != private_key:
-            print("Error: Invalid private key.")
-            return False
+        # Create and add transaction
+        transaction = Transaction(voter_id, candidate_id)
+        succeeded = False
+        try:
+            tx_hash = self.blockchain.add_transactions([transaction])[0]
+            succeeded = True
+        finally:
+            self._finish_write([voter.index], succeeded)
+        if tx_hash is None:
+            # Another process sharing the store already recorded a vote by this voter
+            result = VoteResult(VOTE_ALREADY_VOTED)
+        else:
+            self.sealer.vote_added()
+            self.publish_snapshot()
+            result = VoteResult(VOTE_ACCEPTED, tx_hash, transaction.timestamp)
+        self._report_votes([(voter_id, candidate_id)], [result])
+        return result
+    
+    def cast_votes(self, batch: Iterable[Tuple[str, str, str]],
+                   timestamps: List[float] = None) -> List[VoteResult]:
+        """
+        Cast a batch of ``(voter_id, candidate_id, private_key)`` ballots.
         
-        # Check if voter has already voted
-        if voter.has_voted:
-            print("Error: Voter has already cast their vote.")
-            return False
+        Every ballot is validated in one pass and the accepted ones are added
+        to the mempool (and journal) in a single operation. Returns one
+        ``VoteResult`` per ballot, in order. ``timestamps`` gives the time each
+        ballot was cast, e.g. when replaying or generating an election, and
+        defaults to now.
+        """
+        ballots = list(batch)
+        if timestamps is None:
+            timestamps = [None] * len(ballots)
+        voters = self.voters
+        candidates = self.candidates
+        codes: List[str] = []
+        indexes: List[int] = []
+        transactions: List[Transaction] = []
+        seen = set()
+        with self._lock:
+            active = self.is_active
+            if active:
+                for (voter_id, candidate_id, private_key), timestamp in zip(ballots, timestamps):
+                    voter = voters.get(voter_id)
+                    if not voter_id or not candidate_id or not private_key:
+                        code = VOTE_INVALID_BALLOT
+                    elif voter is None:
+                        code = VOTE_UNKNOWN_VOTER
+                    elif voter.private_key != private_key:
+                        code = VOTE_INVALID_KEY
+                    elif voter_id in seen:
+                        code = VOTE_DUPLICATE_IN_BATCH
+                    elif voter.index in self.voted:
+                        code = VOTE_ALREADY_VOTED
+                    elif candidate_id not in candidates:
+                        code = VOTE_UNKNOWN_CANDIDATE
+                    else:
+                        code = VOTE_ACCEPTED
+                        seen.add(voter_id)
+                        self.voted.add(voter.index)
+                        indexes.append(voter.index)
+                        transactions.append(Transaction(voter_id, candidate_id, timestamp))
+                    codes.append(code)
+                self._writers += 1
+        if not active:
+            results = [VoteResult(VOTE_ELECTION_INACTIVE)] * len(ballots)
+            self._report_votes([(v, c) for v, c, _ in ballots], results)
+            return results
         
-        # Check if candidate exists
-        if candidate_id not in self.candidates:
-            print("Error: Candidate not found.")
-            return False
+        succeeded = False
+        try:
+            tx_hashes = iter(self.blockchain.add_transactions(transactions))
+            succeeded = True
+        finally:
+            self._finish_write(indexes, succeeded)
+        if transactions:
+            self.sealer.vote_added()
+            self.publish_snapshot()
         
-        # Create and add transaction
-        transaction = Transaction(voter_id, candidate_id)
-        self.blockchain.add_transaction(transaction)
-        voter.has_voted = True
+        results = []
+        accepted = iter(transactions)
+        for code in codes:
+            if code != VOTE_ACCEPTED:
+                results.append(VoteResult(code))
+                continue
+            tx_hash, transaction = next(tx_hashes), next(accepted)
+            # A shared journal refuses voters who already voted through another process
+            if tx_hash is None:
+                results.append(VoteResult(VOTE_ALREADY_VOTED))
+            else:
+                results.append(VoteResult(VOTE_ACCEPTED, tx_hash, transaction.timestamp))
+        self._report_votes([(v, c) for v, c, _ in ballots], results)
+        return results
+    
+    def _report_votes(self, ballots: List[Tuple[str, str]], results: List[VoteResult]):
+        """Count ballot outcomes and tell event subscribers about each one."""
+        if metrics.ENABLED:
+            for code, count in Counter(result.code for result in results).items():
+                metrics.VOTES.inc(code, amount=count)
         
-        print(f"Vote cast successfully by {voter.name} for {self.candidates[candidate_id].name}")
-        return True
+        events = self.events
+        report_accepted = events.has_subscribers(EVENT_VOTE_ACCEPTED)
+        report_rejected = events.has_subscribers(EVENT_VOTE_REJECTED)
+        if not report_accepted and not report_rejected:
+            return
+        for (voter_id, candidate_id), result in zip(ballots, results):
+            if result.accepted and report_accepted:
+                events.emit(EVENT_VOTE_ACCEPTED, election=self.election_name, voter_id=voter_id,
+                            voter_name=self.voters[voter_id].name, candidate_id=candidate_id,
+                            candidate_name=self.candidates[candidate_id].name, tx_hash=result.tx_hash)
+            elif not result.accepted and report_rejected:
+                events.emit(EVENT_VOTE_REJECTED, election=self.election_name, voter_id=voter_id,
+                            candidate_id=candidate_id, code=result.code, message=result.message)
     
     def mine_votes(self):
         """Mine pending votes into the blockchain."""
         if not self.blockchain.pending_transactions:
-            print("No votes to mine.")
+            self.events.emit(EVENT_NOTICE, message="No votes to mine.")
             return
         
-        print(f"Mining {len(self.blockchain.pending_transactions)} votes...")
+        self.events.emit(EVENT_NOTICE, message=f"Mining {len(self.blockchain.pending_transactions)} votes...")
         self.blockchain.mine_pending_transactions()
-        print("Votes successfully added to blockchain.")
+        self.events.emit(EVENT_NOTICE, message="Votes successfully added to blockchain.")
+    
+    def start_mining_job(self, timeout: float = None,
+                         max_transactions: int = None) -> Optional[MiningJob]:
+        """
+        Mine pending votes on a background thread and return the job.
+        
+        Returns the running job if one is already in progress, or None when
+        there is nothing to mine.
+        """
+        with self._job_lock:
+            job = self.current_mining_job
+            if job and not job.is_finished:
+                return job
+            
+            if not self.blockchain.pending_transactions:
+                return None
+            
+            # Forget the oldest finished jobs so automatic sealing does not grow this without bound
+            while len(self.mining_jobs) >= MAX_MINING_JOB_HISTORY:
+                del self.mining_jobs[next(iter(self.mining_jobs))]
+            
+            job = MiningJob(self.blockchain, timeout=timeout, max_transactions=max_transactions)
+            self.mining_jobs[job.job_id] = job
+            self.current_mining_job = job
+            return job.start()
     
+    def get_mining_job(self, job_id: str) -> Optional[MiningJob]:
+        """Look up a mining job by ID."""
+        return self.mining_jobs.get(job_id)
+    
+    @metrics.timed(metrics.RESULTS_SECONDS)
     def get_results(self) -> Dict[str, int]:
         """Calculate and return election results."""
-        results = {candidate_id: 0 for candidate_id in self.candidates}
+        # Read counts from the blockchain's running tally
+        tally = self.blockchain.tally
+        return {candidate_id: tally.get(candidate_id, 0) for candidate_id in self.candidates}
+    
+    def get_results_at(self, height: int = None, timestamp: float = None) -> Optional[Dict]:
+        """
+        Results as of a past block, chosen by ``height`` or as the last block
+        sealed by ``timestamp`` (the latest block if neither is given).
+        
+        Returns the block's height, hash and timestamp, the votes cast so far
+        and the votes per registered candidate, or None if there is no such
+        block. Read from that block's committed tally, found by a binary search
+        over block timestamps when chosen by time.
+        """
+        blockchain = self.blockchain
+        if height is None:
+            height = blockchain.height_at(timestamp) if timestamp is not None else len(blockchain.chain) - 1
+        checkpoint = blockchain.checkpoint(height)
+        if checkpoint is None:
+            return None
+        results = checkpoint['results']
+        checkpoint['results'] = {candidate_id: results.get(candidate_id, 0) for candidate_id in self.candidates}
+        return checkpoint
+    
+    def get_results_series(self, points: int, start: float = None, end: float = None,
+                           include_results: bool = True) -> List[Dict]:
+        """
+        Results at ``points`` evenly spaced times from ``start`` to ``end``, for charting.
         
-        # Count votes from blockchain
-        all_transactions = self.blockchain.get_all_transactions()
-        for transaction in all_transactions:
-            if transaction.candidate_id in results:
-                results[transaction.candidate_id] += 1
+        The window defaults to the election's start (or the genesis block)
+        until its end, or until now while it is running. Each point carries
+        its time, the block it resolved to and the votes cast by then, plus
+        the per-candidate results unless ``include_results`` is false.
+        """
+        blockchain = self.blockchain
+        if start is None:
+            start = self.start_time.timestamp() if self.start_time else blockchain.chain[0].timestamp
+        if end is None:
+            end = self.end_time.timestamp() if self.end_time else datetime.now().timestamp()
+        end = max(start, end)
+        points = max(1, points)
+        step = (end - start) / (points - 1) if points > 1 else 0.0
         
-        return results
+        series = []
+        for point in range(points):
+            at = start + step * point
+            height = blockchain.height_at(at)
+            checkpoint = blockchain.checkpoint(height) if height >= 0 else None
+            entry = {
+                'time': at,
+                'height': height if checkpoint else None,
+                'votes_cast': checkpoint['votes_cast'] if checkpoint else 0
+            }
+            if include_results:
+                results = checkpoint['results'] if checkpoint else {}
+                entry['results'] = {candidate_id: results.get(candidate_id, 0) for candidate_id in self.candidates}
+            series.append(entry)
+        return series
+    
+    def get_pending_results(self) -> Dict[str, int]:
+        """Return vote counts for votes cast but not yet mined."""
+        pending_tally = self.blockchain.pending_tally
+        return {candidate_id: pending_tally.get(candidate_id, 0) for candidate_id in self.candidates}
     
     def display_results(self):
         """Display election results in a formatted way."""
@@ -211,15 +711,95 @@ class VotingSystem:
         
         print(f"{'='*60}\n")
     
-    def verify_blockchain_integrity(self) -> bool:
-        """Verify the integrity of the blockchain."""
-        is_valid = self.blockchain.is_chain_valid()
+    def verify_blockchain_integrity(self, deep: bool = False) -> bool:
+        """Verify the integrity of the blockchain (``deep`` re-hashes every block)."""
+        is_valid = self.blockchain.is_chain_valid(deep=deep)
         if is_valid:
-            print("✓ Blockchain integrity verified: All votes are secure and tamper-proof.")
+            message = "✓ Blockchain integrity verified: All votes are secure and tamper-proof."
         else:
-            print("✗ Blockchain integrity check FAILED: Potential tampering detected!")
+            message = "✗ Blockchain integrity check FAILED: Potential tampering detected!"
+        self.events.emit(EVENT_NOTICE, message=message)
         return is_valid
     
+    def verify_tally(self) -> bool:
+        """Verify the running tally against a full recount of the blockchain."""
+        return self.blockchain.is_tally_consistent()
+    
+    def audit_results(self, full: bool = False) -> Dict:
+        """
+        Verify the results committed to by the block headers (see
+        ``Blockchain.audit_results``), with ``full`` checking every block's
+        votes over the mining worker processes. Results list every
+        registered candidate.
+        """
+        blockchain = self.blockchain
+        audit = blockchain.audit_results(full, blockchain.workers)
+        results = audit['results']
+        audit['results'] = {candidate_id: results.get(candidate_id, 0) for candidate_id in self.candidates}
+        return audit
+    
+    def publish_snapshot(self):
+        """
+        Mark the published snapshot stale and tell ``snapshot_published``
+        subscribers. Called after every change, so it only bumps a version;
+        the next read of ``snapshot`` builds the new one.
+        """
+        with self._snapshot_lock:
+            self._snapshot_version += 1
+            version = self._snapshot_version
+        self.events.emit(EVENT_SNAPSHOT_PUBLISHED, election=self.election_name, version=version)
+    
+    @property
+    def snapshot(self) -> ElectionSnapshot:
+        """The current state as an ``ElectionSnapshot``, rebuilt at most once per change."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._snapshot_version:
+            return snapshot
+        with self._build_lock:
+            snapshot = self._snapshot
+            # Read the version before the state; a change made meanwhile is built again next read
+            version = self._snapshot_version
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._build_snapshot(version)
+                self._snapshot = snapshot
+        return snapshot
+    
+    def _build_snapshot(self, version: int) -> ElectionSnapshot:
+        blockchain = self.blockchain
+        tally, pending_tally, votes_cast, pending_count = blockchain.counts()
+        candidates = self._candidate_view
+        if candidates is None:
+            candidates = self._candidate_view = MappingProxyType(dict(self.candidates))
+        return ElectionSnapshot(
+            version=version,
+            election_name=self.election_name,
+            is_active=self.is_active,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            candidates=candidates,
+            results={cid: tally.get(cid, 0) for cid in candidates},
+            pending_results={cid: pending_tally.get(cid, 0) for cid in candidates},
+            votes_cast=votes_cast,
+            pending_count=pending_count,
+            blockchain_blocks=len(blockchain.chain),
+            latest_hash=blockchain.get_latest_block().hash,
+            difficulty=blockchain.difficulty,
+            is_valid=blockchain.is_chain_valid()
+        )
+    
+    def has_voted(self, voter_id: str) -> bool:
+        """Whether a voter has cast a vote in this election."""
+        index = self.voters.index_of(voter_id)
+        return index is not None and index in self.voted
+    
+    def mark_voted(self, voter_id: str) -> bool:
+        """Record that a voter has voted here, e.g. when rebuilding from stored votes."""
+        index = self.voters.index_of(voter_id)
+        if index is None:
+            return False
+        with self._lock:
+            return self.voted.add(index)
+    
     def get_voter_count(self) -> int:
         """Get the total number of registered voters."""
         return len(self.voters)
@@ -230,7 +810,7 @@ class VotingSystem:
     
     def get_votes_cast(self) -> int:
         """Get the total number of votes cast."""
-        return len(self.blockchain.get_all_transactions())
+        return self.blockchain.transaction_count
     
     def export_election_data(self) -> Dict:
         """Export all election data."""
@@ -239,7 +819,8 @@ class VotingSystem:
             'is_active': self.is_active,
             'start_time': str(self.start_time) if self.start_time else None,
             'end_time': str(self.end_time) if self.end_time else None,
-            'voters': [voter.to_dict() for voter in self.voters.values()],
+            'voters': [dict(voter.to_dict(), has_voted=voter.index in self.voted)
+                       for voter in self.voters.values()],
             'candidates': [candidate.to_dict() for candidate in self.candidates.values()],
             'results': self.get_results(),
             'blockchain': self.blockchain.export_chain()